@@ -18,6 +18,127 @@ load_dotenv()
 sys.path.insert(0, str(Path(__file__).parent))
 from generators.veo3_sample import generate_video as generate_video_simple
 from generators.veo3_talking_video import generate_video as generate_video_talking
+from generators.job_queue import Job, JobQueue
+from generators.job_store import get_job_store
+from generators.scratch import get_scratch
+
+
+PATTERN_TALKING = "口パク動画（Talking Video）"
+PATTERN_SIMPLE = "通常動画（書籍表紙の動き）"
+
+# 実行中のジョブがある間、一覧を更新する間隔
+JOB_REFRESH_INTERVAL = "3s"
+
+# 失敗したジョブの例外の種類 -> 表示するヒント
+ERROR_HINTS = {
+    "FileNotFoundError": "画像ファイルが見つかりません",
+    "ValueError": "パラメータが正しくありません",
+    "SystemExit": "API呼び出しに失敗しました。API Keyやクオータを確認してください",
+    "QuotaExceededError": "Veo のクオータを超えています。しばらく待ってから投入し直してください",
+    "Interrupted": "同じ画像・プロンプトで投入し直してください（生成中だった動画があれば続きから受け取ります）",
+}
+
+STATUS_ICONS = {"queued": "⏳", "running": "🔄", "done": "✅", "failed": "❌"}
+
+
+def run_talking_job(image_path: str, prompt: str, output_dir: str, use_cache: bool) -> Path:
+    """口パク動画のジョブ（ワーカースレッドで実行、入力画像は終わったら削除）"""
+    try:
+        return generate_video_talking(
+            image_path=Path(image_path),
+            prompt=prompt,
+            output_dir=Path(output_dir),
+            model="veo-3.0-generate-001",
+            use_cache=use_cache
+        )
+    finally:
+        get_scratch().release(Path(image_path))
+
+
+def run_simple_job(image_path: str, prompt: str, output_dir: str, duration: int, use_cache: bool) -> Path:
+    """通常動画のジョブ（ワーカースレッドで実行、入力画像は終わったら削除）"""
+    try:
+        return generate_video_simple(
+            image_path=Path(image_path),
+            prompt=prompt,
+            output_dir=Path(output_dir),
+            duration=duration,
+            use_cache=use_cache
+        )
+    finally:
+        get_scratch().release(Path(image_path))
+
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """プロセスで共有するジョブキュー（再実行・再読み込み・セッション・再起動をまたいで残る）"""
+    return JobQueue({"talking": run_talking_job, "simple": run_simple_job}, store=get_job_store())
+
+
+def render_job(job: Job) -> None:
+    """ジョブ1件を表示する"""
+    icon = STATUS_ICONS[job.status]
+    elapsed = f"（{job.elapsed:.0f}秒）" if job.started_at is not None else ""
+    with st.expander(f"{icon} {job.label} — {job.status}{elapsed}", expanded=job.status != "done"):
+        st.caption(f"ジョブID: {job.id}")
+
+        if job.status == "done" and job.output_path:
+            output_path = Path(job.output_path)
+            if not output_path.exists():
+                st.warning(f"⚠️ 出力ファイルが見つかりません: {output_path}")
+                return
+            st.video(str(output_path))
+
+            # ダウンロードボタン
+            with open(output_path, "rb") as video_file:
+                st.download_button(
+                    label="📥 動画をダウンロード",
+                    data=video_file,
+                    file_name=output_path.name,
+                    mime="video/mp4",
+                    use_container_width=True,
+                    key=f"download_{job.id}"
+                )
+
+            # ファイル情報
+            file_size_mb = output_path.stat().st_size / (1024 * 1024)
+            st.info(f"ファイルサイズ: {file_size_mb:.2f} MB")
+
+        elif job.status == "failed":
+            st.error(f"❌ エラー: {job.error}")
+            st.info(ERROR_HINTS.get(job.error_type, "予期しないエラーです。ログを確認してください"))
+
+
+@st.fragment(run_every=JOB_REFRESH_INTERVAL)
+def render_active_jobs(queue: JobQueue) -> None:
+    """実行中のジョブがある間だけ、この部分を定期的に再描画する"""
+    jobs = queue.jobs()
+    if not any(job.active for job in jobs):
+        st.rerun()  # 全部終わったら全体を再実行し、静的な表示に切り替える
+    for job in jobs:
+        render_job(job)
+
+
+def render_jobs(queue: JobQueue) -> None:
+    """ジョブ一覧（新しい順）"""
+    counts = queue.counts()
+    if not sum(counts.values()):
+        return
+
+    st.subheader("🗂️ ジョブ")
+    st.caption(
+        f"待機中 {counts['queued']} / 実行中 {counts['running']} / "
+        f"完了 {counts['done']} / 失敗 {counts['failed']}"
+    )
+    if st.button("🧹 終了したジョブを一覧から消す", disabled=not (counts["done"] or counts["failed"])):
+        queue.clear_finished()
+        st.rerun()
+
+    if counts["queued"] or counts["running"]:
+        render_active_jobs(queue)
+    else:
+        for job in queue.jobs():
+            render_job(job)
 
 
 def main():
@@ -49,7 +170,7 @@ def main():
         st.subheader("プロンプトパターン")
         pattern = st.selectbox(
             "生成パターンを選択",
-            options=["口パク動画（Talking Video）", "通常動画（書籍表紙の動き）"],
+            options=[PATTERN_TALKING, PATTERN_SIMPLE],
             index=0,
             help="口パク: 人物が話す動画 / 通常: 書籍表紙がズームやパンする動画"
         )
@@ -58,7 +179,7 @@ def main():
         st.subheader("動画設定")
 
         # パターンに応じて設定を変更
-        if pattern == "口パク動画（Talking Video）":
+        if pattern == PATTERN_TALKING:
             st.info("💬 Talking Video: 約8秒の口パク動画を生成します")
             duration = 8  # 固定
         else:
@@ -75,6 +196,12 @@ def main():
             help="生成された動画の保存先"
         )
 
+        use_cache = st.checkbox(
+            "生成済み動画を再利用",
+            value=True,
+            help="同じ画像・プロンプト・設定で生成済みの動画があれば、APIを呼ばずにそれを使います"
+        )
+
     # メインコンテンツ
     col1, col2 = st.columns([1, 1])
 
@@ -82,7 +209,7 @@ def main():
         st.header("📤 入力")
 
         # 画像アップロード（パターンに応じてラベルを変更）
-        if pattern == "口パク動画（Talking Video）":
+        if pattern == PATTERN_TALKING:
             upload_label = "人物画像をアップロード"
             upload_help = "人物が写っている画像をアップロードしてください（口パク動画を生成します）"
         else:
@@ -99,7 +226,7 @@ def main():
             st.image(uploaded_file, caption="アップロードされた画像", use_container_width=True)
 
         # プロンプトテンプレート（パターンに応じて変更）
-        if pattern == "口パク動画（Talking Video）":
+        if pattern == PATTERN_TALKING:
             default_prompt = (
                 "ショット: 正面のバストショット。カメラは固定し、揺れや過度なズームは避ける。\n"
                 "被写体: 入力画像の人物。顔の造形・髪型・衣服の一貫性を保つ。自然な瞬きと微細な表情。\n"
@@ -134,79 +261,33 @@ def main():
     with col2:
         st.header("📥 出力")
 
+        queue = get_job_queue()
+
         if generate_button and uploaded_file and prompt.strip():
-            # 一時ファイルに保存
-            temp_dir = Path("temp")
-            temp_dir.mkdir(exist_ok=True)
-            temp_image_path = temp_dir / uploaded_file.name
-
-            with open(temp_image_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-
-            try:
-                # 動画生成（進捗表示付き）
-                with st.spinner("⏳ 動画を生成中... 数分かかる場合があります"):
-                    # パターンに応じて適切な関数を呼び出し
-                    if pattern == "口パク動画（Talking Video）":
-                        st.info("🎥 Veo 3.0 Talking Video APIで動画生成を開始しました")
-                        output_path = generate_video_talking(
-                            image_path=temp_image_path,
-                            prompt=prompt,
-                            output_dir=Path(output_dir),
-                            model="veo-3.0-generate-001"
-                        )
-                    else:
-                        st.info("🎥 Veo 3.1 APIで動画生成を開始しました")
-                        output_path = generate_video_simple(
-                            image_path=temp_image_path,
-                            prompt=prompt,
-                            output_dir=Path(output_dir),
-                            duration=duration
-                        )
-
-                    st.success(f"✅ 動画生成完了: {output_path}")
-
-                # 生成された動画を表示
-                if output_path.exists():
-                    st.video(str(output_path))
-
-                    # ダウンロードボタン
-                    with open(output_path, "rb") as video_file:
-                        st.download_button(
-                            label="📥 動画をダウンロード",
-                            data=video_file,
-                            file_name=output_path.name,
-                            mime="video/mp4",
-                            use_container_width=True
-                        )
-
-                    # ファイル情報
-                    file_size_mb = output_path.stat().st_size / (1024 * 1024)
-                    st.info(f"ファイルサイズ: {file_size_mb:.2f} MB")
-
-            except FileNotFoundError as e:
-                st.error(f"❌ エラー: {e}")
-                st.info("画像ファイルが見つかりません")
-
-            except ValueError as e:
-                st.error(f"❌ エラー: {e}")
-                st.info("パラメータが正しくありません")
-
-            except SystemExit as e:
-                st.error(f"❌ エラー: {e}")
-                st.info("API呼び出しに失敗しました。API Keyやクオータを確認してください")
-
-            except Exception as e:
-                st.error(f"❌ 予期しないエラー: {e}")
-                st.exception(e)
-
-            finally:
-                # 一時ファイル削除
-                if temp_image_path.exists():
-                    temp_image_path.unlink()
+            # 入力画像はジョブが終わるまで残す（ジョブの中で削除する）
+            image_path = get_scratch().path(Path(uploaded_file.name).suffix, prefix="job_input")
+            image_path.write_bytes(uploaded_file.getbuffer())
+
+            # パターンに応じてジョブを投入（すぐに返る）
+            if pattern == PATTERN_TALKING:
+                job = queue.submit("talking", uploaded_file.name, {
+                    "image_path": str(image_path),
+                    "prompt": prompt,
+                    "output_dir": output_dir,
+                    "use_cache": use_cache,
+                })
+            else:
+                job = queue.submit("simple", uploaded_file.name, {
+                    "image_path": str(image_path),
+                    "prompt": prompt,
+                    "output_dir": output_dir,
+                    "duration": duration,
+                    "use_cache": use_cache,
+                })
+            st.success(f"📥 ジョブを投入しました（{job.id}）。生成には数分かかる場合があります。他の操作を続けて構いません")
 
         elif not uploaded_file:
-            if pattern == "口パク動画（Talking Video）":
+            if pattern == PATTERN_TALKING:
                 st.info("👆 人物画像をアップロードしてください")
             else:
                 st.info("👆 書籍表紙画像をアップロードしてください")
@@ -214,6 +295,8 @@ def main():
         elif not prompt.strip():
             st.warning("⚠️ プロンプトを入力してください")
 
+        render_jobs(queue)
+
     # フッター
     st.markdown("---")
     st.markdown(
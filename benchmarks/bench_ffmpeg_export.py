@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+オーバーレイ書き出しのベンチマーク（MoviePy vs ffmpeg overlay フィルタ）
+
+add_book_overlay のレイアウト（title_top / cover_right / both）ごとに、
+MoviePy（1プロセスの write_videofile）と ffmpeg_export.export_book_overlay の
+書き出し時間・Python プロセス自身の CPU 時間を比較する。画質の差は中央フレームの平均絶対誤差で示す。
+
+使い方:
+    python benchmarks/bench_ffmpeg_export.py --duration 8
+    python benchmarks/bench_ffmpeg_export.py --video data/output/sample.mp4 --cover 表紙.png
+"""
+
+import argparse
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from moviepy import VideoFileClip
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from bench_parallel_render import LAYOUTS, make_test_cover, make_test_video
+from generators.ffmpeg_export import export_book_overlay
+from generators.moviepy_effects import open_book_overlay
+from generators.parallel_render import EncodeSettings, render_parallel
+from generators.scratch import get_scratch
+
+
+def timed(fn):
+    """(経過秒, 自プロセスのCPU秒) を返す"""
+    cpu = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF)
+    return elapsed, (after.ru_utime - cpu.ru_utime) + (after.ru_stime - cpu.ru_stime)
+
+
+def middle_frame(path: Path) -> np.ndarray:
+    clip = VideoFileClip(str(path))
+    try:
+        return clip.get_frame(clip.duration / 2).astype(np.int16)
+    finally:
+        clip.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MoviePy vs ffmpeg overlay export")
+    parser.add_argument("--video", type=Path, help="元動画（省略時はテスト動画を生成）")
+    parser.add_argument("--cover", type=Path, help="表紙画像（省略時は単色画像を生成）")
+    parser.add_argument("--title", default="あの戦争は何だったのか", help="タイトル")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--duration", type=float, default=8.0)
+    parser.add_argument("--fps", type=float, default=24)
+    parser.add_argument("--layouts", nargs="+", default=list(LAYOUTS), choices=LAYOUTS)
+    args = parser.parse_args()
+
+    scratch = get_scratch()
+    video = args.video or make_test_video(
+        scratch.path(suffix=".mp4", prefix="bench_src"), (args.width, args.height), args.duration, args.fps
+    )
+    cover = args.cover or make_test_cover(scratch.path(suffix=".png", prefix="bench_cover"))
+    settings = EncodeSettings(fps=args.fps)
+
+    print(f"動画: {video}")
+    print(f"{'layout':<12} {'moviepy':>9} {'(py cpu)':>9} {'ffmpeg':>9} {'(py cpu)':>9} {'speedup':>8} {'diff':>6}")
+    for layout in args.layouts:
+        with scratch.temp_file(suffix=".mp4") as moviepy_out, scratch.temp_file(suffix=".mp4") as ffmpeg_out:
+            mp_time, mp_cpu = timed(lambda: render_parallel(
+                open_book_overlay, (str(video), str(cover), args.title, layout), moviepy_out,
+                settings=settings, workers=1,
+            ))
+            ff_time, ff_cpu = timed(lambda: export_book_overlay(
+                video, ffmpeg_out, cover, args.title, layout, settings=settings,
+            ))
+            diff = np.abs(middle_frame(moviepy_out) - middle_frame(ffmpeg_out)).mean()
+
+        print(
+            f"{layout:<12} {mp_time:>8.1f}s {mp_cpu:>8.1f}s {ff_time:>8.1f}s {ff_cpu:>8.2f}s "
+            f"{mp_time / ff_time:>7.2f}x {diff:>6.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
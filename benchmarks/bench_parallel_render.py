@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+合成動画の書き出し時間ベンチマーク（1プロセス vs 区間並列）
+
+add_book_overlay のレイアウト（title_top / cover_right / both）ごとに、
+従来の write_videofile 1回と parallel_render.render_parallel の書き出し時間を比較する。
+--video を省略すると、ノイズ映像 + サイン波音声のテスト動画を作って使う。
+
+使い方:
+    python benchmarks/bench_parallel_render.py --duration 16 --workers 16
+    python benchmarks/bench_parallel_render.py --video data/output/sample.mp4 --cover 表紙.png
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from moviepy import AudioClip, VideoClip
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from generators.moviepy_effects import open_book_overlay
+from generators.parallel_render import EncodeSettings, render_parallel
+from generators.scratch import get_scratch
+
+
+LAYOUTS = ("title_top", "cover_right", "both")
+
+
+def make_test_video(path: Path, size, duration: float, fps: float) -> Path:
+    """動きのあるテスト動画（エンコード負荷を実写に近づけるためノイズを混ぜる）"""
+    w, h = size
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 64, size=(h, w, 3), dtype=np.uint8)
+    gradient = np.linspace(0, 191, w, dtype=np.uint8)[None, :, None]
+
+    def frame(t):
+        shift = int(t * 120) % w
+        return np.roll(noise, shift, axis=1) + gradient
+
+    def sound(t):
+        return np.sin(2 * np.pi * 440 * np.asarray(t))[..., None].repeat(2, axis=-1) * 0.2
+
+    clip = VideoClip(frame, duration=duration).with_audio(AudioClip(sound, duration=duration, fps=44100))
+    clip.write_videofile(str(path), fps=fps, codec="libx264", audio_codec="aac", preset="ultrafast", logger=None)
+    return path
+
+
+def make_test_cover(path: Path) -> Path:
+    img = Image.new("RGB", (600, 900), (180, 40, 40))
+    img.save(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs parallel overlay export")
+    parser.add_argument("--video", type=Path, help="元動画（省略時はテスト動画を生成）")
+    parser.add_argument("--cover", type=Path, help="表紙画像（省略時は単色画像を生成）")
+    parser.add_argument("--title", default="あの戦争は何だったのか", help="タイトル")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--duration", type=float, default=16.0)
+    parser.add_argument("--fps", type=float, default=24)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--layouts", nargs="+", default=list(LAYOUTS), choices=LAYOUTS)
+    args = parser.parse_args()
+
+    scratch = get_scratch()
+    video = args.video or make_test_video(
+        scratch.path(suffix=".mp4", prefix="bench_src"), (args.width, args.height), args.duration, args.fps
+    )
+    cover = args.cover or make_test_cover(scratch.path(suffix=".png", prefix="bench_cover"))
+    settings = EncodeSettings(fps=args.fps)
+
+    print(f"動画: {video}  workers={args.workers}")
+    print(f"{'layout':<12} {'serial':>9} {'parallel':>9} {'speedup':>8}")
+    for layout in args.layouts:
+        factory_args = (str(video), str(cover), args.title, layout)
+
+        with scratch.temp_file(suffix=".mp4") as out:
+            start = time.perf_counter()
+            render_parallel(open_book_overlay, factory_args, out, settings=settings, workers=1)
+            serial = time.perf_counter() - start
+
+        with scratch.temp_file(suffix=".mp4") as out:
+            start = time.perf_counter()
+            render_parallel(open_book_overlay, factory_args, out, settings=settings, workers=args.workers)
+            parallel = time.perf_counter() - start
+
+        print(f"{layout:<12} {serial:>8.1f}s {parallel:>8.1f}s {serial / parallel:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+音声ファイルの長さをヘッダから求める（デコードしない）
+
+- WAV（LINEAR16）: fmt チャンクのバイトレートと data チャンクのサイズ
+- MP3: Xing/Info ヘッダのフレーム数（LAME タグの遅延・パディングを除く）、
+  なければフレームヘッダだけを順にたどってサンプル数を数える
+- OGG（Opus / Vorbis）: 最後のページのグラニュール位置（Opus は pre-skip を引く）
+
+文字数からの推定と違い、言語や話速、句読点のポーズに左右されない。
+"""
+
+import struct
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+# MPEG Audio Layer III のビットレート（kbps）: [MPEG1, MPEG2/2.5][index]
+_MP3_BITRATES = (
+    (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+)
+
+# サンプリングレート: バージョンビット -> [index]
+_MP3_SAMPLE_RATES = {
+    0b11: (44100, 48000, 32000),  # MPEG1
+    0b10: (22050, 24000, 16000),  # MPEG2
+    0b00: (11025, 12000, 8000),   # MPEG2.5
+}
+
+
+def wav_duration(data: bytes) -> float:
+    """WAV（RIFF）の長さ（秒）"""
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("not a WAV (RIFF/WAVE) file")
+    byte_rate = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        size = int.from_bytes(data[pos + 4:pos + 8], "little")
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            byte_rate = int.from_bytes(data[body + 8:body + 12], "little")
+        elif chunk_id == b"data":
+            if byte_rate is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            # ストリーミング出力ではサイズが未確定（0xFFFFFFFF など）のことがあるので実際の残りで抑える
+            return min(size, len(data) - body) / byte_rate
+        pos = body + size + (size & 1)  # チャンクは2バイト境界に揃う
+    raise ValueError("WAV has no data chunk")
+
+
+def _id3v2_size(data: bytes) -> int:
+    # 先頭の ID3v2 タグの長さ（なければ0）
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+    size = 0
+    for b in data[6:10]:  # syncsafe integer（各バイト7ビット）
+        size = (size << 7) | (b & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _mp3_frame(data: bytes, pos: int) -> Optional[Tuple[int, int, int, int, int]]:
+    # pos から始まるフレームヘッダを読む: (フレーム長, 1フレームのサンプル数, サンプリングレート, バージョン, チャンネルモード)
+    if pos + 4 > len(data):
+        return None
+    header = int.from_bytes(data[pos:pos + 4], "big")
+    if header >> 21 != 0x7FF:
+        return None
+    version = (header >> 19) & 0b11
+    layer = (header >> 17) & 0b11
+    bitrate_index = (header >> 12) & 0b1111
+    rate_index = (header >> 10) & 0b11
+    if version == 0b01 or layer != 0b01 or bitrate_index in (0, 15) or rate_index == 3:
+        # 予約値・Layer III 以外・フリーフォーマットは扱わない
+        return None
+    mpeg1 = version == 0b11
+    bitrate = _MP3_BITRATES[0 if mpeg1 else 1][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header >> 9) & 1
+    samples = 1152 if mpeg1 else 576
+    length = (samples // 8) * bitrate // sample_rate + padding
+    return length, samples, sample_rate, version, (header >> 6) & 0b11
+
+
+def mp3_duration(data: bytes) -> float:
+    """MP3（MPEG Audio Layer III）の長さ（秒）"""
+    pos = _id3v2_size(data)
+    # 先頭のフレームまで同期を探す
+    while pos + 4 <= len(data) and _mp3_frame(data, pos) is None:
+        pos += 1
+    first = _mp3_frame(data, pos)
+    if first is None:
+        raise ValueError("no MP3 frame found")
+
+    length, samples, sample_rate, version, mode = first
+    # VBR の Xing/Info ヘッダがあれば、総フレーム数がそのまま書いてある
+    mono = mode == 0b11
+    side_info = (17 if mono else 32) if version == 0b11 else (9 if mono else 17)
+    tag = pos + 4 + side_info
+    if data[tag:tag + 4] in (b"Xing", b"Info"):
+        flags = int.from_bytes(data[tag + 4:tag + 8], "big")
+        if flags & 1:
+            frames = int.from_bytes(data[tag + 8:tag + 12], "big")
+            # LAME 拡張があれば、エンコーダの遅延と末尾のパディングを除いた実際のサンプル数にする
+            lame = tag + 8 + sum(n for bit, n in ((1, 4), (2, 4), (4, 100), (8, 4)) if flags & bit)
+            trim = 0
+            if data[lame:lame + 4] in (b"LAME", b"Lavf", b"Lavc"):  # ffmpeg は自身の名前で同じ形式を書く
+                packed = int.from_bytes(data[lame + 21:lame + 24], "big")
+                trim = (packed >> 12) + (packed & 0xFFF)
+            return max(frames * samples - trim, 0) / sample_rate
+        pos += length  # フレーム数がなければ、タグのフレームを飛ばして数える
+
+    total = 0
+    while pos + 4 <= len(data):
+        frame = _mp3_frame(data, pos)
+        if frame is None:
+            if data[pos:pos + 3] == b"TAG":  # 末尾の ID3v1
+                break
+            pos += 1  # 壊れたバイトは読み飛ばして再同期する
+            continue
+        length, samples, _, _, _ = frame
+        total += samples
+        pos += length
+    return total / sample_rate
+
+
+def ogg_duration(data: bytes) -> float:
+    """OGG（Opus / Vorbis）の長さ（秒）"""
+    last = data.rfind(b"OggS")
+    if last < 0 or data[:4] != b"OggS":
+        raise ValueError("not an OGG file")
+    granule = struct.unpack_from("<q", data, last + 6)[0]
+
+    opus = data.find(b"OpusHead")
+    if opus >= 0:
+        # Opus は常に 48kHz で数え、先頭の pre-skip 分は再生されない
+        pre_skip = int.from_bytes(data[opus + 10:opus + 12], "little")
+        return max(granule - pre_skip, 0) / 48000
+    vorbis = data.find(b"\x01vorbis")
+    if vorbis >= 0:
+        sample_rate = int.from_bytes(data[vorbis + 12:vorbis + 16], "little")
+        return granule / sample_rate
+    raise ValueError("unsupported OGG codec (expected Opus or Vorbis)")
+
+
+def audio_duration(data: bytes, audio_encoding: str) -> float:
+    """
+    音声のバイト列の長さ（秒）
+
+    Args:
+        data: 音声ファイルの中身
+        audio_encoding: "MP3" / "LINEAR16" / "OGG_OPUS"
+    """
+    if audio_encoding == "LINEAR16":
+        return wav_duration(data)
+    if audio_encoding == "MP3":
+        return mp3_duration(data)
+    if audio_encoding == "OGG_OPUS":
+        return ogg_duration(data)
+    raise ValueError(f"Unsupported audio_encoding: {audio_encoding}")
+
+
+def audio_file_duration(path: Path) -> float:
+    """音声ファイルの長さ（秒、拡張子で形式を判断する）"""
+    path = Path(path)
+    encoding = {".wav": "LINEAR16", ".mp3": "MP3", ".ogg": "OGG_OPUS", ".opus": "OGG_OPUS"}.get(path.suffix.lower())
+    if encoding is None:
+        raise ValueError(f"Unsupported audio file: {path}")
+    return audio_duration(path.read_bytes(), encoding)
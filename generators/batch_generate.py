@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+マニフェストからの一括動画生成
+
+CSV / JSONL / JSON のマニフェスト（画像・プロンプト・モデル・長さ・出力名）を読み込み、
+1つの genai.Client を共有したジョブエンジンで同時実行数を制限しながら生成する。
+完了したジョブはチェックポイントファイルに追記するので、途中で落ちても再実行で続きから再開できる。
+
+JSON はオブジェクトの配列（各オブジェクトのキーは CSV の列と同じ）。
+
+マニフェストの列:
+    image     入力画像のパス（相対パスはマニフェストの場所から解決）  必須
+    prompt    動画生成プロンプト                                      必須
+    model     モデル名（省略時は --model）
+    duration  動画長さ（秒、省略時は --duration）
+    output    出力ファイル名（省略時は "<行番号>_<画像名>.mp4"）
+
+使い方:
+    python -m generators.batch_generate covers.csv --output output/batch --concurrency 6
+"""
+
+import csv
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# スクリプトとして直接実行した場合も generators パッケージを解決できるようにする
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv
+
+from generators.veo_jobs import VeoJobResult, VeoJobSpec, run_jobs
+
+
+DEFAULT_MODEL = "veo-3.1-generate-preview"
+DEFAULT_DURATION = 8
+
+
+@dataclass
+class ManifestRow:
+    """マニフェストの1行"""
+    image: Path
+    prompt: str
+    model: str
+    duration: int
+    output: str
+
+
+def read_manifest(
+    manifest_path: Path,
+    default_model: str = DEFAULT_MODEL,
+    default_duration: int = DEFAULT_DURATION,
+) -> List[ManifestRow]:
+    """
+    マニフェストを読み込む（拡張子 .jsonl はJSONL、.json はオブジェクトの配列、それ以外はCSV）
+
+    Raises:
+        FileNotFoundError: マニフェストが存在しない
+        ValueError: 必須列の欠落、出力名の重複、不正な duration、オブジェクトでない行
+    """
+    manifest_path = Path(manifest_path)
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"Manifest not found: {manifest_path}")
+
+    suffix = manifest_path.suffix.lower()
+    if suffix == ".jsonl":
+        with open(manifest_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    elif suffix == ".json":
+        with open(manifest_path, encoding="utf-8") as f:
+            records = json.load(f)
+        if not isinstance(records, list):
+            raise ValueError(f"JSON manifest must be an array of objects: {manifest_path}")
+    else:
+        with open(manifest_path, encoding="utf-8-sig", newline="") as f:
+            records = list(csv.DictReader(f))
+
+    base_dir = manifest_path.parent
+    rows: List[ManifestRow] = []
+    seen_outputs = set()
+    for lineno, record in enumerate(records, start=1):
+        # Fail-First: 実行前にマニフェスト全体を検証する
+        if not isinstance(record, dict):
+            raise ValueError(f"Manifest row {lineno}: expected an object, got {type(record).__name__}")
+        image = (record.get("image") or "").strip()
+        prompt = (record.get("prompt") or "").strip()
+        if not image or not prompt:
+            raise ValueError(f"Manifest row {lineno}: 'image' and 'prompt' are required")
+
+        image_path = Path(image)
+        if not image_path.is_absolute():
+            image_path = base_dir / image_path
+
+        duration = int(record.get("duration") or default_duration)
+        if not 4 <= duration <= 8:
+            raise ValueError(f"Manifest row {lineno}: duration must be 4-8 seconds, got {duration}")
+
+        output = (record.get("output") or "").strip() or f"{lineno:04d}_{image_path.stem}.mp4"
+        if not Path(output).suffix:
+            output += ".mp4"
+        if output in seen_outputs:
+            raise ValueError(f"Manifest row {lineno}: duplicate output name '{output}'")
+        seen_outputs.add(output)
+
+        rows.append(ManifestRow(
+            image=image_path,
+            prompt=prompt,
+            model=(record.get("model") or "").strip() or default_model,
+            duration=duration,
+            output=output,
+        ))
+    return rows
+
+
+class Checkpoint:
+    """完了したジョブの記録（JSONL追記、1ジョブ終わるごとに書き込む）"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def completed(self) -> Dict[str, dict]:
+        """出力名 -> 記録（status == "done" で出力ファイルが残っているもの）"""
+        done: Dict[str, dict] = {}
+        if not self.path.exists():
+            return done
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # クラッシュ時に書きかけだった行
+                if row.get("status") == "done" and Path(row.get("path", "")).exists():
+                    done[row["output"]] = row
+                else:
+                    done.pop(row.get("output"), None)
+        return done
+
+    def record(self, output: str, result: VeoJobResult) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        row = {
+            "output": output,
+            "status": result.status,
+            "path": str(result.output_path) if result.output_path else None,
+            "error": result.error,
+            "elapsed": round(result.elapsed, 1),
+            "at": time.time(),
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            f.flush()
+
+
+def run_batch(
+    manifest_path: Path,
+    output_dir: Path,
+    *,
+    checkpoint_path: Optional[Path] = None,
+    max_concurrency: int = 4,
+    job_timeout: float = 900.0,
+    default_model: str = DEFAULT_MODEL,
+    default_duration: int = DEFAULT_DURATION,
+    use_cache: bool = True,
+) -> List[VeoJobResult]:
+    """
+    マニフェストの全行を生成する（チェックポイント済みの行はスキップ）
+
+    Args:
+        manifest_path: マニフェスト（CSV / JSONL）
+        output_dir: 出力ディレクトリ
+        checkpoint_path: チェックポイントファイル（既定: <output_dir>/<マニフェスト名>.checkpoint.jsonl）
+        max_concurrency: 同時実行数の上限
+        job_timeout: ジョブ1件あたりのタイムアウト（秒）
+        default_model: model 列が空の行のモデル
+        default_duration: duration 列が空の行の長さ
+        use_cache: 生成済み動画のキャッシュを使う
+
+    Returns:
+        今回実行したジョブの結果
+    """
+    rows = read_manifest(manifest_path, default_model, default_duration)
+    output_dir = Path(output_dir)
+    checkpoint = Checkpoint(checkpoint_path or output_dir / f"{Path(manifest_path).stem}.checkpoint.jsonl")
+
+    completed = checkpoint.completed()
+    pending = [row for row in rows if row.output not in completed]
+
+    print("=" * 60)
+    print("🎬 一括動画生成")
+    print("=" * 60)
+    print(f"マニフェスト: {manifest_path}（{len(rows)}件）")
+    print(f"完了済み（スキップ）: {len(rows) - len(pending)}件")
+    print(f"今回の実行: {len(pending)}件 / 同時実行数: {max_concurrency}")
+    print(f"チェックポイント: {checkpoint.path}")
+    print("=" * 60 + "\n")
+
+    if not pending:
+        return []
+
+    specs = [
+        VeoJobSpec(
+            image_path=row.image,
+            prompt=row.prompt,
+            output_path=output_dir / row.output,
+            model=row.model,
+            duration=row.duration,
+        )
+        for row in pending
+    ]
+    output_names = {id(spec): row.output for spec, row in zip(specs, pending)}
+
+    # genai.Client はジョブエンジン内で1つだけ作り、全ジョブで共有する
+    return run_jobs(
+        specs,
+        on_result=lambda result: checkpoint.record(output_names[id(result.spec)], result),
+        max_concurrency=max_concurrency,
+        job_timeout=job_timeout,
+        use_cache=use_cache,
+    )
+
+
+def main():
+    """コマンドライン引数を処理して一括生成"""
+    import argparse
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="マニフェスト（CSV/JSONL/JSON）から動画を一括生成")
+    parser.add_argument("manifest", type=Path, help="マニフェストファイル（.csv / .jsonl / .json）")
+    parser.add_argument("--output", type=Path, default=Path("output/batch"), help="出力ディレクトリ")
+    parser.add_argument("--checkpoint", type=Path, help="チェックポイントファイル（既定: 出力ディレクトリ内）")
+    parser.add_argument("--concurrency", type=int, default=4, help="同時実行数の上限（既定: 4）")
+    parser.add_argument("--timeout", type=float, default=900.0, help="ジョブ1件のタイムアウト秒（既定: 900）")
+    parser.add_argument("--model", type=str, default=DEFAULT_MODEL, help="model 列が空の行のモデル")
+    parser.add_argument("--duration", type=int, default=DEFAULT_DURATION, choices=[4, 6, 8],
+                        help="duration 列が空の行の長さ（秒）")
+    parser.add_argument("--no-cache", action="store_true", help="生成済み動画のキャッシュを使わない")
+    args = parser.parse_args()
+
+    try:
+        results = run_batch(
+            args.manifest,
+            args.output,
+            checkpoint_path=args.checkpoint,
+            max_concurrency=args.concurrency,
+            job_timeout=args.timeout,
+            default_model=args.model,
+            default_duration=args.duration,
+            use_cache=not args.no_cache,
+        )
+    except Exception as e:
+        print(f"❌ エラー: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    failed = [r for r in results if r.status != "done"]
+    print("\n" + "=" * 60)
+    print(f"✅ 完了: {len(results) - len(failed)}件 / ❌ 失敗: {len(failed)}件")
+    for r in failed:
+        print(f"  - {r.spec.image_path.name}: {r.status} ({r.error})")
+    print("=" * 60)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+静止レイヤーの一括合成（プレート）
+
+CompositeVideoClip はフレームごとに、レイヤーの枚数だけ「フレーム全体の透明キャンバスを作って
+alpha_composite」を繰り返す。タイトルや表紙のように動画全体で変化しないレイヤーは、
+最初に1枚の乗算済み（premultiplied）RGBAプレートへまとめておけば、毎フレームの処理は
+プレートの外接矩形（不透明度のある行の帯ごと）の範囲だけの  out = frame * (1 - alpha) + color  で済む。
+
+flatten_static_layers() は合成クリップを調べ、背景動画 + 静止レイヤーだけで構成されていれば
+プレート方式のクリップを返す。動くレイヤーなどが含まれる場合は元の合成クリップをそのまま返す。
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from moviepy import CompositeVideoClip, ImageClip, VideoClip
+from moviepy.tools import compute_position
+
+
+# 位置が時間で変わらないかを確かめる時刻（動画の長さに対する割合）
+_POSITION_SAMPLES = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+
+@dataclass(frozen=True, eq=False)
+class StaticOverlay:
+    """動画の全期間で内容も位置も変わらないレイヤー（MoviePy でも ffmpeg でも合成できる形）"""
+    image: np.ndarray  # RGB または RGBA（uint8）
+    x: int
+    y: int
+
+    def trimmed(self) -> "StaticOverlay":
+        """完全に透明な外周を切り落とす（画面全体のキャンバスに描いた文字など）"""
+        if self.image.ndim != 3 or self.image.shape[2] != 4:
+            return self
+        alpha = self.image[..., 3]
+        rows = np.flatnonzero(alpha.any(axis=1))
+        cols = np.flatnonzero(alpha.any(axis=0))
+        if len(rows) == 0:
+            return StaticOverlay(self.image[:0, :0], self.x, self.y)
+        y0, y1, x0, x1 = int(rows[0]), int(rows[-1]) + 1, int(cols[0]), int(cols[-1]) + 1
+        return StaticOverlay(self.image[y0:y1, x0:x1], self.x + x0, self.y + y0)
+
+    def to_clip(self, duration: float) -> ImageClip:
+        """全期間表示する ImageClip（RGBA の場合はアルファがマスクになる）"""
+        return ImageClip(self.image, transparent=True).with_duration(duration).with_position((self.x, self.y))
+
+
+class OverlayPlate:
+    """静止レイヤーをまとめた乗算済みRGBA（不透明度のある範囲の外接矩形だけ保持）"""
+
+    def __init__(self, frame_size: Tuple[int, int], layers: Sequence[Tuple[np.ndarray, Optional[np.ndarray], Tuple[int, int]]]):
+        """
+        レイヤーを下から順に重ねてプレートを作る
+
+        Args:
+            frame_size: フレームサイズ (幅, 高さ)
+            layers: [(RGB配列, アルファ（0-1, Noneで不透明）, 左上の座標), ...]（下から順）
+        """
+        width, height = frame_size
+        color = np.zeros((height, width, 3), dtype=np.float32)
+        alpha = np.zeros((height, width), dtype=np.float32)
+
+        for rgb, layer_alpha, (x, y) in layers:
+            h, w = rgb.shape[:2]
+            # フレーム外にはみ出した部分を切り落とす
+            x0, y0 = max(x, 0), max(y, 0)
+            x1, y1 = min(x + w, width), min(y + h, height)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            src = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+            dst = (slice(y0, y1), slice(x0, x1))
+
+            a = np.ones((y1 - y0, x1 - x0), dtype=np.float32)
+            if layer_alpha is not None:
+                a = layer_alpha[src].astype(np.float32)
+            # 乗算済みの over 合成: C = c * a + C * (1 - a), A = a + A * (1 - a)
+            inv = 1.0 - a
+            color[dst] = rgb[src][..., :3].astype(np.float32) * a[..., None] + color[dst] * inv[..., None]
+            alpha[dst] = a + alpha[dst] * inv
+
+        # 不透明度のある行を連続した帯に分け、帯ごとに外接矩形を取る
+        # （上部のタイトル帯と下部の表紙の間の透明な領域は計算しない）
+        self.regions: List[Tuple[Tuple[int, int, int, int], np.ndarray, np.ndarray]] = []
+        rows = np.flatnonzero(alpha.any(axis=1))
+        if len(rows):
+            breaks = np.flatnonzero(np.diff(rows) > 1)
+            starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+            ends = np.concatenate((rows[breaks], [rows[-1]])) + 1
+            for y0, y1 in zip(starts.tolist(), ends.tolist()):
+                cols = np.flatnonzero(alpha[y0:y1].any(axis=0))
+                x0, x1 = int(cols[0]), int(cols[-1]) + 1
+                self.regions.append((
+                    (x0, y0, x1, y1),
+                    np.ascontiguousarray(color[y0:y1, x0:x1]),
+                    np.ascontiguousarray(1.0 - alpha[y0:y1, x0:x1, None]),
+                ))
+
+    @property
+    def area(self) -> int:
+        """毎フレーム合成するピクセル数"""
+        return sum((x1 - x0) * (y1 - y0) for (x0, y0, x1, y1), _, _ in self.regions)
+
+    def apply(self, frame: np.ndarray) -> np.ndarray:
+        """フレームにプレートを重ねる（外接矩形の範囲だけ計算する）"""
+        out = np.array(frame, dtype=np.uint8)  # デコーダのバッファは読み取り専用のことがあるのでコピー
+        for (x0, y0, x1, y1), color, inv_alpha in self.regions:
+            region = out[y0:y1, x0:x1]
+            blended = region.astype(np.float32) * inv_alpha + color
+            np.clip(blended + 0.5, 0, 255, out=blended)
+            region[...] = blended.astype(np.uint8)
+        return out
+
+
+def _static_position(clip: VideoClip, frame_size: Tuple[int, int], duration: float) -> Optional[Tuple[int, int]]:
+    # 位置が全期間で同じなら左上の座標、変わるならNone
+    positions = {
+        tuple(int(v) for v in compute_position(clip.size, frame_size, clip.pos(duration * r), clip.relative_pos))
+        for r in _POSITION_SAMPLES
+    }
+    return positions.pop() if len(positions) == 1 else None
+
+
+def _is_static_image(clip: VideoClip) -> bool:
+    # ImageClip でも transform で時間変化する関数に差し替えられていることがあるので、
+    # フレーム関数が保持している画像そのものを返すかで確かめる
+    return isinstance(clip, ImageClip) and clip.frame_function(0) is clip.img
+
+
+def _covers(clip: VideoClip, duration: float) -> bool:
+    return clip.start <= 0 and (clip.end is None or clip.end >= duration)
+
+
+def flatten_static_layers(clip: VideoClip) -> VideoClip:
+    """
+    背景動画 + 静止レイヤーの合成を、プレート1枚の合成に置き換える
+
+    条件（満たさない場合は clip をそのまま返す）:
+        - 最下層が画面全体を覆う不透明な動画（位置 (0, 0)、マスクなし）
+        - それ以外のレイヤーはすべて静止画で、位置が変わらず、動画の全期間に表示される
+
+    Args:
+        clip: CompositeVideoClip（それ以外はそのまま返す）
+
+    Returns:
+        背景動画の各フレームにプレートを重ねるクリップ（音声・長さは背景動画のまま）
+    """
+    if not isinstance(clip, CompositeVideoClip) or len(clip.clips) < 2 or clip.duration is None:
+        return clip
+
+    frame_size = tuple(clip.size)
+    base, *overlays = clip.clips
+    if (
+        tuple(base.size) != frame_size
+        or base.mask is not None
+        or not _covers(base, clip.duration)
+        or _static_position(base, frame_size, clip.duration) != (0, 0)
+    ):
+        return clip
+
+    layers = []
+    for layer in overlays:
+        if not (_is_static_image(layer) and _covers(layer, clip.duration)):
+            return clip
+        if layer.mask is not None and not _is_static_image(layer.mask):
+            return clip
+        pos = _static_position(layer, frame_size, clip.duration)
+        if pos is None:
+            return clip
+        alpha = layer.mask.get_frame(0) if layer.mask is not None else None
+        layers.append((layer.get_frame(0), alpha, pos))
+
+    plate = OverlayPlate(frame_size, layers)
+    return base.image_transform(plate.apply)
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+コンテンツアドレス型のディスクキャッシュ
+
+入力（画像バイト列・プロンプト・モデル・設定など）のハッシュをキーに、生成済みファイルを保存する。
+インデックス（index.json + 追記型の index.journal）をメモリ上の辞書に読み込むので、件数が増えても検索はO(1)。
+合計サイズが上限を超えたら、最後に使われた時刻が古いものから削除する（LRU）。
+
+ヒット時の最終使用時刻はメモリ上だけで更新し、次の追加（put）でまとめてジャーナルに追記する。
+put はロックファイルで他プロセスと排他し、他プロセスが追記した分を取り込んでから追い出すので、
+複数のプロセスが同じキャッシュを使っても互いの追加を消さない。
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows ではプロセス間の排他をしない
+    fcntl = None
+
+
+# Veo動画キャッシュの既定の保存先と上限
+VEO_CACHE_DIR = Path("data/cache/veo")
+VEO_CACHE_MAX_BYTES = 5 * 1024 ** 3  # 5GB
+
+# TTS音声キャッシュの既定の保存先と上限（エンコーディングごと）
+TTS_CACHE_DIR = Path("data/cache/tts")
+TTS_CACHE_MAX_BYTES = 1024 ** 3  # 1GB
+
+
+def make_key(*parts: Any) -> str:
+    """
+    複数の値からキャッシュキー（SHA-256）を作る
+
+    bytes はそのまま、それ以外は JSON 文字列としてハッシュする。
+    各要素の前に長さを入れて、区切り位置の違う入力が衝突しないようにする。
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else json.dumps(part, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def veo_cache_key(
+    image_bytes: bytes,
+    prompt: str,
+    model: str,
+    duration: Optional[int],
+    reference_type: str,
+) -> str:
+    """
+    Veo生成結果のキャッシュキー
+
+    Args:
+        image_bytes: 入力画像のバイト列
+        prompt: プロンプト
+        model: モデル名
+        duration: durationSeconds（指定しない場合はNone）
+        reference_type: 画像の渡し方（"ASSET" = 参照画像, "IMAGE" = image引数）
+    """
+    return make_key("veo", image_bytes, prompt, model, duration, reference_type)
+
+
+def tts_cache_key(
+    text: str,
+    language_code: str,
+    voice_name: Optional[str],
+    voice_gender: str,
+    audio_encoding: str,
+    speaking_rate: float,
+    pitch: float,
+    volume_gain_db: float,
+    ssml: bool = False,
+) -> str:
+    """
+    TTS合成結果のキャッシュキー（音声の中身を決めるパラメータをすべて含める）
+
+    数値は float に揃えて、1 と 1.0 のような表記の違いで別キーにならないようにする。
+    ssml=True（text が SSML）の場合だけ区別用の要素を足す（プレーンテキストのキーは変えない）。
+    """
+    return make_key(
+        "tts", text, language_code, voice_name, voice_gender, audio_encoding,
+        float(speaking_rate), float(pitch), float(volume_gain_db),
+        *(("ssml",) if ssml else ()),
+    )
+
+
+class ContentCache:
+    """サイズ上限つきLRUのディスクキャッシュ"""
+
+    INDEX_NAME = "index.json"
+    JOURNAL_NAME = "index.journal"
+    LOCK_NAME = ".index.lock"
+
+    # ジャーナルがこの行数とエントリ数の両方を超えたら index.json にまとめ直す
+    COMPACT_MIN_RECORDS = 1000
+
+    def __init__(self, root: Path, max_bytes: int, suffix: str = ""):
+        """
+        初期化
+
+        Args:
+            root: キャッシュディレクトリ
+            max_bytes: 合計サイズの上限（バイト）
+            suffix: 保存ファイルの拡張子（".mp4" など）
+        """
+        if max_bytes <= 0:
+            raise ValueError(f"max_bytes must be > 0, got {max_bytes}")
+
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        # key -> {"size": int, "last_used": float}（古い順）
+        self._index: "OrderedDict[str, dict]" = OrderedDict()
+        self._total = 0
+        # 次の put でジャーナルに書く、ヒットしたキーと（ファイルが消えていて）外したキー
+        self._touched: Set[str] = set()
+        self._removed: Set[str] = set()
+        # 読み込み済みの index.json とジャーナル（ファイルの inode・読んだ位置・行数）
+        self._index_inode: Optional[int] = None
+        self._journal_inode: Optional[int] = None
+        self._journal_pos = 0
+        self._journal_records = 0
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._index_lock():
+            self._load_index()
+
+    # ------------------------------------------------------------------
+    # 公開API
+    # ------------------------------------------------------------------
+    def get(self, key: str) -> Optional[Path]:
+        """
+        キャッシュを検索する（ヒットしたら最終使用時刻を更新、ディスクには次の put で書く）
+
+        Returns:
+            キャッシュファイルのパス（ミス時はNone）
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            path = self._path_for(key)
+            if not path.exists():
+                # 外部で消された場合はインデックスから外す
+                self._drop(key)
+                self._touched.discard(key)
+                self._removed.add(key)
+                return None
+            entry["last_used"] = time.time()
+            self._index.move_to_end(key)
+            self._touched.add(key)
+            return path
+
+    def put(self, key: str, src: Path) -> Path:
+        """
+        ファイルをキャッシュに追加（コピー）し、上限を超えた分を削除する
+
+        Returns:
+            キャッシュファイルのパス
+        """
+        dest = self._path_for(key)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        # コピー途中のファイルを他プロセスに見せないよう、一時ファイル経由で置き換える
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+        return self._register(key, dest)
+
+    def put_bytes(self, key: str, data: bytes) -> Path:
+        """バイト列をキャッシュに追加する"""
+        dest = self._path_for(key)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, dest)
+        return self._register(key, dest)
+
+    def materialize(self, key: str, dest: Path) -> Optional[Path]:
+        """
+        キャッシュの内容を dest に配置する（同一ファイルシステムならハードリンク、それ以外はコピー）
+
+        Returns:
+            dest（ミス時はNone）
+        """
+        cached = self.get(key)
+        if cached is None:
+            return None
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists():
+            dest.unlink()
+        try:
+            os.link(cached, dest)
+        except OSError:
+            shutil.copyfile(cached, dest)
+        return dest
+
+    @property
+    def total_bytes(self) -> int:
+        """キャッシュの合計サイズ（バイト）"""
+        return self._total
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    # ------------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------------
+    def _path_for(self, key: str) -> Path:
+        # 1ディレクトリに数千ファイルが並ばないよう先頭2文字で分ける
+        return self.root / key[:2] / f"{key}{self.suffix}"
+
+    def _register(self, key: str, path: Path) -> Path:
+        size = path.stat().st_size
+        with self._lock, self._index_lock():
+            # 他プロセスが追記した分を取り込んでから、合計サイズで追い出す
+            self._read_journal()
+            if key in self._index:
+                self._total -= self._index[key]["size"]
+            self._index[key] = {"size": size, "last_used": time.time()}
+            self._index.move_to_end(key)
+            self._total += size
+            self._touched.discard(key)
+            self._removed.discard(key)
+
+            records = []
+            for removed in self._removed:
+                if self._path_for(removed).exists():
+                    continue  # 読み込んだジャーナルで他プロセスが追加し直していた
+                if removed in self._index:
+                    self._drop(removed)
+                records.append({"op": "del", "key": removed})
+            records += [{"op": "put", "key": k, **self._index[k]} for k in self._touched if k in self._index]
+            records.append({"op": "put", "key": key, **self._index[key]})
+            for evicted in self._evict():
+                records.append({"op": "del", "key": evicted})
+            self._touched.clear()
+            self._removed.clear()
+            self._append_journal(records)
+
+            if self._journal_records > max(self.COMPACT_MIN_RECORDS, len(self._index)):
+                self._compact()
+        return path
+
+    def _evict(self) -> List[str]:
+        evicted = []
+        while self._total > self.max_bytes and len(self._index) > 1:
+            oldest = next(iter(self._index))
+            path = self._path_for(oldest)
+            self._drop(oldest)
+            self._touched.discard(oldest)
+            evicted.append(oldest)
+            if path.exists():
+                path.unlink()
+        return evicted
+
+    def _drop(self, key: str) -> None:
+        entry = self._index.pop(key)
+        self._total -= entry["size"]
+
+    # ------------------------------------------------------------------
+    # インデックスの永続化（index.json のスナップショット + 追記型のジャーナル）
+    #
+    # put ごとに index.json 全体を書き直すと件数に比例して遅くなるので、変更は index.journal に
+    # 1行ずつ追記し、ジャーナルが十分長くなったときだけ index.json にまとめ直す（compaction）。
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _index_lock(self) -> Iterator[None]:
+        # インデックスの読み書きを、同じキャッシュを使う他プロセスと排他する
+        with open(self.root / self.LOCK_NAME, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield  # ファイルを閉じるとロックも外れる
+
+    def _load_index(self) -> None:
+        # _index_lock を持った状態で呼ぶ
+        index_path = self.root / self.INDEX_NAME
+        raw: Dict[str, dict] = {}
+        self._index_inode = self._inode(index_path)
+        if index_path.exists():
+            try:
+                raw = json.loads(index_path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                # 壊れたインデックスは捨てて作り直す（ジャーナルの分だけは残る）
+                print(f"⚠️ キャッシュインデックスが壊れているため再作成します: {index_path}")
+        self._index = OrderedDict(sorted(raw.items(), key=lambda kv: kv[1]["last_used"]))
+        self._total = sum(entry["size"] for entry in self._index.values())
+        self._journal_inode = None
+        self._journal_pos = 0
+        self._journal_records = 0
+        self._read_journal()
+
+    def _read_journal(self) -> None:
+        # 前回読んだ位置より後の記録（他プロセスの追加・使用・削除）を取り込む
+        # _index_lock を持った状態で呼ぶ
+        journal_path = self.root / self.JOURNAL_NAME
+        if self._inode(self.root / self.INDEX_NAME) != self._index_inode:
+            # 他プロセスが compaction した（index.json から読み直す）
+            self._load_index()
+            return
+        inode = self._inode(journal_path)
+        if inode is None:
+            self._journal_inode, self._journal_pos, self._journal_records = None, 0, 0
+            return
+        if self._journal_inode is not None and inode != self._journal_inode:
+            self._load_index()
+            return
+        self._journal_inode = inode
+        with open(journal_path, "rb") as f:
+            f.seek(self._journal_pos)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # 書き込み途中の最後の行は次回に読む
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 書き込み途中でクラッシュした行は無視
+            self._apply(record)
+            self._journal_records += 1
+        self._journal_pos += end
+
+    @staticmethod
+    def _inode(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_ino
+        except FileNotFoundError:
+            return None
+
+    def _apply(self, record: dict) -> None:
+        key = record["key"]
+        if key in self._index:
+            self._drop(key)
+        if record["op"] == "put":
+            self._index[key] = {"size": record["size"], "last_used": record["last_used"]}
+            self._total += record["size"]
+
+    def _append_journal(self, records: List[dict]) -> None:
+        # _index_lock を持った状態で呼ぶ（直前に _read_journal で末尾まで読んでいる）
+        journal_path = self.root / self.JOURNAL_NAME
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+        with open(journal_path, "ab") as f:
+            f.write(data)
+        self._journal_inode = self._inode(journal_path)
+        self._journal_pos += len(data)
+        self._journal_records += len(records)
+
+    def _compact(self) -> None:
+        # メモリ上のインデックスを index.json に書き、ジャーナルを空のファイルに置き換える
+        # _index_lock を持った状態で呼ぶ
+        index_path = self.root / self.INDEX_NAME
+        tmp = index_path.with_name(f".{self.INDEX_NAME}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self._index, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, index_path)
+        self._index_inode = self._inode(index_path)
+
+        journal_path = self.root / self.JOURNAL_NAME
+        tmp = journal_path.with_name(f".{self.JOURNAL_NAME}.{os.getpid()}.tmp")
+        tmp.write_bytes(b"")
+        os.replace(tmp, journal_path)  # inode が変わるので、他プロセスは次の put で読み直す
+        self._journal_inode = self._inode(journal_path)
+        self._journal_pos = 0
+        self._journal_records = 0
+
+
+_video_cache: Optional[ContentCache] = None
+_video_cache_lock = threading.Lock()
+
+
+def get_video_cache(root: Union[str, Path, None] = None) -> ContentCache:
+    """
+    Veo動画キャッシュ（プロセス内で共有）
+
+    上限は環境変数 VEO_CACHE_MAX_GB で変更できる。
+    """
+    global _video_cache
+    with _video_cache_lock:
+        if _video_cache is None or (root is not None and Path(root) != _video_cache.root):
+            max_gb = float(os.getenv("VEO_CACHE_MAX_GB", VEO_CACHE_MAX_BYTES / 1024 ** 3))
+            _video_cache = ContentCache(
+                Path(root) if root is not None else VEO_CACHE_DIR,
+                max_bytes=int(max_gb * 1024 ** 3),
+                suffix=".mp4",
+            )
+        return _video_cache
+
+
+_tts_caches: Dict[str, ContentCache] = {}
+_tts_caches_lock = threading.Lock()
+
+
+def get_tts_cache(audio_encoding: str, suffix: str, root: Union[str, Path, None] = None) -> ContentCache:
+    """
+    TTS音声キャッシュ（エンコーディングごとにディレクトリと拡張子を分け、プロセス内で共有）
+
+    上限は環境変数 TTS_CACHE_MAX_MB で変更できる（エンコーディングごとの上限）。
+
+    Args:
+        audio_encoding: "MP3" / "LINEAR16" / "OGG_OPUS"
+        suffix: 保存ファイルの拡張子（".mp3" など）
+        root: キャッシュのルート（Noneの場合は TTS_CACHE_DIR）
+    """
+    cache_dir = (Path(root) if root is not None else TTS_CACHE_DIR) / audio_encoding.lower()
+    with _tts_caches_lock:
+        cache = _tts_caches.get(audio_encoding)
+        if cache is None or cache.root != cache_dir:
+            max_mb = float(os.getenv("TTS_CACHE_MAX_MB", TTS_CACHE_MAX_BYTES / 1024 ** 2))
+            cache = ContentCache(cache_dir, max_bytes=int(max_mb * 1024 ** 2), suffix=suffix)
+            _tts_caches[audio_encoding] = cache
+        return cache
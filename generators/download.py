@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+生成動画のストリーミングダウンロード
+
+client.files.download() + video.save() は動画全体をメモリに載せてから書き込む。
+ここではチャンク単位で一時ファイルに書き込み、完了後に rename で最終パスへ置き換える。
+1ダウンロードあたりのメモリは chunk_size 程度に収まり、途中で落ちても壊れたMP4が残らない。
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+try:
+    import httpx
+except ImportError as e:
+    raise SystemExit(
+        f"Required library not found: {e}\n"
+        "Install with: pip install google-genai  # httpx is installed as a dependency"
+    )
+
+
+# 1回に読み書きするチャンクサイズ
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# 進捗を通知する最短間隔（秒）
+PROGRESS_INTERVAL = 0.5
+
+# 進捗コールバック: (ダウンロード済みバイト数, 全体バイト数 or None, 平均バイト/秒)
+ProgressCallback = Callable[[int, Optional[int], float], None]
+
+
+def print_progress(downloaded: int, total: Optional[int], bytes_per_sec: float) -> None:
+    """既定の進捗表示"""
+    mb = downloaded / (1024 * 1024)
+    speed = bytes_per_sec / (1024 * 1024)
+    if total:
+        print(f"⬇️ ダウンロード中... {mb:.1f}/{total / (1024 * 1024):.1f} MB ({speed:.1f} MB/s)")
+    else:
+        print(f"⬇️ ダウンロード中... {mb:.1f} MB ({speed:.1f} MB/s)")
+
+
+_http_client: Optional[httpx.Client] = None
+_http_lock = threading.Lock()
+
+
+def _get_http_client() -> httpx.Client:
+    # 接続を使い回すためプロセス内で1つだけ作る
+    global _http_client
+    with _http_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                follow_redirects=True,
+                timeout=httpx.Timeout(30.0, read=120.0),
+            )
+        return _http_client
+
+
+class _ProgressMeter:
+    def __init__(self, total: Optional[int], on_progress: Optional[ProgressCallback]):
+        self.total = total
+        self.on_progress = on_progress
+        self.downloaded = 0
+        self.start = time.monotonic()
+        self.last_report = self.start
+
+    def add(self, n: int) -> None:
+        self.downloaded += n
+        now = time.monotonic()
+        if self.on_progress and now - self.last_report >= PROGRESS_INTERVAL:
+            self.last_report = now
+            self.on_progress(self.downloaded, self.total, self.rate(now))
+
+    def finish(self) -> None:
+        if self.on_progress:
+            self.on_progress(self.downloaded, self.total, self.rate(time.monotonic()))
+
+    def rate(self, now: float) -> float:
+        return self.downloaded / max(now - self.start, 1e-6)
+
+
+def download_video(
+    client: Any,
+    video: Any,
+    dest: Path,
+    *,
+    api_key: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_progress: Optional[ProgressCallback] = print_progress,
+) -> Path:
+    """
+    生成動画（types.Video）を dest にストリーミング保存する
+
+    - uri がある場合（Gemini API）: HTTPでチャンクごとに受信して一時ファイルへ書き込む
+    - video_bytes しかない場合（Vertex AI のインライン応答）: 既にメモリにあるのでそのまま書き込む
+    - それ以外（gs:// など）: client.files.download にフォールバック
+
+    Args:
+        client: genai.Client（http(s) の uri も video_bytes もない場合に files.download を使う）
+        video: generated_videos[i].video
+        dest: 保存先パス
+        api_key: APIキー（Noneの場合は環境変数 GOOGLE_API_KEY）
+        chunk_size: チャンクサイズ（バイト）
+        on_progress: 進捗コールバック（Noneで表示しない）
+
+    Returns:
+        dest
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.part")
+
+    try:
+        uri = getattr(video, "uri", None)
+        inline = getattr(video, "video_bytes", None)
+        if inline is None and uri and uri.startswith(("https://", "http://")):
+            _stream_uri(uri, tmp, api_key or os.getenv("GOOGLE_API_KEY"), chunk_size, on_progress)
+        else:
+            if inline is None:
+                inline = client.files.download(file=video)
+            _write_chunks(memoryview(inline), tmp, chunk_size, on_progress)
+        os.replace(tmp, dest)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return dest
+
+
+def _stream_uri(
+    uri: str,
+    tmp: Path,
+    api_key: Optional[str],
+    chunk_size: int,
+    on_progress: Optional[ProgressCallback],
+) -> None:
+    headers = {"x-goog-api-key": api_key} if api_key else {}
+    with _get_http_client().stream("GET", uri, headers=headers) as response:
+        response.raise_for_status()
+        total = response.headers.get("content-length")
+        meter = _ProgressMeter(int(total) if total else None, on_progress)
+        with open(tmp, "wb") as f:
+            for chunk in response.iter_bytes(chunk_size):
+                f.write(chunk)
+                meter.add(len(chunk))
+            f.flush()
+            os.fsync(f.fileno())
+        meter.finish()
+
+
+def _write_chunks(
+    data: memoryview,
+    tmp: Path,
+    chunk_size: int,
+    on_progress: Optional[ProgressCallback],
+) -> None:
+    meter = _ProgressMeter(len(data), on_progress)
+    with open(tmp, "wb") as f:
+        for offset in range(0, len(data), chunk_size):
+            chunk = data[offset:offset + chunk_size]
+            f.write(chunk)
+            meter.add(len(chunk))
+        f.flush()
+        os.fsync(f.fileno())
+    meter.finish()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Veo API のフェイククライアント（オフライン計測用）
+
+仮想時計の上で generate_videos / operations.get を模擬し、ポーリング方針ごとの
+「完了から検知までの遅延」と「operations.get の呼び出し回数」をAPIを使わずに測る。
+
+使い方:
+    python -m generators.fake_veo --jobs 200
+"""
+
+import random
+import statistics
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from generators.polling import PollingPolicy, wait_for_operation
+
+
+class VirtualClock:
+    """sleep で時間が進むだけの仮想時計"""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += max(seconds, 0.0)
+
+
+@dataclass
+class FakeOperation:
+    """generate_videos のオペレーションの代用品"""
+    name: str
+    done: bool = False
+    response: Optional[object] = None
+    error: Optional[str] = None
+
+
+class _FakeOperations:
+    def __init__(self, owner: "FakeVeoClient"):
+        self._owner = owner
+
+    def get(self, operation: FakeOperation) -> FakeOperation:
+        owner = self._owner
+        owner.get_calls += 1
+        finish_at = owner.finish_at[operation.name]
+        return FakeOperation(name=operation.name, done=owner.clock.time() >= finish_at)
+
+
+class _FakeModels:
+    def __init__(self, owner: "FakeVeoClient"):
+        self._owner = owner
+
+    def generate_videos(self, **kwargs) -> FakeOperation:
+        owner = self._owner
+        name = f"operations/fake-{len(owner.finish_at) + 1}"
+        owner.finish_at[name] = owner.clock.time() + owner.duration_sampler()
+        return FakeOperation(name=name)
+
+
+class FakeVeoClient:
+    """仮想時計上で完了時間を模擬する genai.Client の代用品"""
+
+    def __init__(self, duration_sampler: Callable[[], float], clock: Optional[VirtualClock] = None):
+        """
+        初期化
+
+        Args:
+            duration_sampler: ジョブ1件の完了までの秒数を返す関数
+            clock: 仮想時計（Noneの場合は新規作成）
+        """
+        self.clock = clock or VirtualClock()
+        self.duration_sampler = duration_sampler
+        self.finish_at: Dict[str, float] = {}
+        self.get_calls = 0
+        self.models = _FakeModels(self)
+        self.operations = _FakeOperations(self)
+
+
+@dataclass
+class PollingStats:
+    """ポーリング方針の計測結果"""
+    jobs: int
+    mean_delay: float  # 完了から検知までの平均遅延（秒）
+    p95_delay: float
+    mean_calls: float  # 1ジョブあたりの operations.get 回数
+    delays: List[float] = field(default_factory=list, repr=False)
+
+
+def simulate_policy(
+    policy: PollingPolicy,
+    durations: Sequence[float],
+    seed: int = 0,
+) -> PollingStats:
+    """
+    完了時間のリストに対してポーリング方針を模擬実行する
+
+    Args:
+        policy: 評価するポーリング方針
+        durations: 各ジョブの完了までの秒数
+        seed: ジッター用の乱数シード
+
+    Returns:
+        PollingStats
+    """
+    rng = random.Random(seed)
+    delays = []
+    calls = 0
+    for duration in durations:
+        clock = VirtualClock()
+        client = FakeVeoClient(lambda d=duration: d, clock=clock)
+        operation = client.models.generate_videos(model="fake", prompt="")
+        wait_for_operation(
+            client,
+            operation,
+            policy=policy,
+            on_poll=lambda polls, elapsed: None,
+            sleep=clock.sleep,
+            clock=clock.time,
+            rng=rng,
+        )
+        delays.append(clock.time() - duration)
+        calls += client.get_calls
+
+    ordered = sorted(delays)
+    return PollingStats(
+        jobs=len(durations),
+        mean_delay=statistics.fmean(delays),
+        p95_delay=ordered[int(0.95 * (len(ordered) - 1))],
+        mean_calls=calls / len(durations),
+        delays=delays,
+    )
+
+
+def main():
+    """固定10秒・既定方針・履歴調整済み方針を比較する"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ポーリング方針のオフライン比較")
+    parser.add_argument("--jobs", type=int, default=200, help="模擬ジョブ数")
+    parser.add_argument("--mean", type=float, default=60.0, help="完了時間の平均（秒）")
+    parser.add_argument("--sigma", type=float, default=0.5, help="完了時間の対数標準偏差")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Veoの完了時間は右に裾が長いので対数正規分布で近似
+    mu = max(args.mean, 1.0)
+    durations = [rng.lognormvariate(0, args.sigma) * mu for _ in range(args.jobs)]
+
+    policies = {
+        "fixed 10s": PollingPolicy(initial_interval=10.0, multiplier=1.0, max_interval=10.0, jitter=0.0),
+        "default": PollingPolicy(),
+        "tuned": PollingPolicy.from_completion_times(durations),
+    }
+
+    print("=" * 60)
+    print(f"ポーリング方針の比較（{args.jobs}ジョブ, 平均≈{args.mean:.0f}s）")
+    print("=" * 60)
+    for label, policy in policies.items():
+        stats = simulate_policy(policy, durations, seed=args.seed)
+        print(
+            f"{label:>10}: 検知遅延 平均 {stats.mean_delay:5.2f}s / p95 {stats.p95_delay:5.2f}s, "
+            f"get呼び出し {stats.mean_calls:5.1f}回/ジョブ"
+        )
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
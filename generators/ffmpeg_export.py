@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+ffmpeg の overlay フィルタによる書き出し
+
+静止レイヤー（タイトル帯・表紙など位置も内容も変わらない画像）だけのレイアウトは、
+MoviePy で全フレームを NumPy にデコードして合成し、エンコーダへパイプで戻す必要がない。
+レイヤーを PNG にして ffmpeg の overlay フィルタグラフ1本で合成すれば、
+デコード・合成・エンコードがすべて ffmpeg の中で完結し、Python はほぼ CPU を使わない。
+音声は MP4 に入るコーデックならストリームコピーする。
+
+ズーム/パンのように時間で変化する合成は、従来どおり MoviePy（parallel_render）で書き出す。
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import List, Sequence
+
+from PIL import Image
+
+from generators.compositor import StaticOverlay
+from generators.ffmpeg_tools import MP4_AUDIO_CODECS, probe_media, run_ffmpeg
+from generators.moviepy_effects import book_overlay_layers
+from generators.parallel_render import EncodeSettings
+from generators.scratch import get_scratch
+
+
+def overlay_filter_graph(overlays: Sequence[StaticOverlay]) -> str:
+    """
+    入力0（元動画）に入力1..N（PNG）を順に重ねるフィルタグラフ
+
+    PNG は1フレームだけの入力だが、overlay は既定（eof_action=repeat）で最後のフレームを使い続ける。
+    """
+    chain = []
+    current = "[0:v]"
+    for i, overlay in enumerate(overlays, start=1):
+        chain.append(f"{current}[{i}:v]overlay=x={overlay.x}:y={overlay.y}:format=auto[v{i}]")
+        current = f"[v{i}]"
+    chain.append(f"{current}format=yuv420p[vout]")
+    return ";".join(chain)
+
+
+def export_static_overlays(
+    video_path: Path,
+    overlays: Sequence[StaticOverlay],
+    output_path: Path,
+    *,
+    settings: EncodeSettings = EncodeSettings(),
+) -> Path:
+    """
+    元動画に静止レイヤーを重ねて書き出す（ffmpeg 1プロセス）
+
+    Args:
+        video_path: 元動画
+        overlays: 重ねるレイヤー（下から順）
+        output_path: 出力先（完成してから rename するので途中で落ちても壊れたファイルは残らない）
+        settings: 書き出し設定（fps・コーデック・preset・追加の ffmpeg 引数）
+
+    Returns:
+        output_path
+    """
+    video_path = Path(video_path)
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    info = probe_media(video_path)
+
+    scratch = get_scratch()
+    pngs: List[Path] = []
+    tmp = output_path.with_name(f".{output_path.stem}.{os.getpid()}.part{output_path.suffix}")
+    try:
+        overlays = [o for o in overlays if o.image.size]
+        inputs = ["-i", video_path]
+        for overlay in overlays:
+            png = scratch.path(suffix=".png", prefix="overlay")
+            pngs.append(png)
+            # 圧縮は最小限（書き出しのたびに作る使い捨てのファイル）
+            Image.fromarray(overlay.image).save(png, compress_level=1)
+            inputs += ["-i", png]
+
+        # 音声: MP4 にそのまま入るならコピー、そうでなければ再エンコード
+        if info.audio_codec is None:
+            audio_args = ["-an"]
+        elif info.audio_codec in MP4_AUDIO_CODECS:
+            audio_args = ["-map", "0:a:0", "-c:a", "copy"]
+        else:
+            audio_args = ["-map", "0:a:0", "-c:a", settings.audio_codec]
+
+        start = time.monotonic()
+        run_ffmpeg([
+            *inputs,
+            "-filter_complex", overlay_filter_graph(overlays),
+            "-map", "[vout]",
+            *audio_args,
+            "-r", f"{settings.fps:g}",
+            "-c:v", settings.codec,
+            "-preset", settings.preset,
+            *settings.ffmpeg_params,
+            "-movflags", "+faststart",
+            tmp,
+        ])
+        os.replace(tmp, output_path)
+        print(f"🎞️ ffmpeg で書き出し（レイヤー{len(overlays)}枚）: {time.monotonic() - start:.1f}秒")
+        return output_path
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+        for png in pngs:
+            scratch.release(png)
+
+
+def export_book_overlay(
+    video_path: Path,
+    output_path: Path,
+    book_cover_path: Path = None,
+    book_title: str = None,
+    layout: str = "title_top",
+    *,
+    settings: EncodeSettings = EncodeSettings(),
+) -> Path:
+    """
+    add_book_overlay と同じレイアウトを ffmpeg で書き出す
+
+    Args:
+        video_path: 元動画
+        output_path: 出力先
+        book_cover_path: 本の表紙画像パス
+        book_title: 本のタイトル
+        layout: レイアウト ("title_top", "cover_right", "both")
+        settings: 書き出し設定
+
+    Returns:
+        output_path
+    """
+    info = probe_media(video_path)
+    layers = book_overlay_layers((info.width, info.height), book_cover_path, book_title, layout)
+    return export_static_overlays(video_path, layers, output_path, settings=settings)
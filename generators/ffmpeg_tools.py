@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+ffmpeg コマンドの薄いラッパー
+
+MoviePy が同梱している ffmpeg（imageio-ffmpeg）を優先して使い、なければ PATH 上の ffmpeg を使う。
+失敗時は stderr の末尾を付けて RuntimeError を投げる（黙って壊れた動画を残さない）。
+"""
+
+import re
+import shutil
+import subprocess
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Sequence
+
+
+# MP4 コンテナにそのままコピーできる音声コーデック
+MP4_AUDIO_CODECS = frozenset({"aac", "mp3", "alac", "ac3", "eac3", "opus", "flac"})
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """動画ファイルの基本情報（最初の映像・音声ストリーム）"""
+    duration: float
+    width: int
+    height: int
+    fps: Optional[float]
+    video_codec: str
+    audio_codec: Optional[str]
+
+
+@lru_cache(maxsize=1)
+def ffmpeg_exe() -> str:
+    """ffmpeg 実行ファイルのパス"""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        pass
+    exe = shutil.which("ffmpeg")
+    if exe is None:
+        raise RuntimeError(
+            "ffmpeg not found\n"
+            "Install with: pip install imageio-ffmpeg  # moviepy の依存として通常は入っている"
+        )
+    return exe
+
+
+def run_ffmpeg(args: Sequence[str]) -> None:
+    """
+    ffmpeg を実行する
+
+    Args:
+        args: ffmpeg に渡す引数（実行ファイル名と -y / -loglevel は不要）
+    """
+    cmd = [ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-y", *map(str, args)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        tail = "\n".join(result.stderr.strip().splitlines()[-10:])
+        raise RuntimeError(f"ffmpeg failed (exit {result.returncode}): {tail}")
+
+
+def probe_media(path: Path) -> MediaInfo:
+    """
+    ffmpeg -i の出力から動画の情報を読む（ffprobe は imageio-ffmpeg に同梱されていないため）
+
+    Args:
+        path: 動画ファイル
+
+    Returns:
+        MediaInfo
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Video not found: {path}")
+    result = subprocess.run([ffmpeg_exe(), "-hide_banner", "-i", str(path)], capture_output=True, text=True)
+    text = result.stderr
+
+    video = re.search(r"Stream #\d+:\d+.*?: Video: (\w+).*?, (\d+)x(\d+)[,\s]", text)
+    if video is None:
+        raise RuntimeError(f"No video stream found in {path}")
+    duration = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", text)
+    fps = re.search(r"Stream #\d+:\d+.*?: Video: .*?, (\d+(?:\.\d+)?) fps", text)
+    audio = re.search(r"Stream #\d+:\d+.*?: Audio: (\w+)", text)
+
+    seconds = 0.0
+    if duration:
+        h, m, s = duration.groups()
+        seconds = int(h) * 3600 + int(m) * 60 + float(s)
+    return MediaInfo(
+        duration=seconds,
+        width=int(video.group(2)),
+        height=int(video.group(3)),
+        fps=float(fps.group(1)) if fps else None,
+        video_codec=video.group(1),
+        audio_codec=audio.group(1) if audio else None,
+    )
+
+
+def concat_videos(paths: Sequence[Path], output: Path, list_path: Path) -> Path:
+    """
+    同じエンコード設定の動画を concat demuxer で無劣化連結する（再エンコードなし）
+
+    Args:
+        paths: 連結する動画（再生順）
+        output: 出力先
+        list_path: concat 用のリストファイルの書き出し先
+
+    Returns:
+        output
+    """
+    if not paths:
+        raise ValueError("paths must not be empty")
+    lines = []
+    for path in paths:
+        # concat のリストはシングルクォートで囲み、パス中の ' は '\'' でエスケープする
+        escaped = str(Path(path).resolve()).replace("'", "'\\''")
+        lines.append(f"file '{escaped}'\n")
+    Path(list_path).write_text("".join(lines), encoding="utf-8")
+    run_ffmpeg([
+        "-f", "concat", "-safe", "0", "-i", list_path,
+        "-c", "copy", "-movflags", "+faststart", output,
+    ])
+    return Path(output)
+
+
+def mux_audio(
+    video: Path,
+    audio: Path,
+    output: Path,
+    *,
+    audio_codec: str = "copy",
+    duration: Optional[float] = None,
+) -> Path:
+    """
+    映像のみの動画に、別ファイルの音声ストリームを重ねる（映像はストリームコピー）
+
+    Args:
+        video: 映像（この動画の音声は使わない）
+        audio: 音声を取り出すファイル（音声ファイルでも、元動画そのものでもよい）
+        output: 出力先
+        audio_codec: 音声のコーデック（"copy" なら再エンコードしない）
+        duration: 音声をこの秒数で切る（Noneの場合は切らない）
+
+    Returns:
+        output
+    """
+    audio_input = ["-t", f"{duration:.3f}"] if duration is not None else []
+    run_ffmpeg([
+        "-i", video, *audio_input, "-i", audio,
+        "-map", "0:v:0", "-map", "1:a:0",
+        "-c:v", "copy", "-c:a", audio_codec, "-movflags", "+faststart", output,
+    ])
+    return Path(output)
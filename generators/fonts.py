@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+フォントの検索とキャッシュ
+
+macOS のヒラギノのパスを直書きする代わりに、設定されたフォントディレクトリを一度だけ走査し、
+日本語（CJK）を描画できるフォントを優先順位に従って選ぶ。Linux では Noto Sans CJK などが選ばれる。
+読み込んだ FreeTypeFont は (フォント, サイズ) をキーにLRUキャッシュする。
+
+環境変数:
+    BOOK_PROMO_FONT       使うフォントファイルを明示する（最優先）
+    BOOK_PROMO_FONT_DIRS  追加で走査するディレクトリ（os.pathsep 区切り、既定ディレクトリより優先）
+"""
+
+import os
+import threading
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from PIL import ImageFont
+
+
+# 既定で走査するフォントディレクトリ
+DEFAULT_FONT_DIRS: Sequence[Path] = (
+    Path("/System/Library/Fonts"),
+    Path("/Library/Fonts"),
+    Path.home() / "Library" / "Fonts",
+    Path("/usr/share/fonts"),
+    Path("/usr/local/share/fonts"),
+    Path.home() / ".local" / "share" / "fonts",
+    Path.home() / ".fonts",
+    Path("C:/Windows/Fonts"),
+)
+
+# タイトル向けの優先順位（ファイル名の先頭一致、大文字小文字は区別しない）
+PREFERRED_FACES: Sequence[str] = (
+    "ヒラギノ角ゴシック W6",
+    "NotoSansCJKjp-Bold",
+    "NotoSansCJK-Bold",
+    "NotoSansJP-Bold",
+    "SourceHanSansJP-Bold",
+    "SourceHanSans-Bold",
+    "NotoSansCJKjp-Regular",
+    "NotoSansCJK-Regular",
+    "NotoSansJP-Regular",
+    "NotoSansJP",
+    "SourceHanSansJP-Regular",
+    "ipaexg",
+    "ipag",
+    "TakaoPGothic",
+    "VL-PGothic",
+    "YuGothB",
+    "msgothic",
+)
+
+FONT_SUFFIXES = (".ttf", ".ttc", ".otf", ".otc")
+
+
+@dataclass(frozen=True)
+class FontFace:
+    """フォントファイルとコレクション内の番号"""
+    path: str
+    index: int = 0
+
+    @property
+    def name(self) -> str:
+        return Path(self.path).stem
+
+
+def _normalize(name: str) -> str:
+    # macOS のファイル名は濁点が分解された形（NFD）で返るので NFC に揃える
+    return unicodedata.normalize("NFC", name).lower()
+
+
+class FontRegistry:
+    """フォントディレクトリを一度だけ走査して、名前からフォントを引く"""
+
+    def __init__(
+        self,
+        font_dirs: Optional[Sequence[Path]] = None,
+        preferred: Sequence[str] = PREFERRED_FACES,
+    ):
+        """
+        初期化（走査は最初の検索時に一度だけ行う）
+
+        Args:
+            font_dirs: 走査するディレクトリ（Noneの場合は環境変数 + 既定ディレクトリ）
+            preferred: 既定フォントの優先順位
+        """
+        if font_dirs is None:
+            extra = [Path(p) for p in os.getenv("BOOK_PROMO_FONT_DIRS", "").split(os.pathsep) if p]
+            font_dirs = [*extra, *DEFAULT_FONT_DIRS]
+        self.font_dirs = [Path(d) for d in font_dirs]
+        self.preferred = list(preferred)
+        self._files: Optional[Dict[str, Path]] = None
+        self._candidates: Optional[List[FontFace]] = None
+        self._lock = threading.Lock()
+
+    def files(self) -> Dict[str, Path]:
+        """正規化したファイル名（拡張子なし）-> パス"""
+        with self._lock:
+            if self._files is None:
+                files: Dict[str, Path] = {}
+                for font_dir in self.font_dirs:
+                    if not font_dir.is_dir():
+                        continue
+                    # 先に走査したディレクトリを優先（sorted で走査順を固定し、ホスト間で結果を揃える）
+                    for path in sorted(font_dir.rglob("*")):
+                        if path.suffix.lower() in FONT_SUFFIXES:
+                            files.setdefault(_normalize(path.stem), path)
+                self._files = files
+            return self._files
+
+    def find(self, name: str) -> Optional[FontFace]:
+        """ファイル名（拡張子なし）の先頭一致でフォントを探す"""
+        key = _normalize(name)
+        files = self.files()
+        if key in files:
+            return FontFace(str(files[key]))
+        for stem in sorted(files):
+            if stem.startswith(key):
+                return FontFace(str(files[stem]))
+        return None
+
+    def candidates(self) -> List[FontFace]:
+        """優先順位に従って見つかったフォントの一覧（初回のみ計算）"""
+        if self._candidates is None:
+            found = []
+            for name in self.preferred:
+                face = self.find(name)
+                if face is not None and face not in found:
+                    found.append(face)
+            self._candidates = found
+        return self._candidates
+
+    def default_face(self) -> Optional[FontFace]:
+        """
+        タイトル描画に使う既定のフォント
+
+        BOOK_PROMO_FONT があればそれを、なければ優先順位の最上位を返す。
+        見つからない場合はNone（呼び出し側で PIL の既定フォントになる）。
+        """
+        explicit = os.getenv("BOOK_PROMO_FONT")
+        if explicit:
+            if not Path(explicit).exists():
+                raise FileNotFoundError(f"BOOK_PROMO_FONT not found: {explicit}")
+            return FontFace(explicit)
+        candidates = self.candidates()
+        return candidates[0] if candidates else None
+
+
+_registry: Optional[FontRegistry] = None
+_registry_lock = threading.Lock()
+_warned_missing = False
+
+
+def get_registry() -> FontRegistry:
+    """プロセス内で共有するフォントレジストリ"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = FontRegistry()
+        return _registry
+
+
+@lru_cache(maxsize=64)
+def load_face(face: Optional[FontFace], size: int) -> ImageFont.ImageFont:
+    """(フォント, サイズ) ごとに1回だけ読み込む"""
+    if face is None:
+        try:
+            return ImageFont.load_default(size=size)
+        except TypeError:
+            # Pillow 10.1 未満はサイズ指定不可
+            return ImageFont.load_default()
+    return ImageFont.truetype(face.path, size, index=face.index)
+
+
+def get_font(size: int, face: Optional[FontFace] = None) -> ImageFont.ImageFont:
+    """
+    指定サイズのフォントを返す
+
+    Args:
+        size: フォントサイズ
+        face: フォント（Noneの場合は既定のCJKフォント）
+
+    Returns:
+        FreeTypeFont（CJKフォントが見つからない場合は PIL の既定フォント）
+    """
+    global _warned_missing
+    if face is None:
+        face = get_registry().default_face()
+        if face is None and not _warned_missing:
+            # 黙ってフォールバックせず、一度だけ警告する
+            _warned_missing = True
+            print(
+                "⚠️ 日本語フォントが見つかりません。PILの既定フォントを使用します。\n"
+                "   Noto Sans CJK を入れるか（例: apt install fonts-noto-cjk）、"
+                "BOOK_PROMO_FONT を設定してください。"
+            )
+    return load_face(face, size)
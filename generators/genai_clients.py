@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+genai.Client の共有（プロセス内で API Key ごとに1つ）
+
+genai.Client は作るたびに HTTP クライアント（接続プール・SSL コンテキスト）を作り直すので、
+呼び出しごとに作ると毎回 TLS ハンドシェイクからやり直すことになる。
+API Key ごとに最初に使うときに1つだけ作り、以後は同じクライアントの keep-alive 接続を使い回す。
+
+Streamlit でもモジュールは再実行で読み直されないので、st.cache_resource と同じくプロセスで1つになる。
+os.environ は書き換えない（API Key は引数で渡す）。
+
+client.aio の接続は最初に使ったイベントループに結び付く。asyncio.run を何度も呼ぶ場合は
+（ループをまたいで非同期の接続を使い回さないよう）その中で create_genai_client で別に作り、
+終わったら閉じる。
+
+使い方:
+    from generators.genai_clients import get_genai_client
+
+    client = get_genai_client()  # 環境変数 GOOGLE_API_KEY
+    client = get_genai_client(api_key)  # 指定した API Key
+
+    # asyncio.run の中だけで使う（共有しない）クライアント
+    client = create_genai_client(api_key)
+    try:
+        ...
+    finally:
+        await client.aio.aclose()
+        client.close()
+"""
+
+import os
+import threading
+from typing import Dict, Optional
+
+try:
+    import httpx
+    from google import genai
+    from google.genai import types
+except ImportError as e:
+    raise SystemExit(
+        f"Required library not found: {e}\n"
+        "Install with: pip install google-genai"
+    )
+
+
+# 接続プールの設定（keep-alive で残す接続数と、使われない接続を閉じるまでの秒数）
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 120.0
+
+
+def _http_options() -> types.HttpOptions:
+    # 同期（httpx）・非同期（httpx / aiohttp）の両方に同じ設定を渡す（使わない引数はライブラリ側で捨てられる）
+    limits = httpx.Limits(
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+    return types.HttpOptions(client_args={"limits": limits}, async_client_args={"limits": limits})
+
+
+def _resolve_api_key(api_key: Optional[str]) -> str:
+    api_key = api_key or os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY is not set")
+    return api_key
+
+
+def create_genai_client(api_key: Optional[str] = None) -> genai.Client:
+    """
+    共有しない genai.Client を作る（1つのイベントループの中だけで aio を使う場合）
+
+    接続プールの設定は get_genai_client と同じ。使い終わったら aio.aclose() / close() で閉じる。
+
+    Args:
+        api_key: Google API Key（Noneの場合は環境変数 GOOGLE_API_KEY）
+
+    Raises:
+        ValueError: API Key が指定されておらず、環境変数にもない
+    """
+    return genai.Client(api_key=_resolve_api_key(api_key), http_options=_http_options())
+
+
+_clients: Dict[str, genai.Client] = {}
+_clients_lock = threading.Lock()
+
+
+def get_genai_client(api_key: Optional[str] = None) -> genai.Client:
+    """
+    API Key ごとに共有する genai.Client（最初に呼ばれたときに作る、スレッドセーフ）
+
+    Args:
+        api_key: Google API Key（Noneの場合は環境変数 GOOGLE_API_KEY）
+
+    Returns:
+        genai.Client
+
+    Raises:
+        ValueError: API Key が指定されておらず、環境変数にもない
+    """
+    api_key = _resolve_api_key(api_key)
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = create_genai_client(api_key)
+            _clients[api_key] = client
+        return client
+
+
+def close_genai_clients() -> None:
+    """共有しているクライアントの接続を閉じる（テストや長時間稼働するワーカーの終了時）"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+バックグラウンドのジョブキュー（Streamlit から使う）
+
+Streamlit はウィジェットを操作するたびにスクリプトを先頭から再実行するので、
+st.spinner の中で数分かかる生成を同期実行すると、再実行や再接続で処理が中断・重複する。
+生成はワーカースレッドのプールで実行し、UI はジョブの投入と状態（queued / running / done / failed）の
+読み取りだけを行う。キューは st.cache_resource でプロセスに1つだけ作るので、
+再実行・ブラウザの再読み込みをまたいで結果が残り、複数の編集者のジョブを同時に実行できる。
+
+ジョブは「種類（ハンドラ名）+ JSON にできる引数」で投入する（関数そのものは持たない）。
+store（job_store.JobStore）を渡すとジョブ表を SQLite に保存し、プロセスを再起動しても一覧と結果が残る。
+再起動で中断されたジョブは failed（Interrupted）として読み込む。同じ入力で投入し直せば、
+生成側が job_store に記録された未完了のオペレーションを再開するので、課金済みの生成は無駄にならない。
+
+使い方:
+    queue = JobQueue({"simple": run_simple_job}, max_workers=4)
+    job = queue.submit("simple", "表紙.png", {"image_path": "...", "prompt": "..."})
+    queue.get(job.id).status  # "queued" → "running" → "done" / "failed"
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Literal, Optional
+
+from generators.job_store import JobStore
+
+
+# ジョブの状態
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+# 同時に実行するジョブ数の既定値（環境変数 JOB_WORKERS で変更可能）
+DEFAULT_JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+
+# 終了したジョブを残しておく件数（これを超えたら古いものから消す）
+DEFAULT_MAX_HISTORY = 200
+
+
+@dataclass
+class Job:
+    """ジョブ1件（UI には copy を渡すので、読み取り中に書き換わらない）"""
+    id: str
+    kind: str  # ハンドラ名
+    label: str  # 一覧に表示する名前
+    kwargs: Dict[str, Any]  # ハンドラに渡す引数（JSON にできる値）
+    status: JobStatus = "queued"
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    output_path: Optional[str] = None
+    error: Optional[str] = None
+    error_type: Optional[str] = None  # 例外のクラス名（UI でヒントを出し分ける）
+
+    @property
+    def active(self) -> bool:
+        """まだ終わっていないか"""
+        return self.status in ("queued", "running")
+
+    @property
+    def elapsed(self) -> float:
+        """実行時間（秒、未開始なら0、実行中なら現在まで）"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobQueue:
+    """ワーカースレッドのプールとジョブ表"""
+
+    def __init__(
+        self,
+        handlers: Dict[str, Callable[..., Path]],
+        *,
+        max_workers: int = DEFAULT_JOB_WORKERS,
+        max_history: int = DEFAULT_MAX_HISTORY,
+        store: Optional[JobStore] = None,
+    ):
+        """
+        初期化
+
+        Args:
+            handlers: ジョブの種類 -> 実行する関数（キーワード引数を受け取り、出力ファイルのパスを返す）
+            max_workers: 同時に実行するジョブ数
+            max_history: 終了したジョブを残しておく件数
+            store: ジョブ表の保存先（Noneの場合はメモリ上だけ）
+        """
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be >= 1, got {max_workers}")
+        if not handlers:
+            raise ValueError("handlers must not be empty")
+
+        self.handlers = dict(handlers)
+        self.max_workers = max_workers
+        self.max_history = max_history
+        self._lock = threading.Lock()
+        self.store = store
+        self._jobs: Dict[str, Job] = {}  # 投入順
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        if store is not None:
+            self._load()
+
+    def _load(self) -> None:
+        # 前回のプロセスのジョブ表を読み込む（終わっていなかったものは中断扱い）
+        interrupted = 0
+        for data in self.store.load_jobs(self.max_history):
+            job = Job(**data)
+            if job.active:
+                job.status = "failed"
+                job.finished_at = job.finished_at or time.time()
+                job.error = "プロセスの再起動で中断されました。同じ入力で投入し直すと、生成中だった動画の続きから再開します"
+                job.error_type = "Interrupted"
+                self.store.save_job(job.id, job.submitted_at, asdict(job))
+                interrupted += 1
+            self._jobs[job.id] = job
+        if self._jobs:
+            print(f"✓ ジョブ表を読み込み: {len(self._jobs)}件（中断 {interrupted}件）")
+
+    def submit(self, kind: str, label: str, kwargs: Dict[str, Any]) -> Job:
+        """
+        ジョブを投入する（すぐに返る）
+
+        Args:
+            kind: ジョブの種類（handlers のキー）
+            label: 一覧に表示する名前
+            kwargs: ハンドラに渡す引数
+
+        Returns:
+            投入したジョブ（queued）
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind} (expected one of {sorted(self.handlers)})")
+
+        job = Job(id=uuid.uuid4().hex[:12], kind=kind, label=label, kwargs=dict(kwargs))
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+            snapshot = replace(job)
+            self._save(job)
+        self._pool.submit(self._run, job.id)
+        print(f"📥 ジョブ投入: {job.id} [{kind}] {label}")
+        return snapshot
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """ジョブの状態（コピー、なければNone）"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return replace(job) if job is not None else None
+
+    def jobs(self) -> List[Job]:
+        """全ジョブの状態（新しい順、コピー）"""
+        with self._lock:
+            return [replace(job) for job in reversed(self._jobs.values())]
+
+    def counts(self) -> Dict[str, int]:
+        """状態ごとの件数"""
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return counts
+
+    def clear_finished(self) -> int:
+        """終了したジョブを一覧から消す（出力ファイルは消さない）。消した件数を返す"""
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+            for job_id in finished:
+                del self._jobs[job_id]
+            if self.store is not None:
+                self.store.delete_jobs(finished)
+        return len(finished)
+
+    def _update(self, job_id: str, **changes: Any) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                for key, value in changes.items():
+                    setattr(job, key, value)
+                self._save(job)
+
+    def _save(self, job: Job) -> None:
+        # ロックを持った状態で呼ぶ
+        if self.store is not None:
+            self.store.save_job(job.id, job.submitted_at, asdict(job))
+
+    def _trim(self) -> None:
+        # 終了したジョブが上限を超えたら古いものから消す（実行中・待機中は消さない）
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        expired = finished[:max(len(finished) - self.max_history, 0)]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if self.store is not None:
+            self.store.delete_jobs(expired)
+
+    def _run(self, job_id: str) -> None:
+        job = self.get(job_id)
+        if job is None:
+            return
+        self._update(job_id, status="running", started_at=time.time())
+        try:
+            output = self.handlers[job.kind](**job.kwargs)
+            self._update(job_id, status="done", finished_at=time.time(), output_path=str(output))
+            print(f"✅ ジョブ完了: {job_id} → {output}")
+        except (Exception, SystemExit) as e:  # 生成処理は失敗時に SystemExit を投げるので、それも記録する
+            self._update(
+                job_id, status="failed", finished_at=time.time(),
+                error=str(e) or type(e).__name__, error_type=type(e).__name__,
+            )
+            print(f"❌ ジョブ失敗: {job_id}: {e}")
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+ジョブの永続化（SQLite）
+
+generate_videos が返すオペレーション名はローカル変数にしかなく、ポーリング中にプロセスが
+再起動すると、課金済みの生成結果を受け取れないまま捨てることになる。
+投入したオペレーションを入力のハッシュ（キャッシュキーと同じ）と一緒に data/cache/jobs.sqlite3 に記録し、
+次に同じ入力で呼ばれたら新しく生成せず、未完了のオペレーションのポーリングを再開する。
+
+- operations: Veo のオペレーション（入力のハッシュ・モデル・状態・時刻・出力パス・エラー）
+- jobs: JobQueue（Streamlit）のジョブ表（再起動しても一覧と結果が残る）
+
+使い方:
+    store = get_job_store()
+    operation = resume_operation(store, cache_key, wait=lambda op: wait_for_operation(client, op))
+    if operation is None:
+        operation = client.models.generate_videos(...)
+        store.record_submitted(cache_key, model, operation.name, source="veo3_sample")
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Literal, Optional
+
+
+# 保存先
+JOB_STORE_PATH = Path("data/cache/jobs.sqlite3")
+
+# これより古い未完了のオペレーションは再開しない（サーバー側で期限切れになっている）
+RESUME_MAX_AGE = 24 * 3600
+
+# オペレーションの状態
+OperationStatus = Literal["running", "done", "failed"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    name TEXT PRIMARY KEY,
+    input_key TEXT NOT NULL,
+    model TEXT NOT NULL,
+    source TEXT NOT NULL,
+    status TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    finished_at REAL,
+    output_path TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS operations_input_key ON operations (input_key, status);
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    submitted_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+
+class OperationDiscarded(Exception):
+    """待っている途中で結果が要らなくなった（オペレーションは破棄として記録し、次回も再開しない）"""
+
+
+@dataclass(frozen=True)
+class StoredOperation:
+    """記録済みのオペレーション1件"""
+    name: str  # オペレーション名（"models/veo-.../operations/..."）
+    input_key: str  # 入力のハッシュ（content_cache.veo_cache_key）
+    model: str
+    source: str  # 投入したモジュール（"veo3_sample" など）
+    status: OperationStatus
+    submitted_at: float
+    finished_at: Optional[float] = None
+    output_path: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def age(self) -> float:
+        """投入してからの経過秒数"""
+        return time.time() - self.submitted_at
+
+
+class JobStore:
+    """SQLite のジョブストア（スレッド・プロセス間で共有できる）"""
+
+    def __init__(self, path: Path = JOB_STORE_PATH):
+        """
+        初期化
+
+        Args:
+            path: データベースファイルのパス
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # 読み取りが書き込みを待たない
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # 呼び出しごとに接続する（スレッドをまたいで接続を共有しない）
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.row_factory = sqlite3.Row
+            with conn:  # 抜けるときにコミット（例外ならロールバック）
+                yield conn
+
+    # ------------------------------------------------------------------
+    # Veo オペレーション
+    # ------------------------------------------------------------------
+    def record_submitted(self, input_key: str, model: str, name: str, source: str) -> None:
+        """投入したオペレーションを記録する"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO operations (name, input_key, model, source, status, submitted_at) "
+                "VALUES (?, ?, ?, ?, 'running', ?)",
+                (name, input_key, model, source, time.time()),
+            )
+
+    def mark_done(self, name: str, output_path: Path) -> None:
+        """オペレーションの結果を保存し終えた"""
+        self._finish(name, "done", output_path=str(output_path))
+
+    def mark_failed(self, name: str, error: str) -> None:
+        """オペレーションが失敗した（次回は再開せずに新しく生成する）"""
+        self._finish(name, "failed", error=error)
+
+    def mark_discarded(self, name: str, reason: str) -> None:
+        """オペレーションの結果を使わずに捨てた（ヘッジで負けた試行など、次回は再開しない）"""
+        self._finish(name, "failed", error=f"discarded: {reason}")
+
+    def _finish(self, name: str, status: OperationStatus, **values: Optional[str]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE operations SET status = ?, finished_at = ?, output_path = ?, error = ? WHERE name = ?",
+                (status, time.time(), values.get("output_path"), values.get("error"), name),
+            )
+
+    def find_pending(self, input_key: str, max_age: float = RESUME_MAX_AGE) -> Optional[StoredOperation]:
+        """同じ入力で未完了のオペレーション（最も新しいもの、なければNone）"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM operations WHERE input_key = ? AND status = 'running' AND submitted_at >= ? "
+                "ORDER BY submitted_at DESC LIMIT 1",
+                (input_key, time.time() - max_age),
+            ).fetchone()
+        return StoredOperation(**dict(row)) if row is not None else None
+
+    def operations(self, status: Optional[OperationStatus] = None, limit: int = 100) -> List[StoredOperation]:
+        """記録済みのオペレーション（新しい順）"""
+        query = "SELECT * FROM operations"
+        params: List[Any] = []
+        if status is not None:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY submitted_at DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            return [StoredOperation(**dict(row)) for row in conn.execute(query, params)]
+
+    # ------------------------------------------------------------------
+    # JobQueue のジョブ表
+    # ------------------------------------------------------------------
+    def save_job(self, job_id: str, submitted_at: float, data: Dict[str, Any]) -> None:
+        """ジョブ1件を保存する（同じIDは上書き）"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, submitted_at, data) VALUES (?, ?, ?)",
+                (job_id, submitted_at, json.dumps(data, ensure_ascii=False)),
+            )
+
+    def load_jobs(self, limit: int) -> List[Dict[str, Any]]:
+        """保存済みのジョブ（投入順、直近の最大limit件）"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT data FROM jobs ORDER BY submitted_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [json.loads(row["data"]) for row in reversed(rows)]
+
+    def delete_jobs(self, job_ids: List[str]) -> None:
+        """ジョブを削除する"""
+        if not job_ids:
+            return
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in job_ids])
+
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_job_store(path: Optional[Path] = None) -> JobStore:
+    """ジョブストア（プロセス内で共有）"""
+    global _store
+    with _store_lock:
+        if _store is None or (path is not None and Path(path) != _store.path):
+            _store = JobStore(Path(path) if path is not None else JOB_STORE_PATH)
+        return _store
+
+
+def operation_ref(name: str) -> Any:
+    """オペレーション名だけから operations.get に渡せるオブジェクトを作る"""
+    from google.genai import types
+    return types.GenerateVideosOperation(name=name)
+
+
+def _has_videos(operation: Any) -> bool:
+    result = getattr(operation, "result", None) or getattr(operation, "response", None)
+    return bool(getattr(result, "generated_videos", None))
+
+
+def _resume_failed(store: JobStore, name: str, error: str) -> None:
+    store.mark_failed(name, error)
+    print(f"⚠️ オペレーションを再開できないため、新しく生成します: {error}")
+
+
+def resume_operation(
+    store: JobStore,
+    input_key: str,
+    wait: Callable[[Any], Any],
+    ref: Callable[[str], Any] = operation_ref,
+) -> Optional[Any]:
+    """
+    同じ入力の未完了オペレーションがあれば、ポーリングを再開して完了を待つ
+
+    Args:
+        store: ジョブストア
+        input_key: 入力のハッシュ
+        wait: オペレーションを受け取って完了まで待つ関数（wait_for_operation など）
+        ref: オペレーション名から wait に渡すオブジェクトを作る関数
+
+    Returns:
+        動画を含む完了したオペレーション（未完了のものがない、または再開に失敗した場合はNone）
+
+    Raises:
+        TimeoutError: ローカルの待ち時間切れ（サーバー側は継続しているので、記録は残して次回また再開する）
+        OperationDiscarded: wait が待機を打ち切った（破棄として記録する）
+    """
+    pending = store.find_pending(input_key)
+    if pending is None:
+        return None
+    print(f"🔁 中断したオペレーションを再開: {pending.name}（{pending.age / 60:.0f}分前に投入）")
+    # google-genai が無いなどの ImportError は再開の失敗ではないので、try の外で作る
+    operation = ref(pending.name)
+    try:
+        operation = wait(operation)
+    except TimeoutError:
+        raise
+    except OperationDiscarded as e:
+        store.mark_discarded(pending.name, str(e))
+        raise
+    except Exception as e:
+        _resume_failed(store, pending.name, str(e))
+        return None
+    if not _has_videos(operation):
+        _resume_failed(store, pending.name, f"no videos, error={getattr(operation, 'error', None)}")
+        return None
+    return operation
+
+
+async def async_resume_operation(
+    store: JobStore,
+    input_key: str,
+    wait: Callable[[Any], Awaitable[Any]],
+    ref: Callable[[str], Any] = operation_ref,
+) -> Optional[Any]:
+    """
+    resume_operation の asyncio版（wait は async_wait_for_operation など）
+
+    データベースへのアクセスは短いので、イベントループ上でそのまま行う。
+    """
+    pending = store.find_pending(input_key)
+    if pending is None:
+        return None
+    print(f"🔁 中断したオペレーションを再開: {pending.name}（{pending.age / 60:.0f}分前に投入）")
+    # google-genai が無いなどの ImportError は再開の失敗ではないので、try の外で作る
+    operation = ref(pending.name)
+    try:
+        operation = await wait(operation)
+    except TimeoutError:
+        raise
+    except OperationDiscarded as e:
+        store.mark_discarded(pending.name, str(e))
+        raise
+    except Exception as e:
+        _resume_failed(store, pending.name, str(e))
+        return None
+    if not _has_videos(operation):
+        _resume_failed(store, pending.name, f"no videos, error={getattr(operation, 'error', None)}")
+        return None
+    return operation
@@ -4,30 +4,18 @@ MoviePy動画効果
 ズーム、パン、オーバーレイなど
 """
 from pathlib import Path
-from moviepy import ImageClip, VideoFileClip, CompositeVideoClip
-from PIL import Image, ImageDraw, ImageFont
-import tempfile
+from typing import List, Tuple
+from moviepy import ImageClip, VideoClip, VideoFileClip, CompositeVideoClip
+from PIL import Image
 import numpy as np
 
+from generators.compositor import StaticOverlay, flatten_static_layers
+from generators.text_render import render_text_overlay, render_text_tile
+from generators.trajectory import TrajectoryRenderer, pan_zoom_trajectory, zoom_trajectory
 
-def create_zoom_effect(
-    image_path: Path,
-    duration: float = 8.0,
-    resolution: tuple = (1280, 720),
-    zoom_factor: float = 1.3
-) -> ImageClip:
-    """
-    画像にズームイン効果を追加
 
-    Args:
-        image_path: 入力画像パス
-        duration: 動画の長さ（秒）
-        resolution: 出力解像度
-        zoom_factor: ズーム倍率
-
-    Returns:
-        ズーム効果付きのImageClip
-    """
+def load_rgb(image_path: Path) -> Image.Image:
+    """画像をRGBで読み込む（透過部分は白で埋める）"""
     img = Image.open(image_path)
 
     # RGBAの場合はRGBに変換
@@ -38,120 +26,65 @@ def create_zoom_effect(
     elif img.mode != 'RGB':
         img = img.convert('RGB')
 
-    img_width, img_height = img.size
-
-    # アスペクト比を保持してリサイズ
-    target_width, target_height = resolution
-    target_aspect = target_width / target_height
-    img_aspect = img_width / img_height
-
-    if img_aspect > target_aspect:
-        new_height = target_height
-        new_width = int(new_height * img_aspect)
-    else:
-        new_width = target_width
-        new_height = int(new_width / img_aspect)
-
-    # ズーム用に大きめにリサイズ
-    scaled_width = int(new_width * zoom_factor)
-    scaled_height = int(new_height * zoom_factor)
+    return img
 
-    resized_img = img.resize((scaled_width, scaled_height), Image.Resampling.LANCZOS)
 
-    # 一時ファイルに保存
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
-    resized_img.save(temp_file.name, 'JPEG', quality=95)
-    temp_file.close()
-
-    def zoom_effect(get_frame, t):
-        """ズームイン効果"""
-        frame = get_frame(t)
-        h, w = frame.shape[:2]
-
-        progress = t / duration
-
-        zoom_range_w = w - target_width
-        zoom_range_h = h - target_height
+def create_zoom_effect(
+    image_path: Path,
+    duration: float = 8.0,
+    resolution: tuple = (1280, 720),
+    zoom_factor: float = 1.3,
+    fps: int = 24
+) -> VideoClip:
+    """
+    画像にズームイン効果を追加
 
-        x_offset = int(zoom_range_w * (1 - progress) / 2)
-        y_offset = int(zoom_range_h * (1 - progress) / 2)
+    全フレームのクロップ矩形を先に計算し、各フレームは小数座標でリサンプリングする。
 
-        cropped = frame[y_offset:y_offset + target_height, x_offset:x_offset + target_width]
+    Args:
+        image_path: 入力画像パス
+        duration: 動画の長さ（秒）
+        resolution: 出力解像度
+        zoom_factor: ズーム倍率
+        fps: フレームレート
 
-        return cropped
+    Returns:
+        ズーム効果付きのVideoClip
+    """
+    img = load_rgb(image_path)
 
-    clip = ImageClip(temp_file.name).with_duration(duration)
-    clip = clip.transform(zoom_effect)
+    trajectory = zoom_trajectory(img.size, resolution, duration, fps, zoom_factor)
+    renderer = TrajectoryRenderer(img, trajectory, resolution)
 
-    return clip
+    return VideoClip(renderer.frame_at, duration=duration).with_fps(fps)
 
 
 def create_pan_zoom_effect(
     image_path: Path,
     duration: float = 8.0,
-    resolution: tuple = (1280, 720)
-) -> ImageClip:
+    resolution: tuple = (1280, 720),
+    fps: int = 24
+) -> VideoClip:
     """
     画像にパン&ズーム効果を追加
 
+    左寄りから右へパンしながらズームし、終盤は中央寄りに戻る（trajectory.PAN_ZOOM_KEYFRAMES）。
+
     Args:
         image_path: 入力画像パス
         duration: 動画の長さ（秒）
         resolution: 出力解像度
+        fps: フレームレート
 
     Returns:
-        パン&ズーム効果付きのImageClip
+        パン&ズーム効果付きのVideoClip
     """
-    img = Image.open(image_path)
-
-    if img.mode != 'RGB':
-        img = img.convert('RGB')
-
-    target_width, target_height = resolution
-    scale_factor = 1.5
-
-    new_width = int(target_width * scale_factor)
-    new_height = int(target_height * scale_factor)
-
-    resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
-    resized_img.save(temp_file.name, 'JPEG', quality=95)
-    temp_file.close()
-
-    def dynamic_effect(get_frame, t):
-        """パンとズームを組み合わせた効果"""
-        frame = get_frame(t)
-        h, w = frame.shape[:2]
+    img = load_rgb(image_path)
 
-        progress = t / duration
+    trajectory = pan_zoom_trajectory(img.size, resolution, duration, fps)
+    renderer = TrajectoryRenderer(img, trajectory, resolution)
 
-        zoom_range_w = w - target_width
-        zoom_range_h = h - target_height
-
-        if progress < 0.3:
-            # 開始: 左寄りから
-            x_offset = 0
-            y_offset = int(zoom_range_h * 0.5)
-        elif progress < 0.7:
-            # 中盤: 左から右へパン
-            pan_progress = (progress - 0.3) / 0.4
-            x_offset = int(zoom_range_w * pan_progress * 0.8)
-            y_offset = int(zoom_range_h * (0.5 + pan_progress * 0.2))
-        else:
-            # 終盤: 中央にフォーカス
-            final_progress = (progress - 0.7) / 0.3
-            x_offset = int(zoom_range_w * (0.8 + final_progress * 0.1))
-            y_offset = int(zoom_range_h * (0.7 - final_progress * 0.2))
-
-        cropped = frame[y_offset:y_offset + target_height, x_offset:x_offset + target_width]
-
-        return cropped
-
-    clip = ImageClip(temp_file.name).with_duration(duration)
-    clip = clip.transform(dynamic_effect)
-
-    return clip
+    return VideoClip(renderer.frame_at, duration=duration).with_fps(fps)
 
 
 def create_text_overlay(
@@ -159,57 +92,84 @@ def create_text_overlay(
     duration: float,
     size: tuple,
     fontsize: int = 70,
-    position: str = "center"
+    position: str = "center",
+    stroke_width: int = 5
 ) -> ImageClip:
     """
     テキストオーバーレイを作成
 
+    描画結果は text_render 側でキャッシュされるので、同じタイトルの再作成は速い。
+
     Args:
         text: テキスト
         duration: 表示時間
         size: 画像サイズ
         fontsize: フォントサイズ
         position: 位置 ("center", "top", "bottom")
+        stroke_width: 黒い縁取りの太さ（px）
 
     Returns:
         テキストオーバーレイのImageClip
     """
-    img = Image.new('RGBA', size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    overlay = render_text_overlay(
+        text=text,
+        size=(int(size[0]), int(size[1])),
+        fontsize=fontsize,
+        position=position,
+        stroke_width=stroke_width,
+    )
+
+    # RGBA配列をそのまま渡す（アルファはマスクになる）
+    return ImageClip(overlay, transparent=True).with_duration(duration)
+
+
+def book_overlay_layers(
+    video_size: Tuple[int, int],
+    book_cover_path: Path = None,
+    book_title: str = None,
+    layout: str = "title_top"
+) -> List[StaticOverlay]:
+    """
+    add_book_overlay で重ねるレイヤー（MoviePy・ffmpeg どちらの書き出しでも共通）
 
-    try:
-        font = ImageFont.truetype("/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc", fontsize)
-    except:
-        font = ImageFont.load_default()
+    Args:
+        video_size: 動画サイズ (幅, 高さ)
+        book_cover_path: 本の表紙画像パス
+        book_title: 本のタイトル
+        layout: レイアウト ("title_top", "cover_right", "both")
 
-    bbox = draw.textbbox((0, 0), text, font=font)
-    text_width = bbox[2] - bbox[0]
-    text_height = bbox[3] - bbox[1]
+    Returns:
+        StaticOverlay のリスト（下から順）
+    """
+    video_w, video_h = int(video_size[0]), int(video_size[1])
+    layers = []
 
-    # 位置決定
-    x = (size[0] - text_width) // 2
+    if layout in ["title_top", "both"] and book_title:
+        # タイトルオーバーレイ（文字の外接矩形だけのタイルを、キャンバス上の位置に置く）
+        title, x, y = render_text_tile(
+            text=book_title,
+            size=(video_w, video_h),
+            fontsize=40,
+            position="top",
+            stroke_width=5,
+        )
+        layers.append(StaticOverlay(title, x, y).trimmed())
 
-    if position == "top":
-        y = 50
-    elif position == "bottom":
-        y = size[1] - text_height - 50
-    else:  # center
-        y = (size[1] - text_height) // 2
+    if layout in ["cover_right", "both"] and book_cover_path and Path(book_cover_path).exists():
+        # 表紙オーバーレイ
+        cover_img = load_rgb(book_cover_path)
 
-    # 黒い縁取り
-    for offset_x in range(-5, 6):
-        for offset_y in range(-5, 6):
-            if offset_x != 0 or offset_y != 0:
-                draw.text((x + offset_x, y + offset_y), text, font=font, fill=(0, 0, 0, 255))
+        # サイズ調整（動画の25%）
+        target_width = int(video_w * 0.25)
+        aspect = cover_img.height / cover_img.width
+        target_height = int(target_width * aspect)
 
-    # テキストを描画（白）
-    draw.text((x, y), text, font=font, fill=(255, 255, 255, 255))
+        cover_img = cover_img.resize((target_width, target_height), Image.Resampling.LANCZOS)
 
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-    img.save(temp_file.name)
-    temp_file.close()
+        # 右上に配置（JPEGを経由しないので劣化しない）
+        layers.append(StaticOverlay(np.asarray(cover_img), video_w - target_width - 30, 30))
 
-    return ImageClip(temp_file.name, transparent=True).with_duration(duration)
+    return [layer for layer in layers if layer.image.size]
 
 
 def add_book_overlay(
@@ -217,7 +177,7 @@ def add_book_overlay(
     book_cover_path: Path = None,
     book_title: str = None,
     layout: str = "title_top"
-) -> CompositeVideoClip:
+) -> VideoClip:
     """
     動画に本の表紙やタイトルをオーバーレイ
 
@@ -230,45 +190,36 @@ def add_book_overlay(
     Returns:
         オーバーレイ付きの動画
     """
-    clips = [video]
-
-    if layout in ["title_top", "both"] and book_title:
-        # タイトルオーバーレイ
-        title = create_text_overlay(
-            text=book_title,
-            duration=video.duration,
-            size=(int(video.w), int(video.h)),
-            fontsize=40,
-            position="top"
-        )
-        clips.append(title)
+    layers = book_overlay_layers((video.w, video.h), book_cover_path, book_title, layout)
+    clips = [video] + [layer.to_clip(video.duration) for layer in layers]
 
-    if layout in ["cover_right", "both"] and book_cover_path and book_cover_path.exists():
-        # 表紙オーバーレイ
-        cover_img = Image.open(book_cover_path)
+    # タイトル・表紙は静止画なので、1枚のプレートにまとめて外接矩形だけ合成する
+    return flatten_static_layers(CompositeVideoClip(clips))
 
-        if cover_img.mode == 'RGBA':
-            background = Image.new('RGB', cover_img.size, (255, 255, 255))
-            background.paste(cover_img, mask=cover_img.split()[3])
-            cover_img = background
-        elif cover_img.mode != 'RGB':
-            cover_img = cover_img.convert('RGB')
 
-        # サイズ調整（動画の25%）
-        target_width = int(video.w * 0.25)
-        aspect = cover_img.height / cover_img.width
-        target_height = int(target_width * aspect)
+def close_clip(clip) -> None:
+    """
+    合成クリップと、その構成クリップ（VideoFileClip の ffmpeg プロセスなど）をまとめて閉じる
 
-        cover_img = cover_img.resize((target_width, target_height), Image.Resampling.LANCZOS)
+    CompositeVideoClip.close() は自前で作った背景しか閉じないため、長時間動くプロセスで
+    合成を作り直すたびに ffmpeg のリーダーが残らないようにする。
+    """
+    for child in getattr(clip, "clips", ()):
+        close_clip(child)
+    clip.close()
 
-        temp_cover = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
-        cover_img.save(temp_cover.name, 'JPEG', quality=95)
-        temp_cover.close()
 
-        # 右上に配置
-        pos = (video.w - target_width - 30, 30)
-        cover_clip = ImageClip(temp_cover.name).with_duration(video.duration)
-        cover_clip = cover_clip.with_position(pos)
-        clips.append(cover_clip)
+def open_book_overlay(
+    video_path: str,
+    book_cover_path: str = None,
+    book_title: str = None,
+    layout: str = "title_top"
+) -> VideoClip:
+    """
+    動画ファイルを開いて add_book_overlay を掛ける
 
-    return CompositeVideoClip(clips)
+    引数がすべて pickle 可能なので、parallel_render のクリップファクトリとして使える。
+    """
+    video = VideoFileClip(str(video_path))
+    cover = Path(book_cover_path) if book_cover_path else None
+    return add_book_overlay(video, cover, book_title, layout)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+長文ナレーションの分割と連結
+
+Text-to-Speech API は1リクエストあたりの入力が 5000 バイトまでなので、あらすじのような長文は
+文の区切り（。！？）で上限以下のチャンクに分けて、チャンクごとに並列で合成する。
+各チャンクは LINEAR16（WAV）で受け取り、PCM のまま隙間なく連結してから最後に1回だけエンコードする
+（MP3 同士をつなぐと、フレーム境界とエンコーダの遅延分だけ無音が挟まる）。
+
+このモジュールは Google Cloud のライブラリに依存しない（分割・連結・エンコードだけを担当する）。
+"""
+
+import os
+import re
+import shutil
+import wave
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, List, Sequence
+from xml.sax.saxutils import escape
+
+from generators.ffmpeg_tools import run_ffmpeg
+
+
+# APIの1リクエストあたりの入力上限（バイト）
+MAX_REQUEST_BYTES = 5000
+
+# チャンクの既定の上限（SSMLのタグなどを足しても上限を超えないよう余裕を持たせる）
+DEFAULT_CHUNK_BYTES = 4000
+
+# 同時に合成するチャンク数の既定値
+NARRATION_WORKERS = 4
+
+# 文の区切り（句点・感嘆符・疑問符の直後、英文はピリオド等の後の空白）
+_SENTENCE_BREAK = re.compile(r"(?<=[。！？])|(?<=[.!?])\s+|\n{2,}")
+
+# 1文が長すぎる場合の区切り（読点・カンマの直後）
+_CLAUSE_BREAK = re.compile(r"(?<=[、，,])")
+
+# LINEAR16 以外のエンコーディングの ffmpeg 引数
+_ENCODER_ARGS = {
+    "MP3": ["-c:a", "libmp3lame", "-q:a", "2"],
+    "OGG_OPUS": ["-c:a", "libopus", "-b:a", "64k"],
+}
+
+
+def _nbytes(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _hard_split(text: str, max_bytes: int, size: Callable[[str], int] = _nbytes) -> List[str]:
+    # 区切りのない長い文字列は、バイト数が上限を超えない位置で切る
+    pieces = []
+    current = ""
+    for ch in text:
+        if current and size(current + ch) > max_bytes:
+            pieces.append(current)
+            current = ""
+        current += ch
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _pack(
+    parts: Sequence[str], max_bytes: int, spaced: bool = False, size: Callable[[str], int] = _nbytes
+) -> List[str]:
+    # 上限を超えない範囲で、隣り合う部分を先頭から詰めていく
+    # spaced: 英文の文（ASCII で終わる文）の後には空白を戻す（日本語の文はそのままつなぐ）
+    chunks = []
+    current = ""
+    for part in parts:
+        joiner = " " if spaced and current[-1:].isascii() else ""
+        candidate = f"{current}{joiner}{part}" if current else part
+        if size(candidate) <= max_bytes:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        current = part
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_sentences(
+    text: str, max_bytes: int = DEFAULT_CHUNK_BYTES, size: Callable[[str], int] = _nbytes
+) -> List[str]:
+    """
+    テキストを文に分ける（1文だけで max_bytes を超える場合は読点で、それでも超える場合は文字単位で切る）
+
+    Args:
+        text: テキスト
+        max_bytes: 1文の上限（バイト）
+        size: 1文のバイト数の数え方（既定は UTF-8 のバイト数）
+
+    Returns:
+        文のリスト（空白だけの文は含まない）
+    """
+    if max_bytes <= 0 or max_bytes > MAX_REQUEST_BYTES:
+        raise ValueError(f"max_bytes must be in 1..{MAX_REQUEST_BYTES}, got {max_bytes}")
+
+    sentences: List[str] = []
+    for sentence in _SENTENCE_BREAK.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if size(sentence) <= max_bytes:
+            sentences.append(sentence)
+            continue
+        clauses = []
+        for clause in _CLAUSE_BREAK.split(sentence):
+            clauses.extend(_hard_split(clause, max_bytes, size) if size(clause) > max_bytes else [clause])
+        sentences.extend(_pack(clauses, max_bytes, size=size))
+    return sentences
+
+
+def split_narration(text: str, max_bytes: int = DEFAULT_CHUNK_BYTES) -> List[str]:
+    """
+    ナレーションを文の区切りで、UTF-8 で max_bytes 以下のチャンクに分ける
+
+    文はまたがないように詰める。1文だけで上限を超える場合は読点で、それでも超える場合は文字単位で切る。
+
+    Args:
+        text: ナレーション全文
+        max_bytes: チャンクの上限（バイト）
+
+    Returns:
+        チャンクのリスト（空白だけのチャンクは含まない）
+    """
+    return _pack(split_sentences(text, max_bytes), max_bytes, spaced=True)
+
+
+def split_marked_narration(text: str, max_bytes: int = DEFAULT_CHUNK_BYTES) -> List[List[str]]:
+    """
+    ナレーションを、各チャンクの marked_ssml が max_bytes 以下になるように文単位で分ける（timepoints 用）
+
+    SSML はエスケープ（& → &amp; など）と文ごとの mark の分だけテキストより長くなるので、
+    テキストのバイト数ではなく SSML にしたときのバイト数で詰める。
+
+    Args:
+        text: ナレーション全文
+        max_bytes: チャンクの SSML の上限（バイト）
+
+    Returns:
+        チャンクごとの文のリスト（そのまま marked_ssml に渡せる）
+    """
+    # mark の番号は文の数（文字数以下）までなので、その桁数で mark の長さを見積もる
+    mark_bytes = _nbytes(f'<mark name="{mark_name(len(text))}"/>')
+    budget = max_bytes - _nbytes("<speak></speak>")
+    if budget <= mark_bytes:
+        raise ValueError(f"max_bytes is too small for SSML, got {max_bytes}")
+
+    def size(sentence: str) -> int:
+        return mark_bytes + _nbytes(escape(sentence))
+
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    used = 0
+    for sentence in split_sentences(text, budget, size=size):
+        # marked_ssml と同じく、英文の後には空白が1つ入る
+        cost = size(sentence) + (1 if current and current[-1][-1:].isascii() else 0)
+        if current and used + cost > budget:
+            chunks.append(current)
+            current, used = [], 0
+            cost = size(sentence)
+        current.append(sentence)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def marked_ssml(sentences: Sequence[str], start: int = 0) -> str:
+    """
+    各文の先頭に <mark name="s<番号>"/> を入れた SSML（タイムポイントで文の開始時刻を受け取るため）
+
+    Args:
+        sentences: 文のリスト
+        start: 最初の文の番号（チャンクに分けて合成する場合に通し番号にする）
+
+    Raises:
+        ValueError: SSML が API の入力上限を超える
+    """
+    body = ""
+    for i, sentence in enumerate(sentences, start=start):
+        joiner = " " if body and body[-1].isascii() else ""
+        body += f'{joiner}<mark name="{mark_name(i)}"/>{escape(sentence)}'
+    ssml = f"<speak>{body}</speak>"
+    if _nbytes(ssml) > MAX_REQUEST_BYTES:
+        raise ValueError(f"SSML is {_nbytes(ssml)} bytes, exceeds {MAX_REQUEST_BYTES} (use smaller chunks)")
+    return ssml
+
+
+def mark_name(index: int) -> str:
+    """文の番号に対応する mark の名前"""
+    return f"s{index}"
+
+
+def concat_wav(segments: Sequence[bytes], output_path: Path) -> float:
+    """
+    LINEAR16（WAV）の音声を、PCM のまま隙間なく連結して1つの WAV に書き出す
+
+    Args:
+        segments: WAV ファイルのバイト列（再生順）
+        output_path: 出力先
+
+    Returns:
+        連結後の長さ（秒）
+    """
+    if not segments:
+        raise ValueError("segments must not be empty")
+
+    params = None
+    frames = []
+    for i, data in enumerate(segments):
+        with wave.open(BytesIO(data), "rb") as reader:
+            current = (reader.getnchannels(), reader.getsampwidth(), reader.getframerate())
+            if params is None:
+                params = current
+            elif current != params:
+                # サンプリングレートなどが違うまま連結すると、音程と長さがずれる
+                raise ValueError(f"segment {i} has format {current}, expected {params}")
+            frames.append(reader.readframes(reader.getnframes()))
+
+    channels, sampwidth, rate = params
+    with wave.open(str(output_path), "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(sampwidth)
+        writer.setframerate(rate)
+        for chunk in frames:
+            writer.writeframes(chunk)
+
+    total_frames = sum(len(chunk) for chunk in frames) // (channels * sampwidth)
+    return total_frames / rate
+
+
+def encode_audio(wav_path: Path, output_path: Path, audio_encoding: str) -> Path:
+    """
+    連結した WAV を最終的なエンコーディングで書き出す（ffmpeg で1回だけエンコード）
+
+    Args:
+        wav_path: 入力の WAV
+        output_path: 出力先
+        audio_encoding: "MP3" / "LINEAR16" / "OGG_OPUS"
+
+    Returns:
+        output_path
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if audio_encoding == "LINEAR16":
+        shutil.copyfile(wav_path, output_path)
+        return output_path
+    if audio_encoding not in _ENCODER_ARGS:
+        raise ValueError(f"Unsupported audio_encoding: {audio_encoding}")
+
+    # 完成してから rename する（途中で落ちても壊れたファイルを残さない）
+    tmp = output_path.with_name(f".{output_path.stem}.{os.getpid()}.part{output_path.suffix}")
+    try:
+        run_ffmpeg(["-i", wav_path, "-vn", *_ENCODER_ARGS[audio_encoding], tmp])
+        os.replace(tmp, output_path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return output_path
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+エディターのオーバーレイ設定
+
+動画エディターの設定（タイトル帯・表紙）を pickle 可能なデータクラスで表し、
+build_overlay_clip() で合成クリップを組み立てる。
+設定と組み立て関数を分けておくことで、parallel_render の各ワーカープロセスが
+同じ合成を自前で再構築できる（MoviePy のクリップ自体はプロセス間で渡せない）。
+
+max_width を指定すると、元動画を ffmpeg のデコード時点で縮小し、文字サイズや余白も同じ比率で縮めた
+プロキシ（配置確認用の軽い合成）になる。
+
+タイトル帯と縮小した表紙はそれぞれ自分のパラメータだけをキーにメモ化するので、
+余白や角を変えても描き直し・再縮小は起きない（変わったレイヤーだけ作り直す）。
+
+フル解像度の書き出し（export_overlay）は、既定では同じレイヤーを ffmpeg の overlay フィルタで合成する。
+"""
+
+import os
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from moviepy import CompositeVideoClip, VideoClip, VideoFileClip
+from PIL import Image, ImageDraw
+
+from generators.compositor import StaticOverlay, flatten_static_layers
+from generators.ffmpeg_export import export_static_overlays
+from generators.ffmpeg_tools import probe_media
+from generators.fonts import get_font
+from generators.moviepy_effects import close_clip, load_rgb
+from generators.parallel_render import EncodeSettings, render_parallel
+
+
+# タイトルの横位置
+TITLE_ALIGNS = ("center", "left", "right")
+
+# 表紙を置く角
+COVER_CORNERS = ("top_right", "bottom_right", "top_left", "bottom_left")
+
+# プロキシプレビューの横幅（px）
+PROXY_WIDTH = 640
+
+# フル解像度の書き出し方式
+EXPORT_BACKENDS = ("ffmpeg", "moviepy")
+
+
+@dataclass(frozen=True)
+class TitleBar:
+    """動画上部の半透明帯 + タイトル"""
+    text: str
+    fontsize: int = 40
+    align: str = "center"
+    bg_opacity: float = 0.7
+    margin: int = 30
+
+    def __post_init__(self):
+        if self.align not in TITLE_ALIGNS:
+            raise ValueError(f"align must be one of {TITLE_ALIGNS}, got {self.align!r}")
+
+
+@dataclass(frozen=True)
+class CoverBadge:
+    """動画の角に置く表紙画像"""
+    path: str
+    size_pct: float = 25
+    corner: str = "top_right"
+    margin: int = 30
+
+    def __post_init__(self):
+        if self.corner not in COVER_CORNERS:
+            raise ValueError(f"corner must be one of {COVER_CORNERS}, got {self.corner!r}")
+
+
+@dataclass(frozen=True)
+class OverlayLayout:
+    """元動画とオーバーレイの組み合わせ"""
+    video_path: str
+    title: Optional[TitleBar] = None
+    cover: Optional[CoverBadge] = None
+
+
+@lru_cache(maxsize=32)
+def render_title_bar(title: TitleBar, width: int) -> np.ndarray:
+    """
+    タイトル帯を描画する（(タイトル設定, 幅) ごとにキャッシュ）
+
+    Args:
+        title: タイトル設定
+        width: 帯の幅（動画の幅）
+
+    Returns:
+        RGBA配列（高さはフォントサイズの2倍）。キャッシュを共有するため書き込み不可。
+    """
+    height = int(title.fontsize * 2)
+    img = Image.new('RGBA', (width, height), (0, 0, 0, int(255 * title.bg_opacity)))
+    draw = ImageDraw.Draw(img)
+
+    # 日本語フォントはホストごとに探索し、(フォント, サイズ) でキャッシュ済み
+    font = get_font(title.fontsize)
+
+    bbox = draw.textbbox((0, 0), title.text, font=font)
+    text_width = bbox[2] - bbox[0]
+
+    if title.align == "center":
+        text_x = (width - text_width) // 2
+    elif title.align == "left":
+        text_x = title.margin
+    else:  # right
+        text_x = width - text_width - title.margin
+
+    text_y = (height - title.fontsize) // 2
+
+    draw.text((text_x, text_y), title.text, font=font, fill=(255, 255, 255, 255))
+    array = np.asarray(img)
+    array.setflags(write=False)
+    return array
+
+
+@lru_cache(maxsize=16)
+def _cover_thumbnail(path: str, mtime_ns: int, target_width: int) -> np.ndarray:
+    # 読み込み + LANCZOS 縮小は重いので、(ファイル, 更新時刻, 幅) ごとに1回だけ行う
+    cover_img = load_rgb(path)
+    aspect = cover_img.height / cover_img.width
+    target_height = int(target_width * aspect)
+    cover_img = cover_img.resize((target_width, target_height), Image.Resampling.LANCZOS)
+    array = np.asarray(cover_img)
+    array.setflags(write=False)
+    return array
+
+
+def render_cover(cover: CoverBadge, video_size: Tuple[int, int]) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    表紙画像をリサイズして配置位置を決める
+
+    縮小した表紙はファイルと幅だけをキーにキャッシュするので、角や余白を変えても再縮小しない。
+
+    Args:
+        cover: 表紙設定
+        video_size: 動画サイズ (幅, 高さ)
+
+    Returns:
+        (RGB配列（書き込み不可）, 左上の座標)
+    """
+    video_w, video_h = video_size
+    target_width = int(video_w * cover.size_pct / 100)
+    thumbnail = _cover_thumbnail(cover.path, os.stat(cover.path).st_mtime_ns, target_width)
+    target_height = thumbnail.shape[0]
+
+    right = video_w - target_width - cover.margin
+    bottom = video_h - target_height - cover.margin
+    pos = {
+        "top_right": (right, cover.margin),
+        "bottom_right": (right, bottom),
+        "top_left": (cover.margin, cover.margin),
+        "bottom_left": (cover.margin, bottom),
+    }[cover.corner]
+    return thumbnail, pos
+
+
+def open_source_video(video_path: str, max_width: Optional[int] = None) -> Tuple[VideoFileClip, float]:
+    """
+    元動画を開く
+
+    横幅が max_width を超える場合だけ、ffmpeg のデコード時点で縮小して開き直す。
+
+    Returns:
+        (VideoFileClip, 元の解像度に対する縮小率)
+    """
+    video = VideoFileClip(video_path)
+    if max_width is None or video.w <= max_width:
+        return video, 1.0
+    full_width = video.w
+    video.close()
+    video = VideoFileClip(video_path, target_resolution=(max_width, None))
+    return video, video.w / full_width
+
+
+def _scaled(layout: OverlayLayout, scale: float) -> OverlayLayout:
+    # 元解像度で指定された文字サイズ・余白をプロキシの解像度に合わせる
+    if scale == 1.0:
+        return layout
+    title = layout.title
+    if title is not None:
+        title = replace(title, fontsize=max(int(round(title.fontsize * scale)), 1), margin=int(round(title.margin * scale)))
+    cover = layout.cover
+    if cover is not None:
+        cover = replace(cover, margin=int(round(cover.margin * scale)))
+    return replace(layout, title=title, cover=cover)
+
+
+def overlay_layers(layout: OverlayLayout, video_size: Tuple[int, int], scale: float = 1.0) -> List[StaticOverlay]:
+    """
+    レイアウトの静止レイヤー（MoviePy・ffmpeg どちらの書き出しでも共通）
+
+    Args:
+        layout: オーバーレイ設定
+        video_size: 動画サイズ (幅, 高さ)
+        scale: 元の解像度に対する縮小率（プロキシの場合）
+
+    Returns:
+        StaticOverlay のリスト（下から順）
+    """
+    layout = _scaled(layout, scale)
+    video_w, video_h = int(video_size[0]), int(video_size[1])
+    layers = []
+
+    if layout.title is not None:
+        # 帯は動画と同じ幅なので左端に置く
+        layers.append(StaticOverlay(render_title_bar(layout.title, video_w), 0, 0))
+
+    if layout.cover is not None:
+        cover_img, (x, y) = render_cover(layout.cover, (video_w, video_h))
+        layers.append(StaticOverlay(cover_img, x, y))
+
+    return layers
+
+
+def compose_overlay(video: VideoFileClip, layout: OverlayLayout, scale: float = 1.0) -> VideoClip:
+    """
+    開いてある元動画にオーバーレイを重ねる
+
+    video は閉じない（Streamlit の st.cache_resource で再実行をまたいで使い回せる）。
+
+    Args:
+        video: 元動画（layout.video_path は見ない）
+        layout: オーバーレイ設定
+        scale: open_source_video が返した縮小率
+
+    Returns:
+        合成クリップ（元動画の音声付き。静止レイヤーは compositor のプレートにまとめる）
+    """
+    layers = overlay_layers(layout, (video.w, video.h), scale)
+    clips = [video] + [layer.to_clip(video.duration) for layer in layers]
+    return flatten_static_layers(CompositeVideoClip(clips))
+
+
+def build_overlay_clip(layout: OverlayLayout, max_width: Optional[int] = None) -> VideoClip:
+    """
+    設定から合成クリップを組み立てる（parallel_render のクリップファクトリとしても使う）
+
+    Args:
+        layout: オーバーレイ設定
+        max_width: 指定した場合はこの横幅以下に縮小したプロキシを組み立てる
+
+    Returns:
+        合成クリップ（元動画の音声付き。close_clip で元動画ごと閉じる）
+    """
+    video, scale = open_source_video(layout.video_path, max_width)
+    return compose_overlay(video, layout, scale)
+
+
+def still_frame(clip: VideoClip, t: Optional[float] = None) -> np.ndarray:
+    """
+    合成クリップの1フレーム（エンコードしないので配置の確認が即座にできる）
+
+    Args:
+        clip: 合成クリップ
+        t: 時刻（秒、Noneの場合は動画の中央）
+
+    Returns:
+        RGB配列
+    """
+    if t is None:
+        t = clip.duration / 2
+    # 末尾ちょうどはデコードできないことがあるので1フレーム手前までに収める
+    last = max(clip.duration - 1.0 / (clip.fps or 24), 0.0)
+    return clip.get_frame(min(max(t, 0.0), last))
+
+
+def render_still(layout: OverlayLayout, t: Optional[float] = None, max_width: Optional[int] = PROXY_WIDTH) -> np.ndarray:
+    """
+    元動画を開いて1フレームだけ合成する
+
+    Args:
+        layout: オーバーレイ設定
+        t: 時刻（秒、Noneの場合は動画の中央）
+        max_width: 横幅の上限（Noneで元の解像度）
+
+    Returns:
+        RGB配列
+    """
+    clip = build_overlay_clip(layout, max_width)
+    try:
+        return still_frame(clip, t)
+    finally:
+        close_clip(clip)
+
+
+def export_overlay(
+    layout: OverlayLayout,
+    output_path: Path,
+    *,
+    settings: EncodeSettings = EncodeSettings(),
+    backend: str = "ffmpeg",
+    workers: Optional[int] = None,
+) -> Path:
+    """
+    フル解像度で書き出す
+
+    Args:
+        layout: オーバーレイ設定
+        output_path: 出力先
+        settings: 書き出し設定
+        backend: "ffmpeg"（overlay フィルタで合成、音声はコピー）または
+                 "moviepy"（フレームを Python で合成し、区間に分けて並列に書き出す）
+        workers: moviepy の場合のプロセス数（Noneで CPU コア数）
+
+    Returns:
+        output_path
+    """
+    if backend not in EXPORT_BACKENDS:
+        raise ValueError(f"backend must be one of {EXPORT_BACKENDS}, got {backend!r}")
+    if backend == "moviepy":
+        return render_parallel(build_overlay_clip, (layout,), output_path, settings=settings, workers=workers)
+
+    info = probe_media(layout.video_path)
+    layers = overlay_layers(layout, (info.width, info.height))
+    return export_static_overlays(layout.video_path, layers, output_path, settings=settings)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+合成動画の並列書き出し
+
+write_videofile() はフレーム生成（合成）を1つのPythonプロセスで行うため、コア数を増やしても速くならない。
+ここではタイムラインをフレーム境界で N 区間に分け、区間ごとに別プロセスで合成・エンコードし、
+ffmpeg の concat demuxer で再エンコードなしに連結する。音声は元ファイルのままならストリームコピーし、
+変更されている場合だけ親プロセスで1回書き出して最後に重ねる。
+
+MoviePy のクリップはプロセス間で渡せないので、各ワーカーは「クリップファクトリ」（モジュール直下の関数）と
+pickle 可能な引数から同じ合成を組み立て直す。例:
+    render_parallel(build_overlay_clip, (layout,), "out.mp4")
+    render_parallel(open_book_overlay, ("in.mp4", "cover.png", "タイトル", "both"), "out.mp4")
+"""
+
+import inspect
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from moviepy import AudioFileClip, CompositeAudioClip, VideoClip
+
+from generators.ffmpeg_tools import MP4_AUDIO_CODECS, concat_videos, mux_audio, probe_media
+from generators.moviepy_effects import close_clip
+from generators.scratch import get_scratch
+
+
+# クリップファクトリ: pickle 可能な引数から合成クリップを組み立てる関数（モジュール直下に定義すること）
+ClipFactory = Callable[..., VideoClip]
+
+# 進捗コールバック: (完了した区間数, 全区間数)
+SegmentProgress = Callable[[int, int], None]
+
+# 音声の長さが元ファイルと一致するとみなす誤差（秒）
+AUDIO_DURATION_TOLERANCE = 0.05
+
+# 1区間の最短の長さ（秒）。これより短く刻むとプロセス起動とクリップの再構築の方が高くつく
+MIN_SEGMENT_SECONDS = 2.0
+
+
+@dataclass(frozen=True)
+class EncodeSettings:
+    """書き出し設定（全区間で同一にしないと無劣化連結できない）"""
+    fps: float = 24
+    codec: str = "libx264"
+    preset: str = "fast"
+    audio_codec: str = "aac"
+    ffmpeg_params: Tuple[str, ...] = ()
+
+
+# 配置確認用のプロキシ書き出し（低fps・ultrafast・高めのCRF）
+PROXY_SETTINGS = EncodeSettings(fps=12, preset="ultrafast", ffmpeg_params=("-crf", "30"))
+
+
+def plan_segments(n_frames: int, fps: float, segments: int) -> List[Tuple[int, int]]:
+    """
+    フレーム範囲を segments 個の区間に分ける
+
+    Args:
+        n_frames: 全フレーム数
+        fps: フレームレート
+        segments: 希望する区間数（MIN_SEGMENT_SECONDS に満たない場合は減らす）
+
+    Returns:
+        [(開始フレーム, 終了フレーム), ...]（終了は含まない）
+    """
+    if n_frames <= 0:
+        raise ValueError(f"n_frames must be > 0, got {n_frames}")
+    min_frames = max(int(MIN_SEGMENT_SECONDS * fps), 1)
+    segments = max(min(segments, n_frames // min_frames), 1)
+    bounds = [round(i * n_frames / segments) for i in range(segments + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(segments)]
+
+
+def write_clip(
+    clip: VideoClip,
+    path: Path,
+    settings: EncodeSettings = EncodeSettings(),
+    audio: Optional[bool] = None,
+) -> None:
+    """
+    クリップを1回の write_videofile で書き出す（区間分割なし）
+
+    Args:
+        clip: 書き出すクリップ（閉じない）
+        path: 出力先
+        settings: 書き出し設定
+        audio: 音声を書き出すか（Noneの場合は音声があれば書き出す）
+    """
+    if audio is None:
+        audio = clip.audio is not None
+    clip.write_videofile(
+        str(path),
+        fps=settings.fps,
+        codec=settings.codec,
+        audio=audio,
+        audio_codec=settings.audio_codec,
+        preset=settings.preset,
+        ffmpeg_params=list(settings.ffmpeg_params) or None,
+        logger=None,
+    )
+
+
+def _render_segment(
+    factory: ClipFactory,
+    args: tuple,
+    start: int,
+    end: int,
+    path: Path,
+    settings: EncodeSettings,
+) -> Path:
+    # ワーカープロセスで実行される
+    clip = factory(*args)
+    try:
+        # MoviePy は int(duration * fps) フレームを書き出すので、半フレーム分の余裕を持たせて
+        # 浮動小数点の誤差で最後のフレームが落ちないようにする
+        segment = clip.subclipped(start / settings.fps).with_duration((end - start + 0.5) / settings.fps)
+        write_clip(segment, path, settings, audio=False)
+    finally:
+        close_clip(clip)
+    return path
+
+
+def passthrough_audio_source(clip: VideoClip) -> Optional[str]:
+    """
+    クリップの音声が元ファイルの音声そのまま（時間の変形・ミックス・音量変更なし）なら、そのファイルのパス
+
+    オーバーレイは映像だけを変えるので、Veo の生成音声（リップシンクの台詞を含む）は
+    再エンコードせずにストリームコピーできる。
+
+    Returns:
+        音声を取り出すファイルのパス（コピーできない場合はNone）
+    """
+    audio = clip.audio
+    # CompositeVideoClip は構成クリップの音声を CompositeAudioClip にまとめる（1本なら中身を見る）
+    if isinstance(audio, CompositeAudioClip) and len(audio.clips) == 1:
+        audio = audio.clips[0]
+    if not isinstance(audio, AudioFileClip) or audio.start != 0 or not _reads_file_directly(audio):
+        return None
+    info = probe_media(audio.filename)
+    if info.audio_codec not in MP4_AUDIO_CODECS:
+        return None
+    # with_duration などで切り詰めた音声は、元ファイルの長さと合わない
+    if audio.duration is None or abs(audio.duration - info.duration) > AUDIO_DURATION_TOLERANCE:
+        return None
+    return audio.filename
+
+
+def _reads_file_directly(audio: AudioFileClip) -> bool:
+    # エフェクト・subclipped・音量変更は、元のクリップと変形を参照する新しいフレーム関数に差し替える。
+    # 未変形なら、フレーム関数が参照するのは同じファイルを読む AudioFileClip だけ
+    refs = inspect.getclosurevars(audio.frame_function).nonlocals.values()
+    return len(refs) == 1 and all(
+        isinstance(ref, AudioFileClip) and ref.filename == audio.filename for ref in refs
+    )
+
+
+def render_parallel(
+    factory: ClipFactory,
+    args: Sequence,
+    output_path: Path,
+    *,
+    settings: EncodeSettings = EncodeSettings(),
+    workers: Optional[int] = None,
+    mp_context: str = "spawn",
+    on_progress: Optional[SegmentProgress] = None,
+) -> Path:
+    """
+    合成クリップを区間に分けて並列に書き出す
+
+    音声が元ファイルのまま（passthrough_audio_source）なら映像だけをエンコードし、
+    音声はストリームコピーで重ねる。変更されている場合は settings.audio_codec で再エンコードする。
+
+    Args:
+        factory: クリップファクトリ（各プロセスで factory(*args) を呼ぶ）
+        args: ファクトリの引数（pickle 可能なもの）
+        output_path: 出力先
+        settings: 書き出し設定
+        workers: プロセス数（Noneの場合は CPU コア数）。1 なら区間に分けず1回の write_videofile
+        mp_context: multiprocessing の開始方式（Streamlit のスレッドを fork しないよう既定は spawn）
+        on_progress: 区間が終わるたびに呼ばれるコールバック
+
+    Returns:
+        output_path
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    args = tuple(args)
+    workers = workers or os.cpu_count() or 1
+
+    clip = factory(*args)
+    scratch = get_scratch()
+    temp_files: List[Path] = []
+    try:
+        n_frames = int(clip.duration * settings.fps)
+        ranges = plan_segments(n_frames, settings.fps, workers)
+        audio_source = passthrough_audio_source(clip) if clip.audio is not None else None
+
+        if len(ranges) == 1:
+            if audio_source is None:
+                write_clip(clip, output_path, settings)
+            else:
+                video_only = scratch.path(suffix=".mp4", prefix="video_only")
+                temp_files.append(video_only)
+                write_clip(clip, video_only, settings, audio=False)
+                mux_audio(video_only, audio_source, output_path, duration=clip.duration)
+            if on_progress:
+                on_progress(1, 1)
+            return output_path
+
+        start_time = time.monotonic()
+        segment_paths = [scratch.path(suffix=".mp4", prefix=f"segment{i:03d}") for i in range(len(ranges))]
+        temp_files.extend(segment_paths)
+
+        ctx = multiprocessing.get_context(mp_context)
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=ctx) as pool:
+            futures = [
+                pool.submit(_render_segment, factory, args, start, end, path, settings)
+                for (start, end), path in zip(ranges, segment_paths)
+            ]
+
+            # 音声を作り直す必要がある場合は、区間の書き出しを待つ間に親プロセスで書き出しておく
+            audio_path = None
+            if clip.audio is not None and audio_source is None:
+                audio_path = scratch.path(suffix=".m4a", prefix="audio")
+                temp_files.append(audio_path)
+                clip.audio.write_audiofile(str(audio_path), codec=settings.audio_codec, logger=None)
+
+            for done, future in enumerate(as_completed(futures), start=1):
+                future.result()
+                if on_progress:
+                    on_progress(done, len(futures))
+
+        list_path = scratch.path(suffix=".txt", prefix="concat")
+        temp_files.append(list_path)
+        if clip.audio is None:
+            concat_videos(segment_paths, output_path, list_path)
+        else:
+            video_only = scratch.path(suffix=".mp4", prefix="video_only")
+            temp_files.append(video_only)
+            concat_videos(segment_paths, video_only, list_path)
+            if audio_source is not None:
+                mux_audio(video_only, audio_source, output_path, duration=clip.duration)
+            else:
+                mux_audio(video_only, audio_path, output_path)
+
+        print(f"🎞️ {len(ranges)}区間を並列書き出し: {time.monotonic() - start_time:.1f}秒")
+        return output_path
+    finally:
+        close_clip(clip)
+        for path in temp_files:
+            scratch.release(path)
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Veo 長時間オペレーションのポーリング方針
+
+固定10秒間隔の代わりに、最初は短い間隔で確認し、指数バックオフ（ジッター付き）で
+上限間隔まで伸ばしていく。完了時間の履歴（ヒストグラム）から方針を調整できる。
+
+veo3_sample / veo3_talking_video / VeoGenerator / veo_jobs の全てがこのモジュールを使う。
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence
+
+
+# 完了時間の記録先
+COMPLETION_LOG_PATH = Path("data/cache/veo_completion_times.jsonl")
+
+# 記録がこのサイズを超えたら、モデルごとに直近 COMPLETION_LOG_KEEP 件だけ残して書き直す
+COMPLETION_LOG_MAX_BYTES = 1024 ** 2  # 1MB（約1.5万件）
+COMPLETION_LOG_KEEP = 500
+
+# 履歴から方針を調整するのに必要な最小サンプル数
+MIN_SAMPLES_FOR_TUNING = 20
+
+
+@dataclass(frozen=True)
+class PollingPolicy:
+    """ポーリング方針（指数バックオフ + ジッター）"""
+    first_delay: float = 0.0  # 初回ポーリング前に追加で待つ時間（最速ジョブより前は確認しない）
+    initial_interval: float = 2.0  # 最初のポーリング間隔（秒）
+    multiplier: float = 1.5  # 間隔の増加率
+    max_interval: float = 10.0  # 間隔の上限（秒）
+    jitter: float = 0.2  # 間隔に掛ける揺らぎの割合（±20%）
+
+    def __post_init__(self):
+        # Fail-First: 不正な設定は生成開始前に検出
+        if self.first_delay < 0:
+            raise ValueError(f"first_delay must be >= 0, got {self.first_delay}")
+        if self.initial_interval <= 0:
+            raise ValueError(f"initial_interval must be > 0, got {self.initial_interval}")
+        if self.multiplier < 1.0:
+            raise ValueError(f"multiplier must be >= 1.0, got {self.multiplier}")
+        if self.max_interval < self.initial_interval:
+            raise ValueError(
+                f"max_interval ({self.max_interval}) must be >= initial_interval ({self.initial_interval})"
+            )
+        if not 0.0 <= self.jitter < 1.0:
+            raise ValueError(f"jitter must be in [0, 1), got {self.jitter}")
+
+    def interval(self, attempt: int, rng: Optional[random.Random] = None) -> float:
+        """
+        attempt回目（0始まり）のポーリング前に待つ秒数
+
+        Args:
+            attempt: ポーリング回数（0始まり）
+            rng: 乱数生成器（再現性が必要な場合に指定）
+
+        Returns:
+            待機秒数
+        """
+        base = min(self.initial_interval * (self.multiplier ** attempt), self.max_interval)
+        if attempt == 0:
+            base += self.first_delay
+        if self.jitter:
+            r = (rng or random).uniform(-self.jitter, self.jitter)
+            base *= 1.0 + r
+        return base
+
+    def intervals(self, rng: Optional[random.Random] = None) -> Iterator[float]:
+        """待機秒数を無限に生成する"""
+        attempt = 0
+        while True:
+            yield self.interval(attempt, rng)
+            attempt += 1
+
+    @classmethod
+    def from_completion_times(
+        cls,
+        samples: Sequence[float],
+        max_interval: float = 8.0,
+        jitter: float = 0.2,
+    ) -> "PollingPolicy":
+        """
+        完了時間の履歴から方針を作る
+
+        - 最速側（5パーセンタイル）の9割までは確認しない（長いジョブの呼び出し数を削減）
+        - そこから短い間隔（p05の1/15、1〜5秒）で確認を始め、1.3倍ずつ max_interval まで伸ばす
+          （完了が集中する区間を細かく見て、裾の長いジョブは上限間隔で確認）
+
+        Args:
+            samples: 完了までの秒数のリスト
+            max_interval: 間隔の上限（秒）
+            jitter: ジッターの割合
+
+        Returns:
+            調整済みの PollingPolicy
+        """
+        if not samples:
+            raise ValueError("samples must not be empty")
+
+        p05 = _quantile(samples, 0.05)
+        initial = min(max(p05 / 15.0, 1.0), 5.0)
+        return cls(
+            first_delay=max(p05 * 0.9 - initial, 0.0),
+            initial_interval=initial,
+            multiplier=1.3,
+            max_interval=max(max_interval, initial),
+            jitter=jitter,
+        )
+
+
+# 既定の方針
+DEFAULT_POLICY = PollingPolicy()
+
+
+def _quantile(samples: Sequence[float], q: float) -> float:
+    """線形補間による分位点"""
+    ordered = sorted(samples)
+    pos = (len(ordered) - 1) * q
+    lo = math.floor(pos)
+    hi = math.ceil(pos)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+class CompletionLog:
+    """モデルごとの完了時間の記録（JSONL追記、大きくなったら直近の分だけ残す）"""
+
+    def __init__(
+        self,
+        path: Path = COMPLETION_LOG_PATH,
+        max_bytes: int = COMPLETION_LOG_MAX_BYTES,
+        keep: int = COMPLETION_LOG_KEEP,
+    ):
+        """
+        初期化
+
+        Args:
+            path: 記録ファイル
+            max_bytes: このサイズを超えたら書き直す（バイト）
+            keep: 書き直すときにモデルごとに残す件数
+        """
+        if keep < 1:
+            raise ValueError(f"keep must be >= 1, got {keep}")
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.keep = keep
+
+    def record(self, model: str, seconds: float) -> None:
+        """完了時間を1件追記"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"model": model, "seconds": round(seconds, 3), "at": time.time()}) + "\n")
+            size = f.tell()
+        if size > self.max_bytes:
+            self._compact()
+
+    def samples(self, model: Optional[str] = None, limit: int = 500) -> List[float]:
+        """記録済みの完了時間（直近の最大limit件）"""
+        values: Deque[float] = deque(maxlen=limit)
+        for row in self._rows():
+            if model is None or row.get("model") == model:
+                values.append(float(row["seconds"]))
+        return list(values)
+
+    def _rows(self) -> Iterator[dict]:
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 書き込み途中でクラッシュした行は無視
+
+    def _compact(self) -> None:
+        # モデルごとに直近 keep 件だけ残して、一時ファイル経由で置き換える
+        # （他プロセスが同時に追記した1件は落ちることがあるが、方針の調整には影響しない）
+        recent: Dict[Any, Deque[dict]] = defaultdict(lambda: deque(maxlen=self.keep))
+        for row in self._rows():
+            recent[row.get("model")].append(row)
+        rows = sorted((row for rows in recent.values() for row in rows), key=lambda row: row.get("at", 0.0))
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(row) + "\n" for row in rows)
+        os.replace(tmp, self.path)
+
+
+def policy_for_model(model: Optional[str], log: Optional[CompletionLog] = None) -> PollingPolicy:
+    """
+    モデルの完了時間履歴から方針を選ぶ（履歴が少なければ既定の方針）
+
+    Args:
+        model: モデル名
+        log: 完了時間の記録（Noneの場合は既定のパス）
+
+    Returns:
+        PollingPolicy
+    """
+    if not model:
+        return DEFAULT_POLICY
+    samples = (log or CompletionLog()).samples(model)
+    if len(samples) < MIN_SAMPLES_FOR_TUNING:
+        return DEFAULT_POLICY
+    return PollingPolicy.from_completion_times(samples)
+
+
+def _default_on_poll(polls: int, elapsed: float) -> None:
+    print(f"⏳ 生成中... ({elapsed:.0f}s)")
+
+
+def wait_for_operation(
+    client: Any,
+    operation: Any,
+    *,
+    policy: Optional[PollingPolicy] = None,
+    model: Optional[str] = None,
+    timeout: Optional[float] = None,
+    on_poll: Callable[[int, float], None] = _default_on_poll,
+    log: Optional[CompletionLog] = None,
+    sleep: Callable[[float], None] = time.sleep,
+    clock: Callable[[], float] = time.monotonic,
+    rng: Optional[random.Random] = None,
+) -> Any:
+    """
+    オペレーションの完了をポーリングで待つ（同期版）
+
+    Args:
+        client: genai.Client（operations.get を持つもの）
+        operation: generate_videos の戻り値
+        policy: ポーリング方針（Noneの場合は model の履歴から選択）
+        model: モデル名（完了時間の記録と方針選択に使用）
+        timeout: タイムアウト（秒、Noneで無制限）
+        on_poll: ポーリングごとに (回数, 経過秒) で呼ばれる
+        log: 完了時間の記録先
+        sleep / clock: 待機関数と時計（テスト・シミュレーション用に差し替え可能）
+        rng: ジッター用の乱数生成器
+
+    Returns:
+        完了したオペレーション
+
+    Raises:
+        TimeoutError: timeout を超えた
+    """
+    policy = policy or policy_for_model(model, log)
+    start = clock()
+    polls = 0
+    for delay in policy.intervals(rng):
+        if getattr(operation, "done", False):
+            break
+        elapsed = clock() - start
+        if timeout is not None:
+            if elapsed >= timeout:
+                raise TimeoutError(f"Veo operation timed out after {timeout:.0f}s")
+            delay = min(delay, timeout - elapsed)
+        sleep(delay)
+        operation = client.operations.get(operation)
+        polls += 1
+        on_poll(polls, clock() - start)
+
+    if model and not getattr(operation, "error", None):
+        (log or CompletionLog()).record(model, clock() - start)
+    return operation
+
+
+async def async_wait_for_operation(
+    client: Any,
+    operation: Any,
+    *,
+    policy: Optional[PollingPolicy] = None,
+    model: Optional[str] = None,
+    timeout: Optional[float] = None,
+    on_poll: Callable[[int, float], None] = _default_on_poll,
+    log: Optional[CompletionLog] = None,
+    rng: Optional[random.Random] = None,
+) -> Any:
+    """
+    オペレーションの完了をポーリングで待つ（asyncio版、client.aio を使用）
+
+    引数は wait_for_operation と同じ。
+    """
+    policy = policy or policy_for_model(model, log)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    polls = 0
+    for delay in policy.intervals(rng):
+        if getattr(operation, "done", False):
+            break
+        elapsed = loop.time() - start
+        if timeout is not None:
+            if elapsed >= timeout:
+                raise TimeoutError(f"Veo operation timed out after {timeout:.0f}s")
+            delay = min(delay, timeout - elapsed)
+        await asyncio.sleep(delay)
+        operation = await client.aio.operations.get(operation)
+        polls += 1
+        on_poll(polls, loop.time() - start)
+
+    if model and not getattr(operation, "error", None):
+        (log or CompletionLog()).record(model, loop.time() - start)
+    return operation
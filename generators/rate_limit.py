@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+API呼び出しのレート制限とクォータエラーの再試行
+
+- TokenBucket: 1秒あたりの呼び出し数（QPS）を平均 rate、瞬間的には burst まで許す。
+  スレッド（acquire）と asyncio（acquire_async）のどちらからでも使える。
+  クォータエラー（429）を受けたら pause() で全呼び出しをまとめて一定時間止められる。
+- RetryPolicy: 再試行の回数と待ち時間（指数バックオフ + ジッター）
+- is_quota_error / is_retryable: Google API の例外が再試行してよいものかの判定
+- retry_delay: クォータエラーが指定する再試行までの待ち時間（RetryInfo.retryDelay）
+
+Text-to-Speech（tts_async）と Veo の generate_videos（veo_scheduler）の両方で使う。
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+
+# 再試行してよい HTTP ステータス（クォータ超過・一時的な過負荷）
+RETRYABLE_STATUS_CODES = frozenset({429, 503})
+
+
+class TokenBucket:
+    """トークンバケット（スレッドセーフ、asyncio からも使える）"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        初期化
+
+        Args:
+            rate: 1秒あたりに補充するトークン数（平均のQPS）
+            burst: バケットの容量（瞬間的に連続で使える数、Noneの場合は max(1, rate)）
+            clock: 時刻関数（テスト用に差し替え可能）
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be > 0, got {rate}")
+        burst = max(1.0, rate) if burst is None else burst
+        if burst < 1:
+            raise ValueError(f"burst must be >= 1, got {burst}")
+
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        # ロックを持った状態で呼ぶ。pause 中は補充しない（再開時刻から補充を始める）
+        start = max(self._updated, self._paused_until)
+        if now > start:
+            self._tokens = min(self.burst, self._tokens + (now - start) * self.rate)
+        self._updated = max(now, self._updated)
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        トークンを予約し、使ってよくなるまでの待ち秒数を返す
+
+        残高はマイナスまで借りられるので、呼び出した順に待ち時間が積み上がる（先着順になる）。
+        """
+        if tokens > self.burst:
+            raise ValueError(f"tokens ({tokens}) must be <= burst ({self.burst})")
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= tokens
+            wait = max(self._paused_until - now, 0.0)
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            return wait
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        今使えればトークンを消費して0を返す。使えなければ消費せずに、使えるようになるまでの秒数を返す
+
+        reserve と違って順番を予約しないので、待っている間に優先度の高い呼び出しを先に通せる。
+        """
+        if tokens > self.burst:
+            raise ValueError(f"tokens ({tokens}) must be <= burst ({self.burst})")
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if now >= self._paused_until and self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            wait = max(self._paused_until - now, 0.0)
+            return wait + max(tokens - self._tokens, 0.0) / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """トークンが使えるまで待つ（スレッド用）。待った秒数を返す"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """トークンが使えるまで待つ（asyncio 用、イベントループは止めない）。待った秒数を返す"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """
+        今から seconds 秒間は新しい呼び出しを通さない（クォータエラーを受けたときに全体で止まる）
+
+        すでに予約済みのトークンの待ち時間も、この時刻より前にはならない。
+        """
+        if seconds <= 0:
+            return
+        with self._lock:
+            until = self._clock() + seconds
+            if until > self._paused_until:
+                self._paused_until = until
+                self._tokens = min(self._tokens, 0.0)  # 再開直後にバーストで一斉に流れないようにする
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """再試行方針（指数バックオフ + ジッター）"""
+    max_attempts: int = 5  # 最初の呼び出しを含む試行回数の上限
+    initial_backoff: float = 1.0  # 1回目の再試行までの待ち時間（秒）
+    multiplier: float = 2.0  # 待ち時間の増加率
+    max_backoff: float = 32.0  # 待ち時間の上限（秒）
+    jitter: float = 0.2  # 待ち時間に掛ける揺らぎの割合（±20%）
+
+    def __post_init__(self):
+        # Fail-First: 不正な設定は実行前に検出
+        if self.max_attempts < 1:
+            raise ValueError(f"max_attempts must be >= 1, got {self.max_attempts}")
+        if self.initial_backoff < 0:
+            raise ValueError(f"initial_backoff must be >= 0, got {self.initial_backoff}")
+        if self.multiplier < 1.0:
+            raise ValueError(f"multiplier must be >= 1.0, got {self.multiplier}")
+        if self.max_backoff < self.initial_backoff:
+            raise ValueError(
+                f"max_backoff ({self.max_backoff}) must be >= initial_backoff ({self.initial_backoff})"
+            )
+        if not 0.0 <= self.jitter < 1.0:
+            raise ValueError(f"jitter must be in [0, 1), got {self.jitter}")
+
+    def backoff(self, attempt: int, rng: Optional[random.Random] = None) -> float:
+        """
+        attempt回目（1始まり）の失敗の後に待つ秒数
+
+        Args:
+            attempt: 失敗した試行の番号（1始まり）
+            rng: 乱数生成器（再現性が必要な場合に指定）
+        """
+        base = min(self.initial_backoff * (self.multiplier ** (attempt - 1)), self.max_backoff)
+        if self.jitter:
+            base *= 1.0 + (rng or random).uniform(-self.jitter, self.jitter)
+        return base
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """
+    例外の HTTP ステータスコード（分からなければNone）
+
+    google.api_core.exceptions（gRPC / REST のクライアントライブラリ）は .code に数値、
+    google.genai.errors は .code に数値を持つ。gRPC の StatusCode（enum）は HTTP 相当に直す。
+    """
+    code = getattr(exc, "code", None)
+    if callable(code):  # grpc.RpcError.code() は StatusCode を返すメソッド
+        try:
+            code = code()
+        except Exception:
+            return None
+    if isinstance(code, int):
+        return code
+    name = getattr(code, "name", None)
+    return {"RESOURCE_EXHAUSTED": 429, "UNAVAILABLE": 503}.get(name)
+
+
+def is_quota_error(exc: BaseException) -> bool:
+    """クォータ超過（429 / RESOURCE_EXHAUSTED）か"""
+    return status_code(exc) == 429
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """再試行してよいエラー（クォータ超過・一時的な過負荷）か"""
+    return status_code(exc) in RETRYABLE_STATUS_CODES
+
+
+# "retryDelay": "37s" / "Please retry in 37.5s" のような再試行までの秒数
+_RETRY_DELAY_TEXT = re.compile(r"retry(?:Delay['\"]?\s*[:=]\s*['\"]?| in )(\d+(?:\.\d+)?)s", re.IGNORECASE)
+
+
+def _find_retry_delay(value: Any) -> Optional[float]:
+    # エラー詳細（JSON を読んだ dict / list）から google.rpc.RetryInfo の retryDelay を探す
+    if isinstance(value, dict):
+        delay = value.get("retryDelay") or value.get("retry_delay")
+        if isinstance(delay, str) and delay.endswith("s"):
+            try:
+                return float(delay[:-1])
+            except ValueError:
+                pass
+        value = list(value.values())
+    if isinstance(value, list):
+        for item in value:
+            found = _find_retry_delay(item)
+            if found is not None:
+                return found
+    return None
+
+
+def retry_delay(exc: BaseException) -> Optional[float]:
+    """
+    クォータエラーが指定する、再試行まで待つべき秒数（指定がなければNone）
+
+    google.genai.errors.APIError は .details に応答の JSON を持ち、
+    その中の RetryInfo に "retryDelay": "37s" の形で入っている。見つからなければメッセージ本文から探す。
+    """
+    found = _find_retry_delay(getattr(exc, "details", None))
+    if found is not None:
+        return found
+    match = _RETRY_DELAY_TEXT.search(str(exc))
+    return float(match.group(1)) if match else None
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+管理された作業ディレクトリ（スクラッチ領域）
+
+本当にファイルが必要な場合（ffmpeg に渡す中間ファイル、プレビュー動画など）だけここを使う。
+プロセスごとのディレクトリを作り、終了時に削除する。異常終了で残ったディレクトリは、
+次に起動したプロセスが（元のプロセスが生きていなければ）掃除する。
+Streamlit のように長く動くプロセスでは、get_scratch() が SWEEP_INTERVAL ごとに古いファイルを削除する。
+NamedTemporaryFile(delete=False) のように /tmp にファイルが溜まり続けることはない。
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+# スクラッチ領域のルート（環境変数 BOOK_PROMO_SCRATCH で変更可能）
+SCRATCH_ROOT = Path(os.getenv("BOOK_PROMO_SCRATCH", Path(tempfile.gettempdir()) / "book-promo-scratch"))
+
+# 持ち主のプロセスが生きていても、これより古いファイルは削除対象にする（秒）
+MAX_FILE_AGE = 24 * 3600
+
+# get_scratch() から sweep() を呼ぶ間隔（秒）
+SWEEP_INTERVAL = 3600
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ScratchArea:
+    """プロセス専用のスクラッチディレクトリ"""
+
+    def __init__(self, root: Path = SCRATCH_ROOT, max_file_age: float = MAX_FILE_AGE):
+        """
+        初期化（古いディレクトリの掃除も行う）
+
+        Args:
+            root: スクラッチ領域のルート
+            max_file_age: この秒数より古いファイルは sweep() で削除する
+        """
+        self.root = Path(root)
+        self.max_file_age = max_file_age
+        self.dir = self.root / f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self._remove_orphans()
+
+    def path(self, suffix: str = "", prefix: str = "tmp") -> Path:
+        """
+        一意なファイルパスを返す（ファイルは作らない）
+
+        長く保持するファイル（Streamlitのプレビューなど）はこちらを使い、不要になったら
+        release() するか、プロセス終了時の削除に任せる。
+        """
+        return self.dir / f"{prefix}_{uuid.uuid4().hex}{suffix}"
+
+    @contextmanager
+    def temp_file(self, suffix: str = "", prefix: str = "tmp") -> Iterator[Path]:
+        """with ブロックを抜けたら削除される一時ファイルのパス"""
+        path = self.path(suffix, prefix)
+        try:
+            yield path
+        finally:
+            self.release(path)
+
+    def release(self, path: Optional[Path]) -> None:
+        """スクラッチ内のファイルを削除する（スクラッチ外のパスは無視）"""
+        if path is None:
+            return
+        path = Path(path)
+        if self.dir in path.parents and path.exists():
+            path.unlink()
+
+    def sweep(self) -> None:
+        """自分のディレクトリ内で max_file_age より古いファイルを削除する（長時間稼働するワーカー向け）"""
+        cutoff = time.time() - self.max_file_age
+        with self._lock:
+            self._last_sweep = time.monotonic()
+            for path in self.dir.iterdir():
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def sweep_if_due(self, interval: float = SWEEP_INTERVAL) -> None:
+        """前回の sweep() から interval 秒以上たっていれば sweep() する"""
+        if time.monotonic() - self._last_sweep >= interval:
+            self.sweep()
+
+    def cleanup(self) -> None:
+        """スクラッチディレクトリごと削除する"""
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _remove_orphans(self) -> None:
+        # 異常終了したプロセスのディレクトリを削除
+        for child in self.root.iterdir():
+            if child == self.dir or not child.is_dir():
+                continue
+            pid_text = child.name.split("-", 1)[0]
+            if pid_text.isdigit() and not _pid_alive(int(pid_text)):
+                shutil.rmtree(child, ignore_errors=True)
+
+
+_scratch: Optional[ScratchArea] = None
+_scratch_lock = threading.Lock()
+
+
+def get_scratch() -> ScratchArea:
+    """プロセス内で共有するスクラッチ領域（終了時に自動削除、古いファイルは SWEEP_INTERVAL ごとに削除）"""
+    global _scratch
+    with _scratch_lock:
+        if _scratch is None:
+            _scratch = ScratchArea()
+            atexit.register(_scratch.cleanup)
+        scratch = _scratch
+    scratch.sweep_if_due()
+    return scratch
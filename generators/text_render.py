@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+縁取り付きテキストの描画
+
+文字を1回だけ描き、縁取りは PIL の stroke_width で付ける（従来は11x11のずらし描きで120回描画）。
+描画結果は (テキスト, フォント, サイズ, 縁取り) をキーにメモリ上でキャッシュし、
+同じタイトルを書き出しのたびに描き直さない。
+
+キャッシュするのは文字の外接矩形（縁取りを含む）のタイルだけで、画面全体のキャンバスは持たない
+（1080p の RGBA キャンバスは1枚約8MBあり、並列書き出しのワーカーごとに複製される）。
+"""
+
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from generators.fonts import FontFace, get_font, get_registry
+
+
+def render_text_tile(
+    text: str,
+    size: Tuple[int, int],
+    fontsize: int = 70,
+    position: str = "center",
+    stroke_width: int = 5,
+    face: Optional[FontFace] = None,
+) -> Tuple[np.ndarray, int, int]:
+    """
+    白文字 + 黒縁のテキストを、文字の外接矩形だけのタイルに描画する
+
+    Args:
+        text: テキスト
+        size: 重ねる先のキャンバスサイズ (幅, 高さ)（配置の計算にだけ使う）
+        fontsize: フォントサイズ
+        position: 位置 ("center", "top", "bottom")
+        stroke_width: 縁取りの太さ（px、0で縁取りなし）
+        face: フォント（Noneの場合は fonts の既定CJKフォント）
+
+    Returns:
+        (RGBA配列, x, y)。x, y はキャンバス上のタイルの左上（はみ出す場合は負やキャンバス外）。
+        配列はキャッシュを共有するため書き込み不可。
+    """
+    if face is None:
+        face = get_registry().default_face()
+    tile, left, top, text_width, text_height = _render_text_tile(text, fontsize, stroke_width, face)
+
+    # 位置決定（縁取りを除いた文字の大きさで配置する）
+    x = (size[0] - text_width) // 2
+
+    if position == "top":
+        y = 50
+    elif position == "bottom":
+        y = size[1] - text_height - 50
+    else:  # center
+        y = (size[1] - text_height) // 2
+
+    return tile, x + left, y + top
+
+
+def render_text_overlay(
+    text: str,
+    size: Tuple[int, int],
+    fontsize: int = 70,
+    position: str = "center",
+    stroke_width: int = 5,
+    face: Optional[FontFace] = None,
+) -> np.ndarray:
+    """
+    白文字 + 黒縁のテキストを透明キャンバスに描画する
+
+    キャッシュしたタイルを新しいキャンバスに置くだけなので、文字は描き直さない。
+    合成に使う場合は、キャンバスを作らない render_text_tile の方が軽い。
+
+    Args:
+        text: テキスト
+        size: キャンバスサイズ (幅, 高さ)
+        fontsize: フォントサイズ
+        position: 位置 ("center", "top", "bottom")
+        stroke_width: 縁取りの太さ（px、0で縁取りなし）
+        face: フォント（Noneの場合は fonts の既定CJKフォント）
+
+    Returns:
+        RGBA配列（H x W x 4, uint8）
+    """
+    width, height = int(size[0]), int(size[1])
+    tile, x, y = render_text_tile(text, (width, height), fontsize, position, stroke_width, face)
+    canvas = np.zeros((height, width, 4), dtype=np.uint8)
+
+    # キャンバス外にはみ出した部分を切り落とす
+    h, w = tile.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, width), min(y + h, height)
+    if x0 < x1 and y0 < y1:
+        canvas[y0:y1, x0:x1] = tile[y0 - y:y1 - y, x0 - x:x1 - x]
+    return canvas
+
+
+@lru_cache(maxsize=64)
+def _render_text_tile(
+    text: str,
+    fontsize: int,
+    stroke_width: int,
+    face: Optional[FontFace],
+) -> Tuple[np.ndarray, int, int, int, int]:
+    # 戻り値: (タイル, 描画原点からタイル左上までのずれ x, y, 縁取りを除いた文字の幅, 高さ)
+    font = get_font(fontsize, face)
+    measure = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+
+    bbox = measure.textbbox((0, 0), text, font=font)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+
+    left, top, right, bottom = measure.textbbox((0, 0), text, font=font, stroke_width=stroke_width)
+    img = Image.new('RGBA', (max(right - left, 1), max(bottom - top, 1)), (0, 0, 0, 0))
+
+    # 文字（白）と縁取り（黒）を1回で描画
+    ImageDraw.Draw(img).text(
+        (-left, -top),
+        text,
+        font=font,
+        fill=(255, 255, 255, 255),
+        stroke_width=stroke_width,
+        stroke_fill=(0, 0, 0, 255),
+    )
+
+    array = np.asarray(img)
+    array.setflags(write=False)
+    return array, left, top, text_width, text_height
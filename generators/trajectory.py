@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+カメラ軌道（クロップ矩形の時系列）
+
+キーフレーム（進行度・位置・ズーム倍率）から、指定fpsの全フレーム分のクロップ矩形を
+NumPy配列としてまとめて計算する。フレーム生成時は矩形（小数座標）を出力解像度へ
+リサンプリングするので、整数オフセットによるガタつきのない本物のズームになる。
+"""
+
+from dataclasses import dataclass
+from typing import Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+# キーフレーム: (進行度 0-1, 横位置 0-1, 縦位置 0-1, ズーム倍率 >= 1)
+# 位置はクロップ枠が動ける範囲に対する割合（0 = 左端/上端, 0.5 = 中央, 1 = 右端/下端）
+Keyframe = Tuple[float, float, float, float]
+
+
+@dataclass
+class CropTrajectory:
+    """全フレーム分のクロップ矩形（ソース画像座標、小数）"""
+    x: np.ndarray
+    y: np.ndarray
+    w: np.ndarray
+    h: np.ndarray
+    fps: float
+
+    @property
+    def n_frames(self) -> int:
+        return len(self.x)
+
+    def frame_index(self, t: float) -> int:
+        """時刻 t（秒）に対応するフレーム番号"""
+        return min(max(int(round(t * self.fps)), 0), self.n_frames - 1)
+
+    def box(self, index: int) -> Tuple[float, float, float, float]:
+        """PIL の resize(box=...) 形式の矩形 (left, top, right, bottom)"""
+        x, y = float(self.x[index]), float(self.y[index])
+        return (x, y, x + float(self.w[index]), y + float(self.h[index]))
+
+    def scaled(self, sx: float, sy: float) -> "CropTrajectory":
+        """ソース画像を横 sx 倍・縦 sy 倍にリサイズした場合の軌道"""
+        return CropTrajectory(self.x * sx, self.y * sy, self.w * sx, self.h * sy, self.fps)
+
+
+def _smoothstep(p: np.ndarray) -> np.ndarray:
+    return p * p * (3.0 - 2.0 * p)
+
+
+def keyframe_trajectory(
+    src_size: Tuple[int, int],
+    out_size: Tuple[int, int],
+    keyframes: Sequence[Keyframe],
+    duration: float,
+    fps: float = 24,
+    ease: bool = True,
+) -> CropTrajectory:
+    """
+    キーフレームを補間して全フレーム分のクロップ矩形を計算する
+
+    Args:
+        src_size: ソース画像サイズ (幅, 高さ)
+        out_size: 出力解像度 (幅, 高さ)
+        keyframes: キーフレームのリスト（進行度の昇順）
+        duration: 動画の長さ（秒）
+        fps: フレームレート
+        ease: キーフレーム間をスムーズステップで補間する
+
+    Returns:
+        CropTrajectory
+    """
+    if len(keyframes) < 2:
+        raise ValueError("keyframes must contain at least 2 entries")
+    if duration <= 0 or fps <= 0:
+        raise ValueError(f"duration and fps must be > 0, got duration={duration}, fps={fps}")
+
+    kf = np.asarray(keyframes, dtype=np.float64)
+    if np.any(np.diff(kf[:, 0]) <= 0):
+        raise ValueError("keyframe progress values must be strictly increasing")
+    if np.any(kf[:, 3] < 1.0):
+        raise ValueError("zoom must be >= 1.0")
+
+    src_w, src_h = src_size
+    out_w, out_h = out_size
+    n_frames = max(int(round(duration * fps)), 1)
+    progress = np.arange(n_frames, dtype=np.float64) / max(n_frames - 1, 1)
+
+    if ease:
+        # 区間ごとにスムーズステップを掛けて、キーフレームで速度が急変しないようにする
+        seg = np.clip(np.searchsorted(kf[:, 0], progress, side="right") - 1, 0, len(kf) - 2)
+        p0 = kf[seg, 0]
+        p1 = kf[seg + 1, 0]
+        local = _smoothstep(np.clip((progress - p0) / (p1 - p0), 0.0, 1.0))
+        progress = p0 + local * (p1 - p0)
+
+    fx = np.interp(progress, kf[:, 0], kf[:, 1])
+    fy = np.interp(progress, kf[:, 0], kf[:, 2])
+    zoom = np.interp(progress, kf[:, 0], kf[:, 3])
+
+    # 出力アスペクト比でソースに収まる最大の枠（ズーム1.0）
+    out_aspect = out_w / out_h
+    if src_w / src_h > out_aspect:
+        base_h = float(src_h)
+        base_w = base_h * out_aspect
+    else:
+        base_w = float(src_w)
+        base_h = base_w / out_aspect
+
+    w = base_w / zoom
+    h = base_h / zoom
+    x = np.clip(fx, 0.0, 1.0) * (src_w - w)
+    y = np.clip(fy, 0.0, 1.0) * (src_h - h)
+    return CropTrajectory(x=x, y=y, w=w, h=h, fps=float(fps))
+
+
+def zoom_trajectory(
+    src_size: Tuple[int, int],
+    out_size: Tuple[int, int],
+    duration: float,
+    fps: float = 24,
+    zoom_factor: float = 1.3,
+) -> CropTrajectory:
+    """中央に向かって 1.0 → zoom_factor 倍にズームインする軌道"""
+    keyframes = [(0.0, 0.5, 0.5, 1.0), (1.0, 0.5, 0.5, zoom_factor)]
+    return keyframe_trajectory(src_size, out_size, keyframes, duration, fps)
+
+
+# create_pan_zoom_effect の既定キーフレーム（左寄り → 右へパン → 中央寄りへ戻りつつズーム）
+PAN_ZOOM_KEYFRAMES: Sequence[Keyframe] = (
+    (0.0, 0.0, 0.5, 1.3),
+    (0.3, 0.0, 0.5, 1.35),
+    (0.7, 0.8, 0.7, 1.5),
+    (1.0, 0.9, 0.5, 1.5),
+)
+
+
+def pan_zoom_trajectory(
+    src_size: Tuple[int, int],
+    out_size: Tuple[int, int],
+    duration: float,
+    fps: float = 24,
+    keyframes: Sequence[Keyframe] = PAN_ZOOM_KEYFRAMES,
+) -> CropTrajectory:
+    """パンとズームを組み合わせた軌道"""
+    return keyframe_trajectory(src_size, out_size, keyframes, duration, fps)
+
+
+class TrajectoryRenderer:
+    """クロップ軌道に沿ってフレームを生成する（小数座標のリサンプリング）"""
+
+    def __init__(
+        self,
+        image: Image.Image,
+        trajectory: CropTrajectory,
+        out_size: Tuple[int, int],
+        resample: Image.Resampling = Image.Resampling.BILINEAR,
+    ):
+        """
+        初期化
+
+        ソースが必要以上に大きい場合（最も寄ったフレームでも出力解像度を上回る場合）は
+        一度だけ縮小してから使い、フレームごとのリサンプリング量を抑える。
+
+        Args:
+            image: ソース画像（RGB）
+            trajectory: クロップ軌道（image の座標系）
+            out_size: 出力解像度 (幅, 高さ)
+            resample: リサンプリングフィルタ
+        """
+        min_w = float(trajectory.w.min())
+        factor = out_size[0] / min_w
+        if factor < 1.0:
+            new_size = (max(int(round(image.width * factor)), 1), max(int(round(image.height * factor)), 1))
+            trajectory = trajectory.scaled(new_size[0] / image.width, new_size[1] / image.height)
+            image = image.resize(new_size, Image.Resampling.LANCZOS)
+
+        self.image = image
+        self.trajectory = trajectory
+        self.out_size = tuple(out_size)
+        self.resample = resample
+
+    def frame(self, index: int) -> np.ndarray:
+        """フレーム番号の画像（H x W x 3, uint8）"""
+        box = self.trajectory.box(index)
+        return np.asarray(self.image.resize(self.out_size, self.resample, box=box))
+
+    def frame_at(self, t: float) -> np.ndarray:
+        """時刻 t（秒）の画像"""
+        return self.frame(self.trajectory.frame_index(t))
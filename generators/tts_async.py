@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Text-to-Speech の非同期一括合成
+
+カタログ全体のナレーションのように大量のテキストを合成する場合、同期クライアントで1件ずつ呼ぶと
+ほとんどの時間を応答待ちで過ごし、クォータを使い切れない。
+ライブラリの非同期クライアント（TextToSpeechAsyncClient）を1つだけ作って gRPC チャネルを共有し、
+同時実行数（セマフォ）と QPS（TokenBucket）を制限しながらまとめて投げる。
+クォータ超過（429）・一時的な過負荷（503）は指数バックオフで再試行し、429 の場合は全リクエストを一時停止する。
+
+使い方:
+    from generators.tts_client import TTSConfig
+    from generators.tts_async import synthesize_many
+
+    results = synthesize_many(
+        [TTSConfig(text=t) for t in narrations],
+        output_dir=Path("data/output/speech"),
+        max_concurrency=8,
+        qps=10,
+    )
+"""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from google.cloud import texttospeech
+except ImportError:
+    raise ImportError(
+        "google-cloud-texttospeech is not installed. "
+        "Please run: pip install google-cloud-texttospeech"
+    )
+
+from generators.content_cache import get_tts_cache, tts_cache_key
+from generators.rate_limit import RetryPolicy, TokenBucket, is_quota_error, is_retryable
+from generators.tts_client import AUDIO_EXTENSIONS, TextToSpeechClient, TTSConfig
+from generators.voice_catalog import get_voice_catalog
+
+
+# 同時に実行中にするリクエスト数の既定値
+DEFAULT_MAX_CONCURRENCY = 8
+
+# 1秒あたりのリクエスト数の既定値（プロジェクトのクォータに合わせて調整する）
+DEFAULT_QPS = 10.0
+
+
+class AsyncTextToSpeechClient:
+    """asyncioベースの Text-to-Speech クライアント（gRPC チャネルを共有）"""
+
+    def __init__(
+        self,
+        credentials_path: Optional[str] = None,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        qps: float = DEFAULT_QPS,
+        retry: RetryPolicy = RetryPolicy(),
+        use_cache: bool = True,
+    ):
+        """
+        初期化
+
+        Args:
+            credentials_path: Google Cloud認証情報のパス（Noneの場合は環境変数から取得）
+            max_concurrency: 同時に実行中にするリクエスト数の上限
+            qps: 1秒あたりのリクエスト数の上限
+            retry: クォータ超過・一時的なエラーの再試行方針
+            use_cache: 合成済み音声のキャッシュを使う（tts_client と同じキャッシュ）
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be >= 1, got {max_concurrency}")
+
+        if credentials_path:
+            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = credentials_path
+
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(qps)
+        self.retry = retry
+        self.use_cache = use_cache
+        # 非同期クライアントは作成時のイベントループに結び付くので、ループごとに1つ作る
+        self._client: Optional[texttospeech.TextToSpeechAsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> texttospeech.TextToSpeechAsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = texttospeech.TextToSpeechAsyncClient()
+            self._loop = loop
+        return self._client
+
+    async def close(self) -> None:
+        """gRPC チャネルを閉じる"""
+        if self._client is not None:
+            await self._client.transport.close()
+            self._client = None
+            self._loop = None
+
+    async def synthesize_many(
+        self,
+        configs: Sequence[TTSConfig],
+        *,
+        output_paths: Optional[Sequence[Path]] = None,
+        output_dir: Optional[Path] = None,
+        output_name: str = "speech",
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        全件を合成し、入力と同じ順序で結果を返す
+
+        個々の失敗は結果の status に記録し、他のリクエストは継続する。
+
+        Args:
+            configs: 合成設定のリスト
+            output_paths: 出力先（configs と同じ長さ、Noneの場合は output_dir に連番で保存）
+            output_dir: 出力ディレクトリ
+            output_name: 連番で保存する場合のファイル名の接頭辞
+            on_result: 1件終わるたびに呼ばれる
+
+        Returns:
+            TextToSpeechClient.synthesize_speech と同じ形の辞書のリスト（'attempts': 試行回数 を追加）
+        """
+        if output_paths is not None and len(output_paths) != len(configs):
+            raise ValueError(f"output_paths has {len(output_paths)} items, expected {len(configs)}")
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        start = time.monotonic()
+
+        async def run_one(index: int, config: TTSConfig) -> Dict[str, Any]:
+            output_path = output_paths[index] if output_paths is not None else TextToSpeechClient.resolve_output_path(
+                None, output_dir, f"{output_name}_{index + 1:04d}", AUDIO_EXTENSIONS.get(config.audio_encoding, ".mp3")
+            )
+            async with semaphore:
+                result = await self.synthesize(config, output_path)
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        results = list(await asyncio.gather(*(run_one(i, c) for i, c in enumerate(configs))))
+        ok = sum(1 for r in results if r['status'] == 'success')
+        print(f"✓ 一括合成完了: {ok}/{len(results)}件 成功（{time.monotonic() - start:.1f}秒）")
+        return results
+
+    async def synthesize(self, config: TTSConfig, output_path: Path) -> Dict[str, Any]:
+        """
+        1件を合成して output_path に保存する（キャッシュにあればAPIを呼ばない）
+
+        Returns:
+            TextToSpeechClient.synthesize_speech と同じ形の辞書（'attempts': 試行回数 を追加）
+        """
+        # 音声カタログはスナップショットだけを使う（一括合成の途中で一覧を取りに行かない）
+        voice_name = TextToSpeechClient.resolve_voice(
+            config.language_code, config.voice_name, config.voice_gender, get_voice_catalog()
+        )
+        attempts = 0
+        try:
+            cache_key = tts_cache_key(
+                config.text, config.language_code, voice_name, config.voice_gender, config.audio_encoding,
+                config.speaking_rate, config.pitch, config.volume_gain_db,
+            )
+            cache = get_tts_cache(config.audio_encoding, AUDIO_EXTENSIONS[config.audio_encoding]) if self.use_cache else None
+            cached_path = await asyncio.to_thread(cache.get, cache_key) if cache is not None else None
+
+            if cached_path is not None:
+                audio = await asyncio.to_thread(cached_path.read_bytes)
+            else:
+                audio, attempts = await self._request_with_retry(config, voice_name)
+                if cache is not None:
+                    await asyncio.to_thread(cache.put_bytes, cache_key, audio)
+
+            output_path = Path(output_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            await asyncio.to_thread(output_path.write_bytes, audio)
+
+            return {
+                'audio_file': output_path,
+                'text': config.text,
+                'language': config.language_code,
+                'voice_name': voice_name,
+                'duration': TextToSpeechClient.measure_duration(
+                    audio, config.audio_encoding, config.text, config.speaking_rate
+                ),
+                'timepoints': None,
+                'cached': cached_path is not None,
+                'attempts': attempts,
+                'status': 'success'
+            }
+
+        except Exception as e:
+            print(f"❌ エラー: {config.text[:30]}...: {e}")
+            return {
+                'audio_file': None,
+                'text': config.text,
+                'language': config.language_code,
+                'voice_name': voice_name or "unknown",
+                'duration': 0,
+                'attempts': attempts,
+                'status': 'error',
+                'error': str(e)
+            }
+
+    async def _request_with_retry(self, config: TTSConfig, voice_name: Optional[str]) -> Tuple[bytes, int]:
+        """QPS の範囲で API を呼び、再試行可能なエラーはバックオフして繰り返す。(音声, 試行回数) を返す"""
+        client = self._get_client()
+        synthesis_input = texttospeech.SynthesisInput(text=config.text)
+        voice = texttospeech.VoiceSelectionParams(
+            language_code=config.language_code,
+            name=voice_name,
+            ssml_gender=getattr(texttospeech.SsmlVoiceGender, config.voice_gender)
+        )
+        audio_config = texttospeech.AudioConfig(
+            audio_encoding=getattr(texttospeech.AudioEncoding, config.audio_encoding),
+            speaking_rate=config.speaking_rate,
+            pitch=config.pitch,
+            volume_gain_db=config.volume_gain_db
+        )
+
+        attempt = 0
+        while True:
+            attempt += 1
+            await self.bucket.acquire_async()
+            try:
+                response = await client.synthesize_speech(
+                    input=synthesis_input,
+                    voice=voice,
+                    audio_config=audio_config
+                )
+                return response.audio_content, attempt
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.retry.max_attempts:
+                    raise
+                delay = self.retry.backoff(attempt)
+                if is_quota_error(e):
+                    # クォータ超過は全リクエスト共通なので、バケットごと止めて一斉の再試行を避ける
+                    self.bucket.pause(delay)
+                print(f"⚠️ 再試行 {attempt}/{self.retry.max_attempts - 1}（{delay:.1f}秒後）: {e}")
+                await asyncio.sleep(delay)
+
+
+def synthesize_many(
+    configs: Sequence[TTSConfig],
+    *,
+    output_paths: Optional[Sequence[Path]] = None,
+    output_dir: Optional[Path] = None,
+    output_name: str = "speech",
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    qps: float = DEFAULT_QPS,
+    use_cache: bool = True,
+    credentials_path: Optional[str] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    同期コードから一括合成を実行する（イベントループを作って終わったらチャネルを閉じる）
+
+    引数は AsyncTextToSpeechClient と AsyncTextToSpeechClient.synthesize_many を参照。
+    """
+    async def run() -> List[Dict[str, Any]]:
+        client = AsyncTextToSpeechClient(
+            credentials_path, max_concurrency=max_concurrency, qps=qps, use_cache=use_cache
+        )
+        try:
+            return await client.synthesize_many(
+                configs, output_paths=output_paths, output_dir=output_dir,
+                output_name=output_name, on_result=on_result,
+            )
+        finally:
+            await client.close()
+
+    return asyncio.run(run())
@@ -5,19 +5,46 @@ Google Cloud Text-to-Speech API クライアント
 テキストから音声を生成
 """
 
+import json
 import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Literal
+from typing import Dict, Any, Optional, List, Literal, Tuple
 from dataclasses import dataclass
 
 try:
     from google.cloud import texttospeech
+    from google.cloud import texttospeech_v1beta1
 except ImportError:
     raise ImportError(
         "google-cloud-texttospeech is not installed. "
         "Please run: pip install google-cloud-texttospeech"
     )
 
+# スクリプトとして直接実行した場合も generators パッケージを解決できるようにする
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generators.audio_duration import audio_duration, wav_duration
+from generators.content_cache import get_tts_cache, tts_cache_key
+from generators.narration import (
+    DEFAULT_CHUNK_BYTES,
+    MAX_REQUEST_BYTES,
+    NARRATION_WORKERS,
+    concat_wav,
+    encode_audio,
+    mark_name,
+    marked_ssml,
+    split_marked_narration,
+    split_narration,
+    split_sentences,
+)
+from generators.scratch import get_scratch
+from generators.voice_catalog import VOICE_CATALOG_TTL, VoiceCatalog, VoiceInfo, get_voice_catalog
+
 
 # 音声の性別
 VoiceGender = Literal["NEUTRAL", "MALE", "FEMALE"]
@@ -25,6 +52,16 @@ VoiceGender = Literal["NEUTRAL", "MALE", "FEMALE"]
 # オーディオエンコーディング
 AudioEncoding = Literal["MP3", "LINEAR16", "OGG_OPUS"]
 
+# エンコーディングごとの拡張子
+AUDIO_EXTENSIONS = {
+    "MP3": ".mp3",
+    "LINEAR16": ".wav",
+    "OGG_OPUS": ".ogg",
+}
+
+# タイムポイント（mark の時刻）のキャッシュ名（音声と同じキーで JSON を保存する）
+TIMEPOINTS_CACHE = "timepoints"
+
 
 @dataclass
 class TTSConfig:
@@ -75,6 +112,10 @@ class TextToSpeechClient:
         if credentials_path:
             os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = credentials_path
 
+        # タイムポイントは v1beta1 でしか返らないので、必要になったときに作る
+        self._beta_client = None
+        self._beta_lock = threading.Lock()
+
         # クライアントを初期化
         try:
             self.client = texttospeech.TextToSpeechClient()
@@ -88,6 +129,225 @@ class TextToSpeechClient:
                 f"  または、GOOGLE_APPLICATION_CREDENTIALS環境変数を設定"
             )
 
+    @classmethod
+    def resolve_voice(
+        cls,
+        language_code: str,
+        voice_name: Optional[str],
+        voice_gender: VoiceGender = "NEUTRAL",
+        catalog: Optional[VoiceCatalog] = None
+    ) -> Optional[str]:
+        """
+        音声名が未指定なら言語コードから自動選択する
+
+        既定の音声（JAPANESE_VOICES / ENGLISH_VOICES の female_a）がカタログにあり、性別も合えばそれを使う。
+        廃止された音声や、既定のない言語・性別の場合はカタログから選ぶ（Neural2 > Wavenet > Standard）。
+        カタログがない場合は既定の音声をそのまま使う。
+        """
+        if voice_name is not None:
+            return voice_name
+        preferred = None
+        if language_code.startswith("ja"):
+            preferred = cls.JAPANESE_VOICES["female_a"]
+        elif language_code.startswith("en"):
+            preferred = cls.ENGLISH_VOICES["female_a"]
+        if catalog is None:
+            return preferred
+
+        info = catalog.get(preferred) if preferred else None
+        if info is not None and voice_gender in ("NEUTRAL", info.gender):
+            return preferred
+        picked = catalog.pick(language_code, voice_gender)
+        return picked.name if picked is not None else preferred
+
+    def voice_catalog(self, refresh: bool = False) -> Optional[VoiceCatalog]:
+        """
+        音声カタログ（ディスクのスナップショットを TTL の間使い回す）
+
+        取得できず、スナップショットもない場合はNone（自動選択は既定の音声になる）。
+        """
+        try:
+            return get_voice_catalog(self._fetch_voices, refresh=refresh)
+        except Exception as e:
+            print(f"⚠️ 音声カタログを取得できません: {e}")
+            return None
+
+    def _fetch_voices(self) -> List[VoiceInfo]:
+        """APIから全言語の音声一覧を取得する"""
+        response = self.client.list_voices()
+        return [
+            VoiceInfo(
+                name=voice.name,
+                language_codes=tuple(voice.language_codes),
+                gender=texttospeech.SsmlVoiceGender(voice.ssml_gender).name,
+                natural_sample_rate_hertz=voice.natural_sample_rate_hertz,
+            )
+            for voice in response.voices
+        ]
+
+    @staticmethod
+    def resolve_output_path(
+        output_path: Optional[Path],
+        output_dir: Optional[Path],
+        output_name: str,
+        ext: str
+    ) -> Path:
+        """出力パスを決定する（未指定なら <output_dir>/<output_name>_<タイムスタンプ><拡張子>）"""
+        if output_path is not None:
+            return Path(output_path)
+        # 出力ディレクトリの準備
+        if output_dir is None:
+            project_root = Path(__file__).parent.parent
+            output_dir = project_root / "data" / "output" / "speech"
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        # ファイル名を生成
+        timestamp = int(time.time())
+        return output_dir / f"{output_name}_{timestamp}{ext}"
+
+    def _request_audio(
+        self,
+        text: str,
+        language_code: str,
+        voice_name: Optional[str],
+        voice_gender: VoiceGender,
+        audio_encoding: AudioEncoding,
+        speaking_rate: float,
+        pitch: float,
+        volume_gain_db: float
+    ) -> bytes:
+        """APIを1回呼び出して音声のバイト列を返す"""
+        synthesis_input = texttospeech.SynthesisInput(text=text)
+
+        voice = texttospeech.VoiceSelectionParams(
+            language_code=language_code,
+            name=voice_name,
+            ssml_gender=getattr(texttospeech.SsmlVoiceGender, voice_gender)
+        )
+
+        audio_config = texttospeech.AudioConfig(
+            audio_encoding=getattr(texttospeech.AudioEncoding, audio_encoding),
+            speaking_rate=speaking_rate,
+            pitch=pitch,
+            volume_gain_db=volume_gain_db
+        )
+
+        response = self.client.synthesize_speech(
+            input=synthesis_input,
+            voice=voice,
+            audio_config=audio_config
+        )
+        return response.audio_content
+
+    def _request_marked_audio(
+        self,
+        ssml: str,
+        language_code: str,
+        voice_name: Optional[str],
+        voice_gender: VoiceGender,
+        audio_encoding: AudioEncoding,
+        speaking_rate: float,
+        pitch: float,
+        volume_gain_db: float
+    ) -> Tuple[bytes, List[Tuple[str, float]]]:
+        """<mark> 入りの SSML を v1beta1 で合成し、音声と [(mark名, 秒), ...] を返す"""
+        with self._beta_lock:
+            if self._beta_client is None:
+                self._beta_client = texttospeech_v1beta1.TextToSpeechClient()
+        beta = texttospeech_v1beta1
+
+        request = beta.SynthesizeSpeechRequest(
+            input=beta.SynthesisInput(ssml=ssml),
+            voice=beta.VoiceSelectionParams(
+                language_code=language_code,
+                name=voice_name,
+                ssml_gender=getattr(beta.SsmlVoiceGender, voice_gender)
+            ),
+            audio_config=beta.AudioConfig(
+                audio_encoding=getattr(beta.AudioEncoding, audio_encoding),
+                speaking_rate=speaking_rate,
+                pitch=pitch,
+                volume_gain_db=volume_gain_db
+            ),
+            enable_time_pointing=[beta.SynthesizeSpeechRequest.TimepointType.SSML_MARK]
+        )
+        response = self._beta_client.synthesize_speech(request=request)
+        return response.audio_content, [(tp.mark_name, tp.time_seconds) for tp in response.timepoints]
+
+    def _synthesize(
+        self,
+        text: str,
+        language_code: str,
+        voice_name: Optional[str],
+        voice_gender: VoiceGender,
+        audio_encoding: AudioEncoding,
+        speaking_rate: float,
+        pitch: float,
+        volume_gain_db: float,
+        use_cache: bool,
+        timepoints: bool = False,
+        mark_start: int = 0,
+        sentences: Optional[List[str]] = None
+    ) -> Tuple[bytes, Optional[List[Dict[str, Any]]], bool]:
+        """
+        1リクエスト分を合成する（キャッシュがあれば使う）
+
+        timepoints=True の場合は各文の先頭に mark を入れた SSML で合成し、文の開始時刻を返す。
+        sentences を渡した場合は text を分け直さず、その文で SSML を作る（split_marked_narration の結果）。
+
+        Returns:
+            (音声のバイト列, タイムポイント（timepoints=False なら None）, キャッシュヒットしたか)
+        """
+        if not timepoints:
+            sentences = []
+        elif sentences is None:
+            sentences = split_sentences(text, MAX_REQUEST_BYTES)
+        source = marked_ssml(sentences, mark_start) if timepoints else text
+
+        # 自動選択後の音声名で引くので、voice_name 省略時と明示時で同じ結果を共有する
+        cache_key = tts_cache_key(
+            source, language_code, voice_name, voice_gender, audio_encoding,
+            speaking_rate, pitch, volume_gain_db, ssml=timepoints,
+        )
+        cache = get_tts_cache(audio_encoding, AUDIO_EXTENSIONS[audio_encoding]) if use_cache else None
+        marks_cache = get_tts_cache(TIMEPOINTS_CACHE, ".json") if use_cache and timepoints else None
+        if cache is not None:
+            audio_path = cache.get(cache_key)
+            marks_path = marks_cache.get(cache_key) if marks_cache is not None else None
+            if audio_path is not None and (marks_cache is None or marks_path is not None):
+                marks = json.loads(marks_path.read_text(encoding="utf-8")) if marks_path else None
+                return audio_path.read_bytes(), marks, True
+
+        marks = None
+        if timepoints:
+            audio, raw_marks = self._request_marked_audio(
+                source, language_code, voice_name, voice_gender, audio_encoding,
+                speaking_rate, pitch, volume_gain_db,
+            )
+            texts = {mark_name(i): sentence for i, sentence in enumerate(sentences, start=mark_start)}
+            marks = [{'mark': name, 'time': seconds, 'text': texts.get(name, "")} for name, seconds in raw_marks]
+        else:
+            audio = self._request_audio(
+                text, language_code, voice_name, voice_gender, audio_encoding,
+                speaking_rate, pitch, volume_gain_db,
+            )
+
+        if cache is not None:
+            cache.put_bytes(cache_key, audio)
+        if marks_cache is not None:
+            marks_cache.put_bytes(cache_key, json.dumps(marks, ensure_ascii=False).encode("utf-8"))
+        return audio, marks, False
+
+    @staticmethod
+    def measure_duration(audio: bytes, audio_encoding: AudioEncoding, text: str, speaking_rate: float) -> float:
+        """音声の実際の長さ（ヘッダが読めない場合だけ文字数から推定する）"""
+        try:
+            return audio_duration(audio, audio_encoding)
+        except ValueError as e:
+            print(f"⚠️ 音声の長さを取得できないため文字数から推定します: {e}")
+            return len(text) / 5.0 / speaking_rate  # 日本語は約5文字/秒
+
     def synthesize_speech(
         self,
         text: str,
@@ -100,7 +360,9 @@ class TextToSpeechClient:
         speaking_rate: float = 1.0,
         pitch: float = 0.0,
         volume_gain_db: float = 0.0,
-        output_dir: Optional[Path] = None
+        output_dir: Optional[Path] = None,
+        use_cache: bool = True,
+        timepoints: bool = False
     ) -> Dict[str, Any]:
         """
         テキストから音声を合成
@@ -117,6 +379,8 @@ class TextToSpeechClient:
             pitch: ピッチ（-20.0 - 20.0）
             volume_gain_db: 音量（-96.0 - 16.0）
             output_dir: 出力ディレクトリ
+            use_cache: 同じテキスト・音声・パラメータの合成済み音声があれば再利用する（APIを呼ばない）
+            timepoints: 各文の開始時刻を受け取る（字幕やカットの位置合わせ用、SSML の mark を使う）
 
         Returns:
             合成結果の辞書
@@ -125,7 +389,9 @@ class TextToSpeechClient:
                 'text': str,
                 'language': str,
                 'voice_name': str,
-                'duration': float (推定),
+                'duration': float (音声ファイルのヘッダから求めた実際の長さ),
+                'timepoints': [{'mark': str, 'time': float, 'text': str}, ...] (timepoints=False の場合はNone),
+                'cached': bool (キャッシュから取得した場合True),
                 'status': 'success' | 'error',
                 'error': str (エラー時のみ)
             }
@@ -136,81 +402,170 @@ class TextToSpeechClient:
             print(f"   Language: {language_code}")
             print(f"   Speaking Rate: {speaking_rate}")
 
-            # 入力テキストを設定
-            synthesis_input = texttospeech.SynthesisInput(text=text)
-
             # 音声設定
             if voice_name is None:
-                # 言語コードから自動選択
-                if language_code.startswith("ja"):
-                    voice_name = self.JAPANESE_VOICES["female_a"]
-                elif language_code.startswith("en"):
-                    voice_name = self.ENGLISH_VOICES["female_a"]
-
-            voice = texttospeech.VoiceSelectionParams(
-                language_code=language_code,
-                name=voice_name,
-                ssml_gender=getattr(texttospeech.SsmlVoiceGender, voice_gender)
-            )
-
+                voice_name = self.resolve_voice(language_code, None, voice_gender, self.voice_catalog())
             print(f"   Voice: {voice_name}")
 
-            # オーディオ設定
-            audio_config = texttospeech.AudioConfig(
-                audio_encoding=getattr(texttospeech.AudioEncoding, audio_encoding),
-                speaking_rate=speaking_rate,
-                pitch=pitch,
-                volume_gain_db=volume_gain_db
-            )
+            # 出力パスを決定
+            ext = AUDIO_EXTENSIONS.get(audio_encoding, ".mp3")
+            output_path = self.resolve_output_path(output_path, output_dir, output_name, ext)
 
-            # 音声合成を実行
+            # 音声合成を実行（キャッシュにあればAPIを呼ばない）
             print("📤 API呼び出し中...")
-            response = self.client.synthesize_speech(
-                input=synthesis_input,
-                voice=voice,
-                audio_config=audio_config
+            audio_content, marks, cached = self._synthesize(
+                text, language_code, voice_name, voice_gender, audio_encoding,
+                speaking_rate, pitch, volume_gain_db, use_cache, timepoints,
             )
-
-            print("✓ 音声合成完了")
-
-            # 出力パスを決定
-            if output_path is None:
-                # 出力ディレクトリの準備
-                if output_dir is None:
-                    project_root = Path(__file__).parent.parent
-                    output_dir = project_root / "data" / "output" / "speech"
-                output_dir.mkdir(parents=True, exist_ok=True)
-
-                # 拡張子を決定
-                ext_map = {
-                    "MP3": ".mp3",
-                    "LINEAR16": ".wav",
-                    "OGG_OPUS": ".ogg"
-                }
-                ext = ext_map.get(audio_encoding, ".mp3")
-
-                # ファイル名を生成
-                import time
-                timestamp = int(time.time())
-                filename = f"{output_name}_{timestamp}{ext}"
-                output_path = output_dir / filename
+            print("♻️ キャッシュヒット" if cached else "✓ 音声合成完了")
 
             # 音声ファイルを保存
             print(f"💾 音声ファイルを保存中: {output_path}")
             with open(output_path, "wb") as out:
-                out.write(response.audio_content)
+                out.write(audio_content)
 
             print(f"✓ 保存完了: {output_path}")
 
-            # 音声の長さを推定（文字数から）
-            estimated_duration = len(text) / 5.0 / speaking_rate  # 日本語は約5文字/秒
+            return {
+                'audio_file': output_path,
+                'text': text,
+                'language': language_code,
+                'voice_name': voice_name,
+                'duration': self.measure_duration(audio_content, audio_encoding, text, speaking_rate),
+                'timepoints': marks,
+                'cached': cached,
+                'status': 'success'
+            }
+
+        except Exception as e:
+            print(f"❌ エラー: {e}")
+            return {
+                'audio_file': None,
+                'text': text,
+                'language': language_code,
+                'voice_name': voice_name or "unknown",
+                'duration': 0,
+                'status': 'error',
+                'error': str(e)
+            }
+
+    def synthesize_long_speech(
+        self,
+        text: str,
+        output_path: Optional[Path] = None,
+        output_name: str = "speech",
+        language_code: str = "ja-JP",
+        voice_name: Optional[str] = None,
+        voice_gender: VoiceGender = "NEUTRAL",
+        audio_encoding: AudioEncoding = "MP3",
+        speaking_rate: float = 1.0,
+        pitch: float = 0.0,
+        volume_gain_db: float = 0.0,
+        output_dir: Optional[Path] = None,
+        use_cache: bool = True,
+        timepoints: bool = False,
+        max_workers: int = NARRATION_WORKERS,
+        max_chunk_bytes: int = DEFAULT_CHUNK_BYTES
+    ) -> Dict[str, Any]:
+        """
+        長文を文の区切りで分割し、チャンクを並列に合成して1つの音声にする
+
+        チャンクは LINEAR16 で合成して PCM のまま連結し、最後に audio_encoding で1回だけエンコードする。
+        1チャンクに収まる場合は synthesize_speech と同じ（分割・再エンコードなし）。
+        キャッシュはチャンク単位なので、一部の文だけ直した場合はその文を含むチャンクだけ合成し直す。
+
+        Args:
+            max_workers: 同時に合成するチャンク数の上限
+            max_chunk_bytes: チャンクの上限（UTF-8のバイト数。timepoints=True の場合は mark を入れた SSML のバイト数）
+            その他: synthesize_speech と同じ
+
+        Returns:
+            synthesize_speech と同じ形の辞書（'chunks': チャンク数 を追加）。
+            タイムポイントは全体の通し番号・通しの時刻になる
+        """
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be >= 1, got {max_workers}")
+
+        if timepoints:
+            # SSML はエスケープと mark の分だけテキストより長いので、SSML のバイト数で分ける
+            sentence_chunks: List[Optional[List[str]]] = list(split_marked_narration(text, max_chunk_bytes))
+            chunks = ["".join(sentences) for sentences in sentence_chunks]
+        else:
+            chunks = split_narration(text, max_chunk_bytes)
+            sentence_chunks = [None] * len(chunks)
+        if len(chunks) <= 1:
+            result = self.synthesize_speech(
+                text=text,
+                output_path=output_path,
+                output_name=output_name,
+                language_code=language_code,
+                voice_name=voice_name,
+                voice_gender=voice_gender,
+                audio_encoding=audio_encoding,
+                speaking_rate=speaking_rate,
+                pitch=pitch,
+                volume_gain_db=volume_gain_db,
+                output_dir=output_dir,
+                use_cache=use_cache,
+                timepoints=timepoints
+            )
+            result['chunks'] = len(chunks)
+            return result
+
+        if voice_name is None:
+            voice_name = self.resolve_voice(language_code, None, voice_gender, self.voice_catalog())
+        try:
+            print(f"🎙️ 長文を{len(chunks)}チャンクに分けて並列合成中（最大{max_workers}並列）...")
+            print(f"   Language: {language_code}")
+            print(f"   Voice: {voice_name}")
+
+            # mark の番号はチャンクをまたいだ通し番号にする
+            mark_starts = [0]
+            for sentences in sentence_chunks[:-1]:
+                mark_starts.append(mark_starts[-1] + len(sentences or []))
+
+            def synthesize_chunk(
+                args: Tuple[str, int, Optional[List[str]]]
+            ) -> Tuple[bytes, Optional[List[Dict[str, Any]]], bool]:
+                chunk, mark_start, sentences = args
+                return self._synthesize(
+                    chunk, language_code, voice_name, voice_gender, "LINEAR16",
+                    speaking_rate, pitch, volume_gain_db, use_cache, timepoints, mark_start, sentences,
+                )
+
+            # 全チャンクを同時に投げ、所要時間を一番遅いチャンク程度に抑える（map は入力順で返す）
+            start = time.monotonic()
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+                results = list(pool.map(synthesize_chunk, zip(chunks, mark_starts, sentence_chunks)))
+            hits = sum(1 for _, _, hit in results if hit)
+            print(f"✓ 音声合成完了: {time.monotonic() - start:.1f}秒（キャッシュヒット {hits}/{len(chunks)}）")
+
+            # 各チャンクの mark の時刻を、連結後の通しの時刻にずらす
+            marks = [] if timepoints else None
+            offset = 0.0
+            for audio, chunk_marks, _ in results:
+                for mark in chunk_marks or []:
+                    marks.append({**mark, 'time': mark['time'] + offset})
+                offset += wav_duration(audio)
+
+            output_path = self.resolve_output_path(
+                output_path, output_dir, output_name, AUDIO_EXTENSIONS.get(audio_encoding, ".mp3")
+            )
+            print(f"💾 音声ファイルを保存中: {output_path}")
+            with get_scratch().temp_file(suffix=".wav", prefix="narration") as wav:
+                duration = concat_wav([audio for audio, _, _ in results], wav)
+                encode_audio(wav, output_path, audio_encoding)
+            print(f"✓ 保存完了: {output_path}")
 
             return {
                 'audio_file': output_path,
                 'text': text,
                 'language': language_code,
                 'voice_name': voice_name,
-                'duration': estimated_duration,
+                'duration': duration,
+                'timepoints': marks,
+                'cached': hits == len(chunks),
+                'chunks': len(chunks),
                 'status': 'success'
             }
 
@@ -222,6 +577,7 @@ class TextToSpeechClient:
                 'language': language_code,
                 'voice_name': voice_name or "unknown",
                 'duration': 0,
+                'chunks': len(chunks),
                 'status': 'error',
                 'error': str(e)
             }
@@ -231,7 +587,8 @@ class TextToSpeechClient:
         book_title: str,
         narration_text: str,
         language: str = "ja",
-        output_dir: Optional[Path] = None
+        output_dir: Optional[Path] = None,
+        timepoints: bool = False
     ) -> Dict[str, Any]:
         """
         書籍のナレーションを生成
@@ -241,6 +598,7 @@ class TextToSpeechClient:
             narration_text: ナレーション用テキスト
             language: 言語（"ja" or "en"）
             output_dir: 出力ディレクトリ
+            timepoints: 各文の開始時刻を受け取る（字幕の位置合わせ用）
 
         Returns:
             合成結果
@@ -253,43 +611,58 @@ class TextToSpeechClient:
         safe_title = safe_title.replace(' ', '_')[:30]
         output_name = f"{safe_title}_narration"
 
-        # ナレーションに適した設定
-        return self.synthesize_speech(
+        # ナレーションに適した設定（長文は文の区切りで分割して並列合成）
+        return self.synthesize_long_speech(
             text=narration_text,
             output_name=output_name,
             language_code=language_code,
             speaking_rate=1.0,  # 標準速度
             pitch=0.0,
             volume_gain_db=0.0,
-            output_dir=output_dir
+            output_dir=output_dir,
+            timepoints=timepoints
         )
 
-    def list_available_voices(self, language_code: Optional[str] = None) -> List[str]:
+    def list_available_voices(
+        self,
+        language_code: Optional[str] = None,
+        gender: Optional[str] = None,
+        tier: Optional[str] = None,
+        refresh: bool = False
+    ) -> List[Dict[str, Any]]:
         """
-        利用可能な音声を一覧表示
+        利用可能な音声を一覧表示（音声カタログから引くので、TTL の間はAPIを呼ばない）
 
         Args:
-            language_code: 言語コード（Noneの場合は全て）
+            language_code: 言語コード（"ja-JP" または "ja"、Noneの場合は全て）
+            gender: 性別（Noneの場合は全て）
+            tier: 音声の種類（"Neural2", "Wavenet", "Standard" など、Noneの場合は全て）
+            refresh: カタログを取り直す
 
         Returns:
-            音声名のリスト
+            音声のリスト [{'name', 'languages', 'gender', 'tier'}, ...]
         """
-        try:
-            response = self.client.list_voices(language_code=language_code)
-            voices = []
-
-            for voice in response.voices:
-                voices.append({
-                    'name': voice.name,
-                    'languages': voice.language_codes,
-                    'gender': texttospeech.SsmlVoiceGender(voice.ssml_gender).name
-                })
-
-            return voices
-
-        except Exception as e:
-            print(f"❌ エラー: {e}")
+        catalog = self.voice_catalog(refresh)
+        if catalog is None:
             return []
+        return _voice_dicts(catalog, language_code, gender, tier)
+
+
+def _voice_dicts(
+    catalog: VoiceCatalog,
+    language_code: Optional[str] = None,
+    gender: Optional[str] = None,
+    tier: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    return [
+        {
+            'name': voice.name,
+            'languages': list(voice.language_codes),
+            'gender': voice.gender,
+            'tier': voice.tier
+        }
+        for voice in catalog.find(language_code, gender, tier)
+    ]
 
 
 def main():
@@ -316,31 +689,47 @@ def main():
     parser.add_argument('--output-dir', type=str,
                        help='出力ディレクトリ')
     parser.add_argument('--list-voices', action='store_true',
-                       help='利用可能な音声を一覧表示')
+                       help='利用可能な音声を一覧表示（--gender / --tier で絞り込み）')
+    parser.add_argument('--tier', type=str,
+                       help='一覧表示する音声の種類（Neural2, Wavenet, Standardなど）')
+    parser.add_argument('--refresh-voices', action='store_true',
+                       help='音声カタログをAPIから取り直す')
     parser.add_argument('--credentials', type=str,
                        help='Google Cloud認証情報のパス')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='合成済み音声のキャッシュを使わない')
+    parser.add_argument('--timepoints', action='store_true',
+                       help='各文の開始時刻を表示する')
 
     args = parser.parse_args()
 
-    # クライアントを作成
-    client = TextToSpeechClient(credentials_path=args.credentials)
-
-    # 音声一覧表示
+    # 音声一覧表示（有効なスナップショットがあれば、認証もAPI呼び出しもせずに表示する）
     if args.list_voices:
+        language_code = args.language if args.language else None
+        gender = args.gender if args.gender != 'NEUTRAL' else None
+        catalog = get_voice_catalog() if not args.refresh_voices else None
+        if catalog is not None and catalog.age() <= VOICE_CATALOG_TTL:
+            voices = _voice_dicts(catalog, language_code, gender, args.tier)
+        else:
+            client = TextToSpeechClient(credentials_path=args.credentials)
+            voices = client.list_available_voices(language_code, gender, args.tier, refresh=args.refresh_voices)
+
         print("=" * 60)
         print("利用可能な音声")
         print("=" * 60)
 
-        voices = client.list_available_voices(language_code=args.language if args.language else None)
-
         for voice in voices:
             print(f"\n音声名: {voice['name']}")
             print(f"  言語: {', '.join(voice['languages'])}")
             print(f"  性別: {voice['gender']}")
+            print(f"  種類: {voice['tier']}")
 
         print("=" * 60)
         return
 
+    # クライアントを作成
+    client = TextToSpeechClient(credentials_path=args.credentials)
+
     # 出力ディレクトリ
     output_dir = Path(args.output_dir) if args.output_dir else None
 
@@ -358,14 +747,18 @@ def main():
         speaking_rate=args.speed,
         pitch=args.pitch,
         volume_gain_db=args.volume,
-        output_dir=output_dir
+        output_dir=output_dir,
+        use_cache=not args.no_cache,
+        timepoints=args.timepoints
     )
 
     print("\n" + "=" * 60)
     if result['status'] == 'success':
         print("✅ 成功！")
         print(f"📁 出力ファイル: {result['audio_file']}")
-        print(f"⏱️  推定長: {result['duration']:.1f}秒")
+        print(f"⏱️  長さ: {result['duration']:.2f}秒")
+        for mark in result['timepoints'] or []:
+            print(f"   {mark['time']:7.2f}s  {mark['text']}")
     else:
         print("❌ 失敗")
         print(f"エラー: {result['error']}")
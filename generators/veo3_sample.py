@@ -11,14 +11,12 @@ Veo 3.1 動画生成サンプル
 
 import os
 import sys
-import time
 import argparse
 from pathlib import Path
 from datetime import datetime
 
 # Fail-First: 依存ライブラリのインポートエラーを早期検出
 try:
-    from google import genai
     from google.genai import types
 except ImportError as e:
     raise SystemExit(
@@ -26,12 +24,25 @@ except ImportError as e:
         "Install with: pip install google-generativeai"
     )
 
+# スクリプトとして直接実行した場合も generators パッケージを解決できるようにする
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generators.content_cache import get_video_cache, veo_cache_key
+from generators.download import download_video
+from generators.genai_clients import get_genai_client
+from generators.job_store import get_job_store, resume_operation
+from generators.polling import wait_for_operation
+from generators.veo_scheduler import PRIORITY_INTERACTIVE, get_veo_scheduler
+
 
 def generate_video(
     image_path: Path,
     prompt: str,
     output_dir: Path = Path("output"),
-    duration: int = 8
+    duration: int = 8,
+    use_cache: bool = True,
+    priority: int = PRIORITY_INTERACTIVE
 ) -> Path:
     """
     Veo 3.1で動画生成
@@ -41,6 +52,8 @@ def generate_video(
         prompt: 動画生成プロンプト
         output_dir: 出力ディレクトリ
         duration: 動画長さ（秒）デフォルト8秒
+        use_cache: 同じ画像・プロンプト・設定の生成済み動画があれば再利用する
+        priority: 投入の優先度（veo_scheduler の PRIORITY_INTERACTIVE / PRIORITY_BATCH）
 
     Returns:
         生成された動画ファイルのパス
@@ -49,6 +62,7 @@ def generate_video(
         SystemExit: 環境変数GOOGLE_API_KEYが未設定
         FileNotFoundError: 画像ファイルが存在しない
         ValueError: durationが無効な値
+        QuotaExceededError: 再試行してもクォータ超過が解消しなかった
     """
     # Fail-First: 入力検証
     if not os.getenv("GOOGLE_API_KEY"):
@@ -71,12 +85,26 @@ def generate_video(
     print(f"動画長さ: {duration}秒")
     print(f"{'='*60}\n")
 
-    # Google Generative AI Client初期化
-    client = genai.Client()
+    model = "veo-3.1-generate-preview"
 
     # 画像をバイナリで読み込み
     mime_type = "image/png" if image_path.suffix.lower() == ".png" else "image/jpeg"
     image_bytes = image_path.read_bytes()
+
+    # 出力ファイル名生成
+    output_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    output_path = output_dir / f"veo3_{timestamp}.mp4"
+
+    # キャッシュ確認（ヒットすればAPIを呼ばない）
+    cache_key = veo_cache_key(image_bytes, prompt, model, duration, "ASSET")
+    if use_cache and get_video_cache().materialize(cache_key, output_path):
+        print(f"♻️ キャッシュヒット: {output_path}")
+        return output_path
+
+    # Google Generative AI Client（プロセス内で共有し、接続を使い回す）
+    client = get_genai_client()
+
     image = types.Image(imageBytes=image_bytes, mimeType=mime_type)
 
     # リファレンス画像として設定
@@ -91,46 +119,49 @@ def generate_video(
         durationSeconds=duration,
     )
 
-    # 動画生成開始
-    print("⏳ 動画生成を開始...")
-    operation = client.models.generate_videos(
-        model="veo-3.1-generate-preview",
-        prompt=prompt,
-        config=config,
-    )
+    # 前回のプロセスが同じ入力でポーリング中に終了していれば、そのオペレーションを再開する
+    # （投入からの時間が分からないので、完了時間の履歴には記録しない）
+    store = get_job_store()
+    operation = resume_operation(store, cache_key, wait=lambda op: wait_for_operation(client, op))
+
+    if operation is None:
+        # 動画生成開始（スケジューラがモデルごとの投入数を制限し、クォータ超過は待って再試行する）
+        print("⏳ 動画生成を開始...")
+        operation = get_veo_scheduler().submit(
+            model,
+            lambda: client.models.generate_videos(
+                model=model,
+                prompt=prompt,
+                config=config,
+            ),
+            priority=priority,
+        )
+        store.record_submitted(cache_key, model, operation.name, source="veo3_sample")
 
-    # ポーリングで完了を待機
-    wait_count = 0
-    while not operation.done:
-        wait_count += 1
-        print(f"⏳ 生成中... ({wait_count * 10}秒経過)")
-        time.sleep(10)
-        operation = client.operations.get(operation)
+        # ポーリングで完了を待機（間隔は完了時間の履歴に応じてバックオフ）
+        operation = wait_for_operation(client, operation, model=model)
 
     # 結果確認（Fail-First）
     if not getattr(operation, 'response', None):
+        store.mark_failed(operation.name, "no response")
         raise SystemExit(
             "ERROR: Video generation failed. No response returned.\n"
             "Try a simpler prompt or check API quota."
         )
 
     if not getattr(operation.response, 'generated_videos', None):
+        store.mark_failed(operation.name, "no videos")
         raise SystemExit(
             "ERROR: Video generation failed. No video returned.\n"
             "Try relaxing constraints in the prompt."
         )
 
-    # 生成された動画を取得
+    # 生成された動画をストリーミングで保存（一時ファイル → rename）
     video = operation.response.generated_videos[0]
-    client.files.download(file=video.video)
-
-    # 出力ファイル名生成
-    output_dir.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    output_path = output_dir / f"veo3_{timestamp}.mp4"
-
-    # 動画保存
-    video.video.save(str(output_path))
+    download_video(client, video.video, output_path)
+    store.mark_done(operation.name, output_path)
+    if use_cache:
+        get_video_cache().put(cache_key, output_path)
 
     print(f"\n{'='*60}")
     print(f"✅ 動画生成完了")
@@ -189,6 +220,12 @@ def main():
         help="動画長さ（秒）デフォルト: 8"
     )
 
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="生成済み動画のキャッシュを使わずに必ず生成する"
+    )
+
     args = parser.parse_args()
 
     # 動画生成実行
@@ -197,7 +234,8 @@ def main():
             image_path=args.image,
             prompt=args.prompt,
             output_dir=args.output,
-            duration=args.duration
+            duration=args.duration,
+            use_cache=not args.no_cache
         )
         print(f"✅ 成功: {output_path}")
         sys.exit(0)
@@ -9,23 +9,35 @@ Veo 3.x 画像 + プロンプト → 動画（シンプル版）
 
 import os
 import sys
-import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Any
+from typing import Dict, Optional, Any, Sequence, Tuple
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
 try:
-    from google import genai
     from google.genai import types
 except Exception as e:
     raise SystemExit(
         f"google-genai import error: {e}\nInstall with: pip install google-genai google-generativeai"
     )
 
+# スクリプトとして直接実行した場合も generators パッケージを解決できるようにする
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generators.content_cache import get_video_cache, veo_cache_key
+from generators.download import download_video
+from generators.genai_clients import get_genai_client
+from generators.job_store import OperationDiscarded, get_job_store, resume_operation
+from generators.polling import wait_for_operation
+from generators.veo_scheduler import PRIORITY_INTERACTIVE, QuotaExceededError, SubmitCancelled, get_veo_scheduler
+
 
 # ここを編集して固定値として使えます（CLI未指定時に適用）
 DEFAULT_IMAGE: Path = Path("/Users/sato/work/book-promo-veo-generator/data/『土と生命の46億年史』 /images/藤井一至さんエリマキ写真 (1).JPG")
@@ -42,6 +54,49 @@ DEFAULT_PROMPT: str = (
 )
 
 
+# veo-3.1 で生成する動画の長さ（秒）
+VEO31_MODEL: str = "veo-3.1-generate-preview"
+VEO31_DURATION: int = 6
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """
+    並列フォールバック（ヘッジ）の方針（モデル未指定で veo31 → veo30 の2つを試す場合だけ使う）
+
+    enabled=False なら従来どおり1つずつ試す（費用は最小、失敗すると待ち時間が足し算になる）。
+    enabled=True なら、先の試行を始めて hedge_after 秒たっても終わらなければ後の試行も始め、
+    先に動画ができた方を使ってもう一方は破棄する（最大で2本分の費用がかかる）。
+    hedge_after=0 で同時に始め（待ち時間が最小）、完了時間の p90 程度にすると遅い場合だけ2本目を払う。
+    先の試行が失敗した場合は hedge_after を待たずにすぐ後の試行を始める。
+    """
+    enabled: bool = False
+    hedge_after: float = 0.0  # 後の試行を始めるまでの秒数
+
+    def __post_init__(self):
+        # Fail-First: 不正な設定は生成開始前に検出
+        if self.hedge_after < 0:
+            raise ValueError(f"hedge_after must be >= 0, got {self.hedge_after}")
+
+
+# 既定の方針（環境変数 VEO_HEDGE=1 で有効、VEO_HEDGE_AFTER で後の試行を始めるまでの秒数）
+DEFAULT_HEDGE = HedgePolicy(
+    enabled=os.getenv("VEO_HEDGE", "0") == "1",
+    hedge_after=float(os.getenv("VEO_HEDGE_AFTER", "0")),
+)
+
+
+# ヘッジで負けた試行のオペレーションを捨てるときに記録する理由
+HEDGE_DISCARD_REASON = "another attempt finished first"
+
+
+class HedgeCancelled(OperationDiscarded):
+    """もう一方の試行が先に終わったので、この試行を打ち切った"""
+
+    def __init__(self) -> None:
+        super().__init__(HEDGE_DISCARD_REASON)
+
+
 def _check_api_key() -> None:
     if not os.getenv("GOOGLE_API_KEY"):
         raise SystemExit(
@@ -55,13 +110,24 @@ def _timestamped_outpath(prefix: str, suffix: str, outdir: Path) -> Path:
     return outdir / f"{prefix}_{ts}{suffix}"
 
 
-def _poll_operation(client: Any, operation: Any, *, debug: bool = False) -> Any:
-    waited = 0
-    while not getattr(operation, "done", False):
-        waited += 10
-        print(f"⏳ 生成中... ({waited}s)")
-        time.sleep(10)
-        operation = client.operations.get(operation)
+def _poll_operation(
+    client: Any,
+    operation: Any,
+    *,
+    model: Optional[str] = None,
+    debug: bool = False,
+    cancel: Optional[threading.Event] = None,
+) -> Any:
+    if cancel is None:
+        operation = wait_for_operation(client, operation, model=model)
+    else:
+        # ヘッジ中は cancel が立ったら待機を切り上げ、次のポーリングで打ち切る
+        def on_poll(polls: int, elapsed: float) -> None:
+            if cancel.is_set():
+                raise HedgeCancelled()
+            print(f"⏳ 生成中... ({elapsed:.0f}s)")
+
+        operation = wait_for_operation(client, operation, model=model, on_poll=on_poll, sleep=cancel.wait)
     if debug:
         # 可能ならエラーやメタ情報を表示
         err = getattr(operation, "error", None)
@@ -75,8 +141,14 @@ def _extract_result(operation: Any) -> Any:
     return result
 
 
-def _start_veo31(client: Any, prompt: str, image: Any) -> Any:
-    # Veo 3.1 参照画像コンフィグ
+def _start_veo31(
+    client: Any,
+    prompt: str,
+    image: Any,
+    priority: int = PRIORITY_INTERACTIVE,
+    cancel: Optional[threading.Event] = None,
+) -> Any:
+    # Veo 3.1 参照画像コンフィグ（投入はスケジューラを通し、クォータ超過は待って再試行する）
     try:
         reference = types.VideoGenerationReferenceImage(
             image=image,
@@ -84,28 +156,180 @@ def _start_veo31(client: Any, prompt: str, image: Any) -> Any:
         )
         config = types.GenerateVideosConfig(
             referenceImages=[reference],
-            durationSeconds=6,
+            durationSeconds=VEO31_DURATION,
         )
-        return client.models.generate_videos(
-            model="veo-3.1-generate-preview",
-            prompt=prompt,
-            config=config,
+        return get_veo_scheduler().submit(
+            VEO31_MODEL,
+            lambda: client.models.generate_videos(
+                model=VEO31_MODEL,
+                prompt=prompt,
+                config=config,
+            ),
+            priority=priority,
+            cancel=cancel,
         )
+    except SubmitCancelled:
+        # 投入枠を待っている間にもう一方が終わった（枠も費用も使っていない）
+        raise HedgeCancelled()
+    except QuotaExceededError:
+        raise
     except Exception as e:
         raise RuntimeError(f"veo-3.1 start failed: {e}")
 
 
-def _start_veo30(client: Any, prompt: str, image: Any, model: str) -> Any:
+def _start_veo30(
+    client: Any,
+    prompt: str,
+    image: Any,
+    model: str,
+    priority: int = PRIORITY_INTERACTIVE,
+    cancel: Optional[threading.Event] = None,
+) -> Any:
     try:
-        return client.models.generate_videos(
-            model=model,
-            prompt=prompt,
-            image=image,
+        return get_veo_scheduler().submit(
+            model,
+            lambda: client.models.generate_videos(
+                model=model,
+                prompt=prompt,
+                image=image,
+            ),
+            priority=priority,
+            cancel=cancel,
         )
+    except SubmitCancelled:
+        raise HedgeCancelled()
+    except QuotaExceededError:
+        raise
     except Exception as e:
         raise RuntimeError(f"veo-3.0 start failed: {e}")
 
 
+def _attempt_cache_key(attempt: str, image_bytes: bytes, prompt: str, model: str) -> str:
+    # 試行ごとに実際に使うモデル・設定でキーを作る
+    if attempt == "veo31":
+        return veo_cache_key(image_bytes, prompt, VEO31_MODEL, VEO31_DURATION, "ASSET")
+    return veo_cache_key(image_bytes, prompt, model, None, "IMAGE")
+
+
+def _run_attempt(
+    attempt: str,
+    *,
+    client: Any,
+    image: Any,
+    image_bytes: bytes,
+    prompt: str,
+    model: str,
+    priority: int,
+    debug: bool,
+    cancel: Optional[threading.Event] = None,
+) -> Any:
+    """
+    1つの試行を投入（前回中断したものがあれば再開）して完了を待ち、動画を含むオペレーションを返す
+
+    Raises:
+        HedgeCancelled: ヘッジでもう一方が先に終わった（投入済み・再開中なら破棄として記録する）
+        RuntimeError: 動画が返らなかった
+    """
+    store = get_job_store()
+    attempt_key = _attempt_cache_key(attempt, image_bytes, prompt, model)
+    # 前回のプロセスが同じ試行のポーリング中に終了していれば、そのオペレーションを再開する
+    operation = resume_operation(
+        store, attempt_key, wait=lambda op: _poll_operation(client, op, debug=debug, cancel=cancel)
+    )
+    if operation is None:
+        if attempt == "veo31":
+            attempt_model = VEO31_MODEL
+            operation = _start_veo31(client, prompt, image, priority, cancel)
+        else:
+            attempt_model = model
+            operation = _start_veo30(client, prompt, image, model, priority, cancel)
+        store.record_submitted(attempt_key, attempt_model, operation.name, source="veo3_talking_video")
+        try:
+            operation = _poll_operation(client, operation, model=attempt_model, debug=debug, cancel=cancel)
+        except HedgeCancelled:
+            store.mark_discarded(operation.name, HEDGE_DISCARD_REASON)
+            raise
+
+    videos = getattr(_extract_result(operation), "generated_videos", None)
+    if not videos:
+        err = getattr(operation, "error", None)
+        message = f"no videos (attempt={attempt})" + (f", error={err}" if err else "")
+        store.mark_failed(operation.name, message)
+        raise RuntimeError(message)
+    return operation
+
+
+def _run_hedged(attempt_order: Sequence[str], hedge: HedgePolicy, run: Any) -> Tuple[str, Any]:
+    """
+    先の試行を始め、hedge_after 秒たっても終わらないか失敗したら後の試行も始める。
+    先に動画ができた試行の (名前, オペレーション) を返し、もう一方は打ち切る
+
+    Args:
+        attempt_order: 試行の順（2つ）
+        hedge: ヘッジの方針
+        run: (試行名, cancel) を受け取って _run_attempt を呼ぶ関数
+
+    Raises:
+        QuotaExceededError / RuntimeError: 全ての試行が失敗した（クォータが原因ならそれを優先）
+    """
+    first, second = attempt_order
+    cancel = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hedge")
+    futures: Dict[Future, str] = {pool.submit(run, first, cancel): first}
+    errors: Dict[str, Exception] = {}
+    winner: Optional[Tuple[str, Any]] = None
+    try:
+        done, _ = wait(futures, timeout=hedge.hedge_after)
+        first_ok = any(not f.exception() for f in done)
+        if not first_ok:
+            print(f"🔀 ヘッジ: {second} も並行して開始します")
+            futures[pool.submit(run, second, cancel)] = second
+
+        pending = set(futures)
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                attempt = futures[future]
+                error = future.exception()
+                if error is not None:
+                    errors[attempt] = error
+                    print(f"⚠️ ヘッジ: {attempt} は失敗: {error}")
+                elif winner is None:
+                    winner = (attempt, future.result())
+                else:
+                    # ほぼ同時に両方終わった場合、後から見た方は使わない
+                    get_job_store().mark_discarded(future.result().name, HEDGE_DISCARD_REASON)
+    finally:
+        # 負けた試行は次のポーリングで打ち切られる（終わるのは待たない）
+        cancel.set()
+        pool.shutdown(wait=False)
+
+    if winner is not None:
+        print(f"🏁 ヘッジ: {winner[0]} を採用")
+        return winner
+    quota = next((e for e in errors.values() if isinstance(e, QuotaExceededError)), None)
+    if quota is not None:
+        raise quota
+    raise RuntimeError("Video generation failed: " + "; ".join(f"{a} failed: {e}" for a, e in errors.items()))
+
+
+def _save_video(client: Any, operation: Any, attempt_key: str, output_dir: Path, use_cache: bool) -> Path:
+    """完了したオペレーションの動画を保存し、ジョブストアとキャッシュに記録する"""
+    gen_video = _extract_result(operation).generated_videos[0]
+    out_path = _timestamped_outpath("veo3_simple", ".mp4", output_dir)
+    download_video(client, gen_video.video, out_path)
+    get_job_store().mark_done(operation.name, out_path)
+    if use_cache:
+        get_video_cache().put(attempt_key, out_path)
+
+    print("\n" + "=" * 60)
+    print("✅ 生成完了")
+    print("=" * 60)
+    print(f"出力: {out_path}")
+    print("=" * 60 + "\n")
+    return out_path
+
+
 def generate_video(
     image_path: Path,
     prompt: str,
@@ -113,6 +337,9 @@ def generate_video(
     output_dir: Path = Path("data/output"),
     model: str = "veo-3.0-generate-001",
     debug: bool = False,
+    use_cache: bool = True,
+    priority: int = PRIORITY_INTERACTIVE,
+    hedge: Optional[HedgePolicy] = None,
 ) -> Path:
     """
     画像 + プロンプトから動画を生成（シンプル）
@@ -122,6 +349,9 @@ def generate_video(
         prompt: Veoへのプロンプト（自由に編集）
         output_dir: 出力ディレクトリ
         model: 使用モデル（既定: veo-3.0-generate-001）
+        use_cache: 同じ画像・プロンプト・設定の生成済み動画があれば再利用する
+        priority: 投入の優先度（veo_scheduler の PRIORITY_INTERACTIVE / PRIORITY_BATCH）
+        hedge: veo31 / veo30 を並列に試す方針（Noneの場合は DEFAULT_HEDGE、モデル未指定の場合だけ有効）
     Returns:
         出力動画のPath
     """
@@ -139,11 +369,8 @@ def generate_video(
     print(f"プロンプト: {prompt}")
     print("=" * 60 + "\n")
 
-    client = genai.Client()
-
     mime = "image/png" if image_path.suffix.lower() == ".png" else "image/jpeg"
     image_bytes = image_path.read_bytes()
-    image = types.Image(imageBytes=image_bytes, mimeType=mime)
 
     # モデル指定に応じて試行順を決定
     if isinstance(model, str) and model.startswith("veo-3.0"):
@@ -153,51 +380,48 @@ def generate_video(
     else:
         attempt_order = ("veo31", "veo30")
 
+    # キャッシュ確認（いずれかの試行の結果があればAPIを呼ばない）
+    if use_cache:
+        cache = get_video_cache()
+        for attempt in attempt_order:
+            out_path = _timestamped_outpath("veo3_simple", ".mp4", output_dir)
+            if cache.materialize(_attempt_cache_key(attempt, image_bytes, prompt, model), out_path):
+                print(f"♻️ キャッシュヒット: {out_path}")
+                return out_path
+
+    client = get_genai_client()  # プロセス内で共有し、接続を使い回す
+    image = types.Image(imageBytes=image_bytes, mimeType=mime)
+
+    def run(attempt: str, cancel: Optional[threading.Event] = None) -> Any:
+        return _run_attempt(
+            attempt, client=client, image=image, image_bytes=image_bytes, prompt=prompt,
+            model=model, priority=priority, debug=debug, cancel=cancel,
+        )
+
+    hedge = hedge or DEFAULT_HEDGE
+    if hedge.enabled and len(attempt_order) > 1:
+        # 並列フォールバック: 先に動画ができた方を使う
+        attempt, operation = _run_hedged(attempt_order, hedge, run)
+        return _save_video(client, operation, _attempt_cache_key(attempt, image_bytes, prompt, model), output_dir, use_cache)
+
     last_error_msg = None
+    quota_error: Optional[QuotaExceededError] = None
     for attempt in attempt_order:
         try:
-            if attempt == "veo31":
-                operation = _start_veo31(client, prompt, image)
-            else:
-                operation = _start_veo30(client, prompt, image, model)
-
-            operation = _poll_operation(client, operation, debug=debug)
-            result = _extract_result(operation)
-            videos = getattr(result, "generated_videos", None)
-            if videos:
-                gen_video = videos[0]
-                client.files.download(file=gen_video.video)
-                out_path = _timestamped_outpath("veo3_simple", ".mp4", output_dir)
-                gen_video.video.save(str(out_path))
-
-                print("\n" + "=" * 60)
-                print("✅ 生成完了")
-                print("=" * 60)
-                print(f"出力: {out_path}")
-                print("=" * 60 + "\n")
-                return out_path
-
-            # 結果なし → 次の試行へ
-            err = getattr(operation, "error", None)
-            last_error_msg = f"no videos (attempt={attempt})" + (f", error={err}" if err else "")
+            operation = run(attempt)
+            return _save_video(client, operation, _attempt_cache_key(attempt, image_bytes, prompt, model), output_dir, use_cache)
+        except QuotaExceededError as e:
+            quota_error = e
+            last_error_msg = f"{attempt} failed: {e}"
         except Exception as e:
+            # 結果なし・失敗 → 次の試行へ
             last_error_msg = f"{attempt} failed: {e}"
 
+    if quota_error is not None:
+        # どの試行も通らなかった原因がクォータなら、曖昧な RuntimeError ではなくそのまま伝える
+        raise quota_error
     raise RuntimeError(f"Video generation failed: {last_error_msg or 'unknown error'}")
 
-    gen_video = result.generated_videos[0]
-    client.files.download(file=gen_video.video)
-
-    out_path = _timestamped_outpath("veo3_simple", ".mp4", output_dir)
-    gen_video.video.save(str(out_path))
-
-    print("\n" + "=" * 60)
-    print("✅ 生成完了")
-    print("=" * 60)
-    print(f"出力: {out_path}")
-    print("=" * 60 + "\n")
-    return out_path
-
 
 def main():
     import argparse
@@ -208,6 +432,11 @@ def main():
     parser.add_argument("--model", type=str, default="veo-3.0-generate-001")
     parser.add_argument("--output", type=Path, default=Path("data/output"))
     parser.add_argument("--debug", action="store_true", help="詳細ログを表示")
+    parser.add_argument("--no-cache", action="store_true", help="生成済み動画のキャッシュを使わずに必ず生成する")
+    parser.add_argument("--hedge", action="store_true",
+                        help="モデル未指定時に veo31 / veo30 を並列に試し、先にできた方を使う（最大2本分の費用）")
+    parser.add_argument("--hedge-after", type=float, default=DEFAULT_HEDGE.hedge_after,
+                        help="--hedge で後の試行を始めるまでの秒数（0で同時、既定: VEO_HEDGE_AFTER または0）")
 
     args = parser.parse_args()
 
@@ -220,6 +449,8 @@ def main():
             output_dir=args.output,
             model=args.model,
             debug=args.debug,
+            use_cache=not args.no_cache,
+            hedge=HedgePolicy(enabled=args.hedge or DEFAULT_HEDGE.enabled, hedge_after=args.hedge_after),
         )
         print(f"✅ 出力: {out}")
     except Exception as e:
@@ -7,9 +7,17 @@ import os
 import time
 import shutil
 from pathlib import Path
-from google import genai
+from typing import List, Sequence
 from google.genai import types
 
+from generators.content_cache import veo_cache_key
+from generators.download import download_video
+from generators.genai_clients import get_genai_client
+from generators.job_store import get_job_store, resume_operation
+from generators.polling import wait_for_operation
+from generators.veo_jobs import VeoJobResult, VeoJobSpec, run_jobs
+from generators.veo_scheduler import get_veo_scheduler
+
 
 class VeoGenerator:
     """Veo 3.1を使った動画生成"""
@@ -21,12 +29,12 @@ class VeoGenerator:
         Args:
             api_key: Google API Key (Noneの場合は環境変数から取得)
         """
-        if api_key:
-            os.environ['GOOGLE_API_KEY'] = api_key
-        elif 'GOOGLE_API_KEY' not in os.environ:
+        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        if not self.api_key:
             raise ValueError("GOOGLE_API_KEY is not set")
 
-        self.client = genai.Client(api_key=os.environ['GOOGLE_API_KEY'])
+        # API Key ごとに共有するクライアント（os.environ は書き換えない）
+        self.client = get_genai_client(self.api_key)
 
     def generate_video(
         self,
@@ -66,34 +74,50 @@ class VeoGenerator:
 
         print(f"   プロンプト: {prompt[:80]}...")
 
-        operation = self.client.models.generate_videos(
-            model="veo-3.1-generate-preview",
-            prompt=prompt,
-            config=types.GenerateVideosConfig(
-                reference_images=[reference_image]
-            )
-        )
+        model = "veo-3.1-generate-preview"
+        input_key = veo_cache_key(image_bytes, prompt, model, None, "REFERENCE")
+
+        def on_poll(polls: int, elapsed: float) -> None:
+            print("   ⏳ 生成中...")
 
-        print("   ⏳ 生成中...")
+        # 前回のプロセスが同じ入力でポーリング中に終了していれば、そのオペレーションを再開する
+        store = get_job_store()
+        operation = resume_operation(
+            store,
+            input_key,
+            wait=lambda op: wait_for_operation(self.client, op, timeout=timeout, on_poll=on_poll),
+        )
 
-        # ポーリング
-        start_time = time.time()
-        while not operation.done:
-            if time.time() - start_time > timeout:
-                raise TimeoutError(f"Veo 3.1 generation timed out after {timeout}s")
+        if operation is None:
+            operation = get_veo_scheduler().submit(
+                model,
+                lambda: self.client.models.generate_videos(
+                    model=model,
+                    prompt=prompt,
+                    config=types.GenerateVideosConfig(
+                        reference_images=[reference_image]
+                    )
+                ),
+            )
+            store.record_submitted(input_key, model, operation.name, source="VeoGenerator")
 
-            time.sleep(10)
-            operation = self.client.operations.get(operation)
             print("   ⏳ 生成中...")
 
+            # ポーリング（間隔は完了時間の履歴に応じてバックオフ）
+            operation = wait_for_operation(
+                self.client,
+                operation,
+                model=model,
+                timeout=timeout,
+                on_poll=on_poll,
+            )
+
         print("   ✓ 生成完了！")
 
         # ダウンロード
         generated_video = operation.response.generated_videos[0]
-        self.client.files.download(file=generated_video.video)
-
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        generated_video.video.save(str(output_path))
+        download_video(self.client, generated_video.video, output_path, api_key=self.api_key)
+        store.mark_done(operation.name, output_path)
 
         # 一時ファイルを削除
         tmp_img.unlink()
@@ -101,6 +125,31 @@ class VeoGenerator:
         print(f"   💾 保存: {output_path}")
         return output_path
 
+    def generate_videos(
+        self,
+        jobs: Sequence[VeoJobSpec],
+        max_concurrency: int = 4,
+        timeout: int = 300
+    ) -> List[VeoJobResult]:
+        """
+        複数の動画をまとめて生成（1つのイベントループで並行ポーリング）
+
+        Args:
+            jobs: 生成ジョブのリスト
+            max_concurrency: 同時実行数の上限
+            timeout: ジョブ1件あたりのタイムアウト（秒）
+
+        Returns:
+            入力と同じ順序の結果リスト（失敗したジョブも status に記録される）
+        """
+        # aio の接続はイベントループに結び付くので、共有クライアントは渡さず run ごとに作らせる
+        return run_jobs(
+            jobs,
+            api_key=self.api_key,
+            max_concurrency=max_concurrency,
+            job_timeout=timeout,
+        )
+
     @staticmethod
     def create_prompt_for_scene(scene_type: str, custom_details: str = "") -> str:
         """
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Veo 非同期ジョブエンジン
+
+複数の generate_videos オペレーションを投入し、1つのイベントループでまとめてポーリングする。
+time.sleep でスレッドやStreamlitセッションを占有しない。
+
+使い方:
+    from generators.veo_jobs import VeoJobSpec, run_jobs
+
+    results = run_jobs(
+        [VeoJobSpec(image_path=Path("cover.png"), prompt="...", output_path=Path("output/a.mp4"))],
+        max_concurrency=4,
+        job_timeout=600,
+    )
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Literal, Optional, Sequence, Tuple
+
+try:
+    from google.genai import types
+except ImportError as e:
+    raise SystemExit(
+        f"Required library not found: {e}\n"
+        "Install with: pip install google-genai"
+    )
+
+from generators.content_cache import get_video_cache, veo_cache_key
+from generators.download import download_video
+from generators.genai_clients import create_genai_client, get_genai_client
+from generators.job_store import async_resume_operation, get_job_store
+from generators.polling import PollingPolicy, async_wait_for_operation
+from generators.veo_scheduler import PRIORITY_BATCH, get_veo_scheduler
+
+
+# ジョブの状態
+JobStatus = Literal["done", "failed", "timeout"]
+
+
+@dataclass
+class VeoJobSpec:
+    """Veo動画生成ジョブの入力"""
+    image_path: Path
+    prompt: str
+    output_path: Path
+    model: str = "veo-3.1-generate-preview"
+    duration: int = 8  # veo-3.1のみ有効（veo-3.0はモデル既定の長さ）
+
+
+@dataclass
+class VeoJobResult:
+    """Veo動画生成ジョブの結果"""
+    spec: VeoJobSpec
+    status: JobStatus
+    output_path: Optional[Path] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0  # 秒
+    polls: int = 0  # operations.get の呼び出し回数
+
+
+def build_generate_kwargs(image_path: Path, image_bytes: bytes, prompt: str, model: str, duration: int) -> Dict[str, Any]:
+    """
+    generate_videos に渡す引数を組み立てる
+
+    veo-3.1 は参照画像（ASSET）+ durationSeconds、それ以外は veo3_talking_video と同じく
+    image 引数で画像を渡す。
+
+    Args:
+        image_path: 入力画像パス（PNG/JPG、MIMEタイプの判定に使用）
+        image_bytes: 入力画像のバイト列
+        prompt: 動画生成プロンプト
+        model: モデル名
+        duration: 動画長さ（秒）
+
+    Returns:
+        generate_videos のキーワード引数
+    """
+    mime_type = "image/png" if image_path.suffix.lower() == ".png" else "image/jpeg"
+    image = types.Image(imageBytes=image_bytes, mimeType=mime_type)
+
+    if model.startswith("veo-3.1"):
+        reference = types.VideoGenerationReferenceImage(
+            image=image,
+            referenceType=types.VideoGenerationReferenceType.ASSET,
+        )
+        config = types.GenerateVideosConfig(
+            referenceImages=[reference],
+            durationSeconds=duration,
+        )
+        return {"model": model, "prompt": prompt, "config": config}
+
+    return {"model": model, "prompt": prompt, "image": image}
+
+
+def job_cache_key(spec: VeoJobSpec, image_bytes: bytes) -> str:
+    """ジョブのキャッシュキー（build_generate_kwargs と同じ画像の渡し方・設定で作る）"""
+    if spec.model.startswith("veo-3.1"):
+        return veo_cache_key(image_bytes, spec.prompt, spec.model, spec.duration, "ASSET")
+    return veo_cache_key(image_bytes, spec.prompt, spec.model, None, "IMAGE")
+
+
+class VeoJobEngine:
+    """asyncioベースのVeoジョブエンジン"""
+
+    def __init__(
+        self,
+        client: Any = None,
+        *,
+        api_key: Optional[str] = None,
+        max_concurrency: int = 4,
+        job_timeout: float = 600.0,
+        policy: Optional[PollingPolicy] = None,
+        use_cache: bool = True,
+        priority: int = PRIORITY_BATCH,
+    ):
+        """
+        初期化
+
+        Args:
+            client: genai.Client（Noneの場合はプロセスで共有するクライアント。
+                    aio は run ごとに別のクライアントを作って閉じる。指定した場合は aio もそのまま使う）
+            api_key: Google API Key（Noneの場合は環境変数 GOOGLE_API_KEY。URI からのダウンロードにも使う）
+            max_concurrency: 同時に実行中にするオペレーション数の上限
+            job_timeout: ジョブ1件あたりのタイムアウト（秒、投入〜完了まで。ダウンロードは含めない）
+            policy: ポーリング方針（Noneの場合はモデルの完了時間履歴から選択）
+            use_cache: 生成済み動画のキャッシュを使う
+            priority: 投入の優先度（既定はバッチ。画面からの生成が先に通る）
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be >= 1, got {max_concurrency}")
+        if job_timeout <= 0:
+            raise ValueError(f"job_timeout must be > 0, got {job_timeout}")
+
+        self.api_key = api_key
+        self.client = client if client is not None else get_genai_client(api_key)
+        self._owns_client = client is None
+        self.max_concurrency = max_concurrency
+        self.job_timeout = job_timeout
+        self.policy = policy
+        self.use_cache = use_cache
+        self.priority = priority
+
+    async def run(
+        self,
+        specs: Sequence[VeoJobSpec],
+        on_result: Optional[Callable[[VeoJobResult], None]] = None,
+    ) -> List[VeoJobResult]:
+        """
+        全ジョブを実行し、入力と同じ順序で結果を返す
+
+        個々のジョブの失敗・タイムアウトは結果の status に記録し、他のジョブは継続する。
+
+        Args:
+            specs: ジョブのリスト
+            on_result: ジョブ1件が終わるたびに呼ばれる（チェックポイント記録など）
+        """
+        # client.aio の接続はイベントループに結び付くので、共有クライアントの aio は使わず run ごとに作って閉じる
+        aio_client = create_genai_client(self.api_key) if self._owns_client else self.client
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = [
+            self._run_one(index, spec, aio_client, semaphore, on_result)
+            for index, spec in enumerate(specs, start=1)
+        ]
+        try:
+            return list(await asyncio.gather(*tasks))
+        finally:
+            if self._owns_client:
+                await aio_client.aio.aclose()
+                aio_client.close()
+
+    async def _run_one(
+        self,
+        index: int,
+        spec: VeoJobSpec,
+        aio_client: Any,
+        semaphore: asyncio.Semaphore,
+        on_result: Optional[Callable[[VeoJobResult], None]],
+    ) -> VeoJobResult:
+        result = await self._execute(index, spec, aio_client, semaphore)
+        if on_result is not None:
+            on_result(result)
+        return result
+
+    async def _execute(
+        self, index: int, spec: VeoJobSpec, aio_client: Any, semaphore: asyncio.Semaphore
+    ) -> VeoJobResult:
+        async with semaphore:
+            start = time.monotonic()
+            stats = {"polls": 0}
+            try:
+                generated = await asyncio.wait_for(
+                    self._generate(index, spec, aio_client, stats),
+                    timeout=self.job_timeout,
+                )
+                # ダウンロードはスレッドで動き、wait_for で打ち切っても止まらないので、
+                # タイムアウトの外で最後まで待って保存を記録する
+                if generated is not None:
+                    await self._save(spec, *generated)
+                output_path = spec.output_path
+                print(f"✅ [job {index}] 完了: {output_path}")
+                return VeoJobResult(
+                    spec=spec,
+                    status="done",
+                    output_path=output_path,
+                    elapsed=time.monotonic() - start,
+                    polls=stats["polls"],
+                )
+            except asyncio.TimeoutError:
+                # ローカルの待機を打ち切るだけで、サーバー側のオペレーションは継続する
+                print(f"❌ [job {index}] タイムアウト ({self.job_timeout:.0f}s)")
+                return VeoJobResult(
+                    spec=spec,
+                    status="timeout",
+                    error=f"timed out after {self.job_timeout:.0f}s",
+                    elapsed=time.monotonic() - start,
+                    polls=stats["polls"],
+                )
+            except Exception as e:
+                print(f"❌ [job {index}] 失敗: {e}")
+                return VeoJobResult(
+                    spec=spec,
+                    status="failed",
+                    error=str(e),
+                    elapsed=time.monotonic() - start,
+                    polls=stats["polls"],
+                )
+
+    async def _generate(
+        self, index: int, spec: VeoJobSpec, aio_client: Any, stats: Dict[str, int]
+    ) -> Optional[Tuple[str, Any, str]]:
+        # 完了したオペレーションの (名前, 動画, キャッシュキー) を返す（キャッシュヒット時は保存済みなのでNone）
+        if not spec.image_path.exists():
+            raise FileNotFoundError(f"Image not found: {spec.image_path}")
+
+        image_bytes = spec.image_path.read_bytes()
+        cache_key = job_cache_key(spec, image_bytes)
+        if self.use_cache and get_video_cache().materialize(cache_key, spec.output_path):
+            print(f"♻️ [job {index}] キャッシュヒット: {spec.output_path}")
+            return None
+
+        def on_poll(polls: int, elapsed: float) -> None:
+            stats["polls"] = polls
+            print(f"⏳ [job {index}] 生成中... ({elapsed:.0f}s)")
+
+        # 前回のプロセスが同じ入力でポーリング中に終了していれば、そのオペレーションを再開する
+        store = get_job_store()
+        operation = await async_resume_operation(
+            store,
+            cache_key,
+            wait=lambda op: async_wait_for_operation(aio_client, op, policy=self.policy, on_poll=on_poll),
+        )
+
+        if operation is None:
+            kwargs = build_generate_kwargs(spec.image_path, image_bytes, spec.prompt, spec.model, spec.duration)
+
+            print(f"⏳ [job {index}] 動画生成を開始... ({spec.image_path.name}, {spec.model})")
+            operation = await get_veo_scheduler().submit_async(
+                spec.model,
+                lambda: aio_client.aio.models.generate_videos(**kwargs),
+                priority=self.priority,
+            )
+            store.record_submitted(cache_key, spec.model, operation.name, source="veo_jobs")
+
+            operation = await async_wait_for_operation(
+                aio_client,
+                operation,
+                policy=self.policy,
+                model=spec.model,
+                on_poll=on_poll,
+            )
+
+        result = getattr(operation, "result", None) or getattr(operation, "response", None)
+        videos = getattr(result, "generated_videos", None)
+        if not videos:
+            err = getattr(operation, "error", None)
+            message = "no videos returned" + (f", error={err}" if err else "")
+            store.mark_failed(operation.name, message)
+            raise RuntimeError(message)
+
+        return operation.name, videos[0], cache_key
+
+    async def _save(self, spec: VeoJobSpec, operation_name: str, video: Any, cache_key: str) -> None:
+        # ストリーミング保存はスレッドに逃がしてイベントループを止めない（メモリはチャンク分のみ）
+        await asyncio.to_thread(
+            download_video,
+            self.client,
+            video.video,
+            spec.output_path,
+            api_key=self.api_key,
+            on_progress=None,
+        )
+        get_job_store().mark_done(operation_name, spec.output_path)
+        if self.use_cache:
+            await asyncio.to_thread(get_video_cache().put, cache_key, spec.output_path)
+
+
+def run_jobs(
+    specs: Sequence[VeoJobSpec],
+    on_result: Optional[Callable[[VeoJobResult], None]] = None,
+    **engine_kwargs: Any,
+) -> List[VeoJobResult]:
+    """
+    同期コードからジョブエンジンを実行する
+
+    Args:
+        specs: ジョブのリスト
+        on_result: ジョブ1件が終わるたびに呼ばれる
+        **engine_kwargs: VeoJobEngine の引数（client, api_key, max_concurrency, job_timeout, policy, use_cache, priority）
+
+    Returns:
+        入力と同じ順序の結果リスト
+    """
+    engine = VeoJobEngine(**engine_kwargs)
+    return asyncio.run(engine.run(specs, on_result=on_result))
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Veo の generate_videos の投入スケジューラ（モデルごとのレート制限 + 優先度 + クォータ再試行）
+
+何も制限しないと、Streamlit の利用者やバッチが同時にプロジェクトのクォータを超えて投入し、
+失敗（429）と待機を繰り返す。全ての generate_videos をこのスケジューラを通して投入する。
+
+- モデルごとの TokenBucket で 1分あたりの投入数（RPM）を制限する
+- 待っている投入は優先度順に通す（画面からの操作 PRIORITY_INTERACTIVE がバッチ PRIORITY_BATCH より先）
+- クォータ超過（429）を受けたら、応答の retryDelay（なければ指数バックオフ）だけモデル全体を止めて再試行する
+- 再試行しても通らなければ QuotaExceededError を投げる
+
+使い方:
+    scheduler = get_veo_scheduler()
+    operation = scheduler.submit(
+        model, lambda: client.models.generate_videos(model=model, ...), priority=PRIORITY_BATCH
+    )
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from generators.rate_limit import RetryPolicy, TokenBucket, is_quota_error, is_retryable, retry_delay
+
+
+T = TypeVar("T")
+
+# 優先度（小さいほど先）
+PRIORITY_INTERACTIVE = 0  # Streamlit・CLI から1件ずつ生成する
+PRIORITY_BATCH = 10  # batch_generate などの一括生成
+
+# モデルごとの 1分あたりの投入数（前方一致、長いものを優先）。プロジェクトのクォータに合わせて調整する
+DEFAULT_MODEL_RPM: Dict[str, float] = {
+    "veo-3.1": 10.0,
+    "veo-3.0": 10.0,
+}
+
+# 上の表にないモデルの RPM（環境変数 VEO_RPM で変更可能）
+DEFAULT_RPM = float(os.getenv("VEO_RPM", "10"))
+
+# クォータ超過の再試行方針（Veo のクォータは1分単位なので、待ち時間の上限も1分程度にする）
+DEFAULT_RETRY = RetryPolicy(max_attempts=6, initial_backoff=5.0, multiplier=2.0, max_backoff=60.0)
+
+# asyncio 側で順番・枠を確認し直す間隔の上限（秒、Condition の notify を受け取れないため）
+ASYNC_CHECK_INTERVAL = 0.5
+
+# cancel を渡した投入が、待っている間に cancel を確認し直す間隔の上限（秒、Event は Condition を起こさないため）
+CANCEL_CHECK_INTERVAL = 0.5
+
+
+class QuotaExceededError(RuntimeError):
+    """再試行してもクォータ超過が解消しなかった"""
+
+    def __init__(self, model: str, attempts: int, delay: Optional[float] = None):
+        self.model = model
+        self.attempts = attempts
+        self.delay = delay  # 最後の応答が指定した再試行までの秒数
+        hint = f"（{delay:.1f}秒後に再試行可能）" if delay is not None else ""
+        super().__init__(f"Veo quota exceeded for {model} after {attempts} attempts{hint}")
+
+
+class SubmitCancelled(Exception):
+    """投入枠を待っている間に cancel が立った（枠は使わず、start も呼んでいない）"""
+
+    def __init__(self, model: str):
+        self.model = model
+        super().__init__(f"Veo submit for {model} was cancelled while waiting")
+
+
+class VeoScheduler:
+    """generate_videos の投入をモデルごとに制限し、優先度順に通す（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        model_rpm: Optional[Dict[str, float]] = None,
+        *,
+        default_rpm: float = DEFAULT_RPM,
+        retry: RetryPolicy = DEFAULT_RETRY,
+    ):
+        """
+        初期化
+
+        Args:
+            model_rpm: モデル名の前方一致 -> 1分あたりの投入数（Noneの場合は DEFAULT_MODEL_RPM）
+            default_rpm: どれにも一致しないモデルの 1分あたりの投入数
+            retry: クォータ超過・一時的なエラーの再試行方針
+        """
+        model_rpm = dict(DEFAULT_MODEL_RPM if model_rpm is None else model_rpm)
+        for prefix, rpm in [*model_rpm.items(), ("(default)", default_rpm)]:
+            if rpm <= 0:
+                raise ValueError(f"rpm must be > 0, got {rpm} for {prefix}")
+
+        self.model_rpm = model_rpm
+        self.default_rpm = default_rpm
+        self.retry = retry
+        self._cond = threading.Condition()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._waiting: Dict[str, List[Tuple[int, int]]] = {}  # モデルの制限キー -> (優先度, 到着順) のヒープ
+        self._seq = itertools.count()
+
+    def _limit_key(self, model: str) -> str:
+        # モデルに一致する最も長い前方一致（なければモデル名そのもの）
+        matches = [prefix for prefix in self.model_rpm if model.startswith(prefix)]
+        return max(matches, key=len) if matches else model
+
+    def _bucket(self, key: str) -> TokenBucket:
+        # self._cond を持った状態で呼ぶ
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            # バーストは1（1分の枠に一度に投げず、間隔を空けて上限の速度で流す）
+            bucket = TokenBucket(self.model_rpm.get(key, self.default_rpm) / 60.0, burst=1)
+            self._buckets[key] = bucket
+        return bucket
+
+    def acquire(
+        self, model: str, priority: int = PRIORITY_INTERACTIVE, cancel: Optional[threading.Event] = None
+    ) -> float:
+        """
+        モデルの投入枠が空くまで待つ（待っている中で優先度が最も高く、先に来たものから通す）
+
+        Args:
+            model: モデル名
+            priority: 優先度
+            cancel: 立ったら枠を取らずに待つのをやめる（クォータ超過で止まっている間も確認する）
+
+        Returns:
+            待った秒数
+
+        Raises:
+            SubmitCancelled: 枠を取る前に cancel が立った
+        """
+        key = self._limit_key(model)
+        ticket = (priority, next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            waiting = self._waiting.setdefault(key, [])
+            heapq.heappush(waiting, ticket)
+            try:
+                while True:
+                    if cancel is not None and cancel.is_set():
+                        raise SubmitCancelled(model)
+                    if waiting[0] == ticket:
+                        wait = self._bucket(key).try_acquire()
+                        if wait == 0:
+                            return time.monotonic() - start
+                    else:
+                        wait = None  # 前の投入が通るまで待つ（通ったら notify される）
+                    if cancel is not None:
+                        wait = CANCEL_CHECK_INTERVAL if wait is None else min(wait, CANCEL_CHECK_INTERVAL)
+                    self._cond.wait(timeout=wait)
+            finally:
+                waiting.remove(ticket)
+                heapq.heapify(waiting)
+                self._cond.notify_all()
+
+    async def acquire_async(self, model: str, priority: int = PRIORITY_INTERACTIVE) -> float:
+        """
+        acquire の asyncio版（イベントループ上で待つ）
+
+        スレッドに逃がさないので、待っている途中でキャンセルされたら順番待ちからすぐ外れる
+        （キャンセル後に枠を使ってしまうことも、asyncio.run の終了を待たせることもない）。
+
+        Returns:
+            待った秒数
+        """
+        key = self._limit_key(model)
+        ticket = (priority, next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            waiting = self._waiting.setdefault(key, [])
+            heapq.heappush(waiting, ticket)
+        try:
+            while True:
+                with self._cond:
+                    if waiting[0] == ticket:
+                        wait = self._bucket(key).try_acquire()
+                        if wait == 0:
+                            return time.monotonic() - start
+                    else:
+                        wait = ASYNC_CHECK_INTERVAL  # 前の投入が通るまで待つ
+                await asyncio.sleep(min(wait, ASYNC_CHECK_INTERVAL))
+        finally:
+            with self._cond:
+                waiting.remove(ticket)
+                heapq.heapify(waiting)
+                self._cond.notify_all()
+
+    def pause(self, model: str, seconds: float) -> None:
+        """モデルへの投入を seconds 秒止める（クォータ超過を受けたとき）"""
+        key = self._limit_key(model)
+        with self._cond:
+            self._bucket(key).pause(seconds)
+            self._cond.notify_all()  # 先頭で待っている投入に待ち時間を計算し直させる
+
+    def _on_error(self, model: str, exc: Exception, attempt: int) -> float:
+        # 再試行するなら待つ秒数を返す（クォータ超過はモデル全体を止めるので、呼び出し側は待たない）
+        if not is_retryable(exc) or attempt >= self.retry.max_attempts:
+            if is_quota_error(exc):
+                raise QuotaExceededError(model, attempt, retry_delay(exc)) from exc
+            raise exc
+        if is_quota_error(exc):
+            delay = retry_delay(exc)
+            delay = self.retry.backoff(attempt) if delay is None else delay
+            self.pause(model, delay)
+            print(f"⚠️ Veo クォータ超過: {model} の投入を{delay:.1f}秒止めて再試行します（{attempt}/{self.retry.max_attempts - 1}）")
+            return 0.0
+        delay = self.retry.backoff(attempt)
+        print(f"⚠️ 再試行 {attempt}/{self.retry.max_attempts - 1}（{delay:.1f}秒後）: {exc}")
+        return delay
+
+    def submit(
+        self,
+        model: str,
+        start: Callable[[], T],
+        *,
+        priority: int = PRIORITY_INTERACTIVE,
+        cancel: Optional[threading.Event] = None,
+    ) -> T:
+        """
+        投入枠が空くのを待って start() を呼ぶ（クォータ超過・一時的なエラーは再試行）
+
+        Args:
+            model: モデル名
+            start: generate_videos を呼んでオペレーションを返す関数
+            priority: 優先度（PRIORITY_INTERACTIVE / PRIORITY_BATCH）
+            cancel: 立ったら枠を取らずに投入をやめる（再試行の待ち時間中も確認する）
+
+        Returns:
+            start() の戻り値
+
+        Raises:
+            QuotaExceededError: 再試行してもクォータ超過が解消しなかった
+            SubmitCancelled: start() を呼ぶ前に cancel が立った
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self.acquire(model, priority, cancel)
+            try:
+                return start()
+            except Exception as e:
+                delay = self._on_error(model, e, attempt)
+            if delay:
+                if cancel is None:
+                    time.sleep(delay)
+                elif cancel.wait(delay):
+                    raise SubmitCancelled(model)
+
+    async def submit_async(
+        self, model: str, start: Callable[[], Awaitable[T]], *, priority: int = PRIORITY_INTERACTIVE
+    ) -> T:
+        """submit の asyncio版（枠の待機もイベントループ上で行い、キャンセルできる）"""
+        attempt = 0
+        while True:
+            attempt += 1
+            await self.acquire_async(model, priority)
+            try:
+                return await start()
+            except Exception as e:
+                delay = self._on_error(model, e, attempt)
+            if delay:
+                await asyncio.sleep(delay)
+
+
+_scheduler: Optional[VeoScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_veo_scheduler() -> VeoScheduler:
+    """プロセス内で共有するスケジューラ（同じプロセスの全ての投入が同じ枠を使う）"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = VeoScheduler()
+        return _scheduler
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Text-to-Speech の音声カタログ（ディスクのスナップショット + TTL）
+
+list_voices は毎回APIを呼ぶと遅く、オフラインでは使えない。取得した一覧を
+data/cache/tts_voices.json に保存し、TTL（既定7日）の間はスナップショットだけで答える。
+期限切れでも取得に失敗した場合は古いスナップショットを使う（オフラインでも動く）。
+
+言語・性別・音声の種類（Neural2 / Wavenet / Standard など）で索引を作るので、
+音声の自動選択や --list-voices はメモリ上の辞書を引くだけで済む。
+
+このモジュールは Google Cloud のライブラリに依存しない（取得処理は fetch 関数として受け取る）。
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# スナップショットの保存先と有効期間（秒）
+VOICE_CATALOG_PATH = Path("data/cache/tts_voices.json")
+VOICE_CATALOG_TTL = 7 * 24 * 3600
+
+# 取得に失敗した後、次に取得を試みるまでの間隔（秒、オフライン時に毎回APIを待たないため）
+FETCH_RETRY_INTERVAL = 600
+
+# 自動選択で優先する音声の種類（前ほど高品質）
+PREFERRED_TIERS = ("Neural2", "Wavenet", "Standard")
+
+
+@dataclass(frozen=True)
+class VoiceInfo:
+    """音声1件"""
+    name: str  # 例: "ja-JP-Neural2-B"
+    language_codes: Tuple[str, ...]
+    gender: str  # "MALE" / "FEMALE" / "NEUTRAL" / "SSML_VOICE_GENDER_UNSPECIFIED"
+    natural_sample_rate_hertz: int = 0
+
+    @property
+    def tier(self) -> str:
+        """音声の種類（名前の3番目の要素: "Neural2", "Wavenet", "Standard", "Chirp3-HD" など）"""
+        parts = self.name.split("-")
+        if len(parts) < 4:
+            return "Standard"
+        # "en-US-Chirp3-HD-Achernar" のように種類自体にハイフンを含むものがある
+        return "-".join(parts[2:-1])
+
+
+def _language_keys(code: str) -> Tuple[str, ...]:
+    # "ja-JP" は "ja-jp" と "ja" の両方で引けるようにする
+    code = code.lower()
+    primary = code.split("-")[0]
+    return (code,) if primary == code else (code, primary)
+
+
+class VoiceCatalog:
+    """言語・性別・種類で引ける音声の一覧"""
+
+    def __init__(self, voices: Iterable[VoiceInfo], fetched_at: float):
+        """
+        初期化
+
+        Args:
+            voices: 音声の一覧
+            fetched_at: APIから取得した時刻（UNIX時間）
+        """
+        self.voices: List[VoiceInfo] = sorted(voices, key=lambda v: v.name)
+        self.fetched_at = fetched_at
+        self._by_name: Dict[str, VoiceInfo] = {v.name: v for v in self.voices}
+        self._by_language: Dict[str, List[VoiceInfo]] = defaultdict(list)
+        self._by_gender: Dict[str, List[VoiceInfo]] = defaultdict(list)
+        self._by_tier: Dict[str, List[VoiceInfo]] = defaultdict(list)
+        for voice in self.voices:
+            keys = {key for code in voice.language_codes for key in _language_keys(code)}
+            for key in keys:
+                self._by_language[key].append(voice)
+            self._by_gender[voice.gender].append(voice)
+            self._by_tier[voice.tier.lower()].append(voice)
+
+    def __len__(self) -> int:
+        return len(self.voices)
+
+    def get(self, name: str) -> Optional[VoiceInfo]:
+        """名前で音声を引く"""
+        return self._by_name.get(name)
+
+    def age(self) -> float:
+        """取得してからの経過秒数"""
+        return time.time() - self.fetched_at
+
+    def find(
+        self,
+        language_code: Optional[str] = None,
+        gender: Optional[str] = None,
+        tier: Optional[str] = None,
+    ) -> List[VoiceInfo]:
+        """
+        条件に合う音声（名前順）
+
+        Args:
+            language_code: "ja-JP" のような言語コード、または "ja" のような言語だけ（Noneの場合は全言語）
+            gender: "MALE" / "FEMALE" / "NEUTRAL"（Noneの場合は全て）
+            tier: "Neural2" / "Wavenet" / "Standard" など（大文字小文字は区別しない、Noneの場合は全て）
+        """
+        candidates: Optional[List[VoiceInfo]] = None
+        for index, key in (
+            (self._by_language, language_code.lower() if language_code else None),
+            (self._by_gender, gender),
+            (self._by_tier, tier.lower() if tier else None),
+        ):
+            if key is None:
+                continue
+            matches = index.get(key, [])
+            if candidates is None:
+                candidates = matches
+            else:
+                names = {v.name for v in matches}
+                candidates = [v for v in candidates if v.name in names]
+        return list(self.voices if candidates is None else candidates)
+
+    def pick(
+        self,
+        language_code: str,
+        gender: Optional[str] = None,
+        tiers: Sequence[str] = PREFERRED_TIERS,
+    ) -> Optional[VoiceInfo]:
+        """
+        自動選択: 種類の優先順に探し、性別が指定されていれば（NEUTRAL 以外）それに合うものを選ぶ
+
+        性別の合う音声がなければ性別を問わずに選ぶ。該当がなければNone。
+        """
+        wanted_gender = gender if gender not in (None, "NEUTRAL") else None
+        for gender_filter in ((wanted_gender, None) if wanted_gender else (None,)):
+            for tier in tiers:
+                found = self.find(language_code, gender_filter, tier)
+                if found:
+                    return found[0]
+            found = self.find(language_code, gender_filter)
+            if found:
+                return found[0]
+        return None
+
+    # ------------------------------------------------------------------
+    # スナップショット
+    # ------------------------------------------------------------------
+    def save(self, path: Path) -> None:
+        """スナップショットを保存する（一時ファイル経由で置き換え）"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"fetched_at": self.fetched_at, "voices": [asdict(v) for v in self.voices]}
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["VoiceCatalog"]:
+        """スナップショットを読む（なければ、または壊れていればNone）"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            voices = [
+                VoiceInfo(
+                    name=v["name"],
+                    language_codes=tuple(v["language_codes"]),
+                    gender=v["gender"],
+                    natural_sample_rate_hertz=v.get("natural_sample_rate_hertz", 0),
+                )
+                for v in payload["voices"]
+            ]
+            return cls(voices, float(payload["fetched_at"]))
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            print(f"⚠️ 音声カタログのスナップショットが壊れているため無視します: {path}")
+            return None
+
+
+_catalog: Optional[VoiceCatalog] = None
+_catalog_lock = threading.Lock()
+_last_fetch_failure: Optional[float] = None
+
+
+def get_voice_catalog(
+    fetch: Optional[Callable[[], List[VoiceInfo]]] = None,
+    *,
+    path: Path = VOICE_CATALOG_PATH,
+    ttl: float = VOICE_CATALOG_TTL,
+    refresh: bool = False,
+) -> Optional[VoiceCatalog]:
+    """
+    音声カタログ（プロセス内で共有）
+
+    TTL 内のスナップショットがあればそれを使い、期限切れ・未取得なら fetch で取り直して保存する。
+    fetch が失敗した場合（オフラインなど）は古いスナップショットを使う。
+
+    Args:
+        fetch: APIから音声一覧を取得する関数（Noneの場合はスナップショットだけを使う）
+        path: スナップショットの保存先
+        ttl: スナップショットの有効期間（秒）
+        refresh: TTL に関係なく取り直す
+
+    Returns:
+        VoiceCatalog（fetch=None でスナップショットもない場合はNone）
+
+    Raises:
+        Exception: 取得に失敗し、使えるスナップショットもない場合は fetch の例外をそのまま投げる
+    """
+    global _catalog, _last_fetch_failure
+    with _catalog_lock:
+        catalog = _catalog
+        if catalog is None:
+            catalog = VoiceCatalog.load(path)
+        stale = catalog is None or catalog.age() > ttl
+        recently_failed = (
+            _last_fetch_failure is not None and time.monotonic() - _last_fetch_failure < FETCH_RETRY_INTERVAL
+        )
+        if fetch is not None and (refresh or (stale and not (recently_failed and catalog is not None))):
+            try:
+                start = time.monotonic()
+                catalog = VoiceCatalog(fetch(), time.time())
+                catalog.save(path)
+                print(f"✓ 音声カタログを取得: {len(catalog)}件（{time.monotonic() - start:.1f}秒）")
+            except Exception as e:
+                _last_fetch_failure = time.monotonic()
+                if catalog is None:
+                    raise
+                print(f"⚠️ 音声カタログを更新できないため、{catalog.age() / 3600:.0f}時間前のスナップショットを使います: {e}")
+        _catalog = catalog
+        return catalog
@@ -0,0 +1,10 @@
+"""
+pytest の共通設定
+
+リポジトリのルートから `python -m pytest -q` で実行する。
+API・ffmpeg を使わない純粋なヘルパーだけをテストする（Veo は generators.fake_veo の仮想時計で模擬する）。
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
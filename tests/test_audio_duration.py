@@ -0,0 +1,112 @@
+"""generators.audio_duration のテスト（WAV / MP3 / OGG のヘッダから長さを求める）"""
+import struct
+import wave
+
+import pytest
+
+from generators.audio_duration import audio_duration, audio_file_duration, mp3_duration, ogg_duration, wav_duration
+
+
+# MPEG1 Layer III・128kbps・44.1kHz・ステレオのフレームヘッダ（1フレーム 417 バイト・1152 サンプル）
+_MP3_HEADER = b"\xff\xfb\x90\x00"
+_MP3_FRAME_BYTES = 417
+_MP3_SIDE_INFO = 32
+
+
+def _mp3_frame(body=b""):
+    return (_MP3_HEADER + body).ljust(_MP3_FRAME_BYTES, b"\x00")
+
+
+def _xing_frame(tag, frames, lame=None, delay=0, padding=0):
+    body = b"\x00" * _MP3_SIDE_INFO + tag + (1).to_bytes(4, "big") + frames.to_bytes(4, "big")
+    if lame is not None:
+        body += lame.ljust(21, b"\x00") + ((delay << 12) | padding).to_bytes(3, "big")
+    return _mp3_frame(body)
+
+
+def _wav_bytes(tmp_path, frames, rate=24000):
+    path = tmp_path / "a.wav"
+    with wave.open(str(path), "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes(b"\x00\x00" * frames)
+    return path.read_bytes()
+
+
+def _ogg_page(granule, body=b""):
+    return b"OggS\x00\x00" + struct.pack("<q", granule) + b"\x00" * 13 + body
+
+
+def test_wav_duration(tmp_path):
+    assert wav_duration(_wav_bytes(tmp_path, 36000)) == pytest.approx(1.5)
+
+
+def test_wav_duration_with_unknown_data_size(tmp_path):
+    # ストリーミング出力では data チャンクのサイズが 0xFFFFFFFF のことがある
+    data = bytearray(_wav_bytes(tmp_path, 24000))
+    pos = data.find(b"data")
+    data[pos + 4:pos + 8] = b"\xff\xff\xff\xff"
+    assert wav_duration(bytes(data)) == pytest.approx(1.0)
+
+
+def test_wav_duration_rejects_other_formats():
+    with pytest.raises(ValueError):
+        wav_duration(b"ID3" + b"\x00" * 40)
+
+
+def test_mp3_duration_counts_cbr_frames():
+    id3 = b"ID3\x03\x00\x00" + bytes([0, 0, 0, 10]) + b"\x00" * 10
+    junk = b"\x00\x01\x02"  # 壊れたバイトは読み飛ばして再同期する
+    data = id3 + _mp3_frame() * 20 + junk + _mp3_frame() * 20 + b"TAG" + b"\x00" * 125
+    assert mp3_duration(data) == pytest.approx(40 * 1152 / 44100)
+
+
+def test_mp3_duration_uses_xing_frame_count():
+    data = _xing_frame(b"Xing", 1000) + _mp3_frame() * 3
+    assert mp3_duration(data) == pytest.approx(1000 * 1152 / 44100)
+
+
+@pytest.mark.parametrize("encoder", [b"LAME3.100", b"Lavf60.16"])
+def test_mp3_duration_trims_encoder_delay_and_padding(encoder):
+    data = _xing_frame(b"Info", 100, lame=encoder, delay=576, padding=1000) + _mp3_frame() * 3
+    assert mp3_duration(data) == pytest.approx((100 * 1152 - 576 - 1000) / 44100)
+
+
+def test_mp3_duration_rejects_data_without_frames():
+    with pytest.raises(ValueError):
+        mp3_duration(b"\x00" * 1000)
+
+
+def test_ogg_opus_duration_subtracts_pre_skip():
+    head = b"OpusHead\x01\x01" + (312).to_bytes(2, "little") + (24000).to_bytes(4, "little")
+    data = _ogg_page(0, head) + _ogg_page(48000 * 2 + 312)
+    assert ogg_duration(data) == pytest.approx(2.0)
+
+
+def test_ogg_vorbis_duration():
+    ident = b"\x01vorbis" + b"\x00" * 4 + b"\x01" + (22050).to_bytes(4, "little")
+    data = _ogg_page(0, ident) + _ogg_page(22050 * 3)
+    assert ogg_duration(data) == pytest.approx(3.0)
+
+
+def test_ogg_duration_rejects_unknown_data():
+    with pytest.raises(ValueError):
+        ogg_duration(b"RIFF" + b"\x00" * 40)
+    with pytest.raises(ValueError):
+        ogg_duration(_ogg_page(100, b"FLAC"))
+
+
+def test_audio_duration_dispatches_on_encoding(tmp_path):
+    data = _wav_bytes(tmp_path, 12000)
+    assert audio_duration(data, "LINEAR16") == pytest.approx(0.5)
+    with pytest.raises(ValueError):
+        audio_duration(data, "FLAC")
+
+
+def test_audio_file_duration_uses_the_suffix(tmp_path):
+    path = tmp_path / "voice.MP3"
+    path.write_bytes(_mp3_frame() * 10)
+    assert audio_file_duration(path) == pytest.approx(10 * 1152 / 44100)
+    with pytest.raises(ValueError):
+        audio_file_duration(tmp_path / "voice.flac")
@@ -0,0 +1,147 @@
+"""generators.content_cache のテスト（キー・LRU の追い出し・ジャーナルへの永続化とマージ）"""
+import pytest
+
+from generators.content_cache import ContentCache, make_key, tts_cache_key
+
+
+def _index(cache):
+    # ディスク上のインデックス（index.json + ジャーナル）を別プロセスと同じく読み直す
+    return dict(ContentCache(cache.root, max_bytes=cache.max_bytes)._index)
+
+
+def test_make_key_separates_parts():
+    assert make_key("ab", "c") != make_key("a", "bc")
+    assert make_key(b"x", 1) == make_key(b"x", 1)
+    assert make_key(b"x") != make_key("x")
+
+
+def test_tts_cache_key_normalizes_numbers():
+    args = ("こんにちは", "ja-JP", None, "FEMALE", "MP3")
+    assert tts_cache_key(*args, 1, 0, 0) == tts_cache_key(*args, 1.0, 0.0, 0.0)
+    assert tts_cache_key(*args, 1, 0, 0, ssml=True) != tts_cache_key(*args, 1, 0, 0)
+
+
+def test_rejects_non_positive_limit(tmp_path):
+    with pytest.raises(ValueError):
+        ContentCache(tmp_path, max_bytes=0)
+
+
+def test_put_get_and_materialize(tmp_path):
+    cache = ContentCache(tmp_path / "cache", max_bytes=1000, suffix=".bin")
+    assert cache.get("aa01") is None
+
+    path = cache.put_bytes("aa01", b"hello")
+    assert path.suffix == ".bin"
+    assert cache.get("aa01") == path
+    assert cache.total_bytes == 5 and len(cache) == 1
+
+    dest = cache.materialize("aa01", tmp_path / "out" / "a.bin")
+    assert dest.read_bytes() == b"hello"
+    assert cache.materialize("missing", tmp_path / "b.bin") is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ContentCache(tmp_path, max_bytes=100)
+    cache.put_bytes("aa01", b"a" * 40)
+    cache.put_bytes("bb01", b"b" * 40)
+    cache.get("aa01")  # aa01 の方が新しくなる
+    cache.put_bytes("cc01", b"c" * 40)
+
+    assert cache.get("bb01") is None
+    assert cache.get("aa01") is not None and cache.get("cc01") is not None
+    assert cache.total_bytes == 80
+    assert sorted(_index(cache)) == ["aa01", "cc01"]
+
+
+def test_keeps_a_single_entry_larger_than_the_limit(tmp_path):
+    cache = ContentCache(tmp_path, max_bytes=10)
+    cache.put_bytes("aa01", b"a" * 5)
+    cache.put_bytes("bb01", b"b" * 50)
+    assert len(cache) == 1 and cache.get("bb01") is not None
+
+
+def test_get_does_not_write_the_index(tmp_path):
+    cache = ContentCache(tmp_path, max_bytes=100)
+    cache.put_bytes("aa01", b"a")
+    before = _index(cache)
+    journal = (tmp_path / ContentCache.JOURNAL_NAME).read_bytes()
+    cache.get("aa01")
+    assert (tmp_path / ContentCache.JOURNAL_NAME).read_bytes() == journal  # 使用時刻はメモリ上だけで更新し、次の put で書く
+
+    cache.put_bytes("bb01", b"b")
+    assert _index(cache)["aa01"]["last_used"] > before["aa01"]["last_used"]
+
+
+def test_drops_entries_whose_file_was_removed(tmp_path):
+    cache = ContentCache(tmp_path, max_bytes=100)
+    path = cache.put_bytes("aa01", b"a")
+    path.unlink()
+    assert cache.get("aa01") is None
+    cache.put_bytes("bb01", b"b")
+    assert sorted(_index(cache)) == ["bb01"]
+
+
+def test_merges_entries_written_by_another_process(tmp_path):
+    first = ContentCache(tmp_path, max_bytes=100)
+    second = ContentCache(tmp_path, max_bytes=100)  # 別プロセスと同じく、インデックスを別々に持つ
+    first.put_bytes("aa01", b"a" * 30)
+    second.put_bytes("bb01", b"b" * 30)
+    assert sorted(_index(first)) == ["aa01", "bb01"]
+
+    # 両方の追加を合わせた合計で追い出す（aa01 は first が使ったので bb01 が先に消える）
+    first.get("aa01")
+    first.put_bytes("cc01", b"c" * 30)
+    second.put_bytes("dd01", b"d" * 30)
+    assert sorted(_index(second)) == ["aa01", "cc01", "dd01"]
+    assert second.total_bytes == 90
+
+
+def test_reload_restores_order_and_total(tmp_path):
+    cache = ContentCache(tmp_path, max_bytes=100)
+    cache.put_bytes("aa01", b"a" * 10)
+    cache.put_bytes("bb01", b"b" * 20)
+
+    reloaded = ContentCache(tmp_path, max_bytes=100)
+    assert reloaded.total_bytes == 30 and len(reloaded) == 2
+
+
+def test_broken_index_is_rebuilt(tmp_path):
+    (tmp_path / ContentCache.INDEX_NAME).write_text("{broken", encoding="utf-8")
+    cache = ContentCache(tmp_path, max_bytes=100)
+    assert len(cache) == 0
+    cache.put_bytes("aa01", b"a")
+    assert sorted(_index(cache)) == ["aa01"]
+
+
+def test_put_appends_to_the_journal_instead_of_rewriting_the_index(tmp_path):
+    cache = ContentCache(tmp_path, max_bytes=1000)
+    for i in range(5):
+        cache.put_bytes(f"aa{i:02d}", b"a")
+    assert not (tmp_path / ContentCache.INDEX_NAME).exists()
+    lines = (tmp_path / ContentCache.JOURNAL_NAME).read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 5
+
+
+def test_journal_is_compacted_into_the_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(ContentCache, "COMPACT_MIN_RECORDS", 3)
+    cache = ContentCache(tmp_path, max_bytes=1000)
+    other = ContentCache(tmp_path, max_bytes=1000)
+    cache.put_bytes("aa00", b"a")
+    for _ in range(3):
+        cache.put_bytes("aa01", b"a")  # 同じキーの上書きでジャーナルだけが伸びる
+    assert (tmp_path / ContentCache.INDEX_NAME).exists()
+    assert (tmp_path / ContentCache.JOURNAL_NAME).read_bytes() == b""
+
+    # まとめ直した後も、別のインスタンスは読み直して続きを書ける
+    other.put_bytes("bb01", b"b")
+    assert sorted(_index(cache)) == ["aa00", "aa01", "bb01"]
+    assert other.total_bytes == 3
+
+
+def test_broken_journal_line_is_skipped(tmp_path):
+    cache = ContentCache(tmp_path, max_bytes=100)
+    cache.put_bytes("aa01", b"a")
+    with open(tmp_path / ContentCache.JOURNAL_NAME, "ab") as f:
+        f.write(b"{broken\n")
+    cache.put_bytes("bb01", b"b")
+    assert sorted(_index(cache)) == ["aa01", "bb01"]
@@ -0,0 +1,148 @@
+"""generators.job_store のテスト（オペレーションの記録と再開、JobQueue のジョブ表）"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from generators.job_store import JobStore, OperationDiscarded, async_resume_operation, resume_operation
+
+
+def _ref(name):
+    # google.genai.types.GenerateVideosOperation の代わり（google-genai が無くても動かす）
+    return SimpleNamespace(name=name)
+
+
+def _finished(name, videos=("video",)):
+    return SimpleNamespace(name=name, done=True, error=None, response=SimpleNamespace(generated_videos=list(videos)))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(tmp_path / "jobs.sqlite3")
+
+
+def test_find_pending_returns_latest_running_operation(store):
+    store.record_submitted("key", "veo-3.1", "operations/1", source="test")
+    store.record_submitted("key", "veo-3.1", "operations/2", source="test")
+    store.record_submitted("other", "veo-3.1", "operations/3", source="test")
+
+    assert store.find_pending("key").name == "operations/2"
+    store.mark_done("operations/2", "output/a.mp4")
+    assert store.find_pending("key").name == "operations/1"
+    store.mark_failed("operations/1", "boom")
+    assert store.find_pending("key") is None
+
+
+def test_find_pending_ignores_expired_operations(store):
+    store.record_submitted("key", "veo-3.1", "operations/1", source="test")
+    assert store.find_pending("key", max_age=-1) is None
+
+
+def test_operations_filters_by_status(store):
+    store.record_submitted("a", "veo-3.1", "operations/1", source="test")
+    store.record_submitted("b", "veo-3.1", "operations/2", source="test")
+    store.mark_done("operations/1", "output/a.mp4")
+
+    done = store.operations("done")
+    assert [op.name for op in done] == ["operations/1"]
+    assert done[0].output_path == "output/a.mp4" and done[0].finished_at is not None
+    assert len(store.operations()) == 2
+
+
+def test_resume_returns_none_without_pending_operation(store):
+    assert resume_operation(store, "key", wait=pytest.fail, ref=_ref) is None
+
+
+def test_resume_waits_for_the_recorded_operation(store):
+    store.record_submitted("key", "veo-3.1", "operations/1", source="test")
+    waited = []
+
+    def wait(operation):
+        waited.append(operation.name)
+        return _finished(operation.name)
+
+    operation = resume_operation(store, "key", wait, ref=_ref)
+    assert waited == ["operations/1"]
+    assert operation.response.generated_videos == ["video"]
+    assert store.find_pending("key") is not None  # 保存し終えるまでは running のまま
+
+
+def test_resume_failure_marks_the_operation_failed(store):
+    store.record_submitted("key", "veo-3.1", "operations/1", source="test")
+
+    def wait(operation):
+        raise RuntimeError("404 operation not found")
+
+    assert resume_operation(store, "key", wait, ref=_ref) is None
+    failed = store.operations("failed")
+    assert [op.error for op in failed] == ["404 operation not found"]
+    assert store.find_pending("key") is None  # 次は新しく生成する
+
+
+def test_resume_without_videos_marks_the_operation_failed(store):
+    store.record_submitted("key", "veo-3.1", "operations/1", source="test")
+    assert resume_operation(store, "key", lambda op: _finished(op.name, videos=()), ref=_ref) is None
+    assert store.operations("failed")[0].error.startswith("no videos")
+
+
+def test_resume_timeout_keeps_the_operation_running(store):
+    store.record_submitted("key", "veo-3.1", "operations/1", source="test")
+
+    def wait(operation):
+        raise TimeoutError("local timeout")
+
+    with pytest.raises(TimeoutError):
+        resume_operation(store, "key", wait, ref=_ref)
+    assert store.find_pending("key").name == "operations/1"  # サーバー側は継続しているので次回また再開する
+
+
+def test_resume_discarded_is_recorded_and_raised(store):
+    # ヘッジで負けた試行の再開は、新しく投入せずに打ち切る
+    store.record_submitted("key", "veo-3.1", "operations/1", source="test")
+
+    def wait(operation):
+        raise OperationDiscarded("another attempt finished first")
+
+    with pytest.raises(OperationDiscarded):
+        resume_operation(store, "key", wait, ref=_ref)
+    assert store.operations("failed")[0].error == "discarded: another attempt finished first"
+    assert store.find_pending("key") is None
+
+
+def test_async_resume_discarded_is_recorded_and_raised(store):
+    store.record_submitted("key", "veo-3.1", "operations/1", source="test")
+
+    async def wait(operation):
+        raise OperationDiscarded("cancelled")
+
+    with pytest.raises(OperationDiscarded):
+        asyncio.run(async_resume_operation(store, "key", wait, ref=_ref))
+    assert store.operations("failed")[0].error == "discarded: cancelled"
+
+
+def test_async_resume(store):
+    store.record_submitted("key", "veo-3.1", "operations/1", source="test")
+
+    async def wait(operation):
+        return _finished(operation.name)
+
+    operation = asyncio.run(async_resume_operation(store, "key", wait, ref=_ref))
+    assert operation.name == "operations/1"
+
+
+def test_jobs_table_round_trip(store):
+    store.save_job("b", 2.0, {"id": "b", "status": "done"})
+    store.save_job("a", 1.0, {"id": "a", "status": "running"})
+    store.save_job("a", 1.0, {"id": "a", "status": "failed"})  # 同じIDは上書き
+
+    assert store.load_jobs(limit=10) == [{"id": "a", "status": "failed"}, {"id": "b", "status": "done"}]
+    assert store.load_jobs(limit=1) == [{"id": "b", "status": "done"}]
+
+    store.delete_jobs(["a"])
+    assert [job["id"] for job in store.load_jobs(limit=10)] == ["b"]
+
+
+def test_store_is_shared_across_instances(tmp_path):
+    # 別プロセスと同じく、同じファイルを開いた別のインスタンスから見える
+    JobStore(tmp_path / "jobs.sqlite3").record_submitted("key", "veo-3.1", "operations/1", source="test")
+    assert JobStore(tmp_path / "jobs.sqlite3").find_pending("key").name == "operations/1"
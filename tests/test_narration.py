@@ -0,0 +1,112 @@
+"""generators.narration のテスト（文・チャンクへの分割、mark 付き SSML、WAV の連結）"""
+import wave
+
+import pytest
+
+from generators.narration import (
+    MAX_REQUEST_BYTES,
+    concat_wav,
+    marked_ssml,
+    split_marked_narration,
+    split_narration,
+    split_sentences,
+)
+
+
+def _nbytes(text):
+    return len(text.encode("utf-8"))
+
+
+def _wav(path, frames, rate=24000):
+    with wave.open(str(path), "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes(b"\x00\x00" * frames)
+    return path.read_bytes()
+
+
+def test_split_sentences_on_japanese_and_english_breaks():
+    text = "今日は晴れ。明日は雨！  Is it? Yes.\n\n次の段落"
+    assert split_sentences(text) == ["今日は晴れ。", "明日は雨！", "Is it?", "Yes.", "次の段落"]
+
+
+def test_long_sentence_is_split_on_clauses_then_characters():
+    clause = "あ" * 30 + "、"
+    sentences = split_sentences(clause * 4 + "。", max_bytes=200)
+    assert all(_nbytes(s) <= 200 for s in sentences)
+    assert "".join(sentences) == clause * 4 + "。"
+
+    long_word = "x" * 250
+    assert split_sentences(long_word, max_bytes=100) == ["x" * 100, "x" * 100, "x" * 50]
+
+
+@pytest.mark.parametrize("max_bytes", [0, MAX_REQUEST_BYTES + 1])
+def test_rejects_out_of_range_limit(max_bytes):
+    with pytest.raises(ValueError):
+        split_sentences("テキスト", max_bytes=max_bytes)
+
+
+def test_split_narration_packs_whole_sentences():
+    text = "これは一文目です。" * 200
+    chunks = split_narration(text, max_bytes=1000)
+    assert len(chunks) > 1
+    assert all(_nbytes(c) <= 1000 for c in chunks)
+    assert all(c.endswith("。") for c in chunks)  # 文の途中で切らない
+    assert "".join(chunks) == text
+
+
+def test_split_narration_keeps_spaces_between_english_sentences():
+    chunks = split_narration("One. Two. Three.", max_bytes=100)
+    assert chunks == ["One. Two. Three."]
+
+
+def test_split_narration_drops_blank_text():
+    assert split_narration("   \n\n  ") == []
+
+
+def test_concat_wav_joins_pcm_without_gaps(tmp_path):
+    first = _wav(tmp_path / "a.wav", 24000)
+    second = _wav(tmp_path / "b.wav", 12000)
+    duration = concat_wav([first, second], tmp_path / "out.wav")
+    assert duration == pytest.approx(1.5)
+    with wave.open(str(tmp_path / "out.wav"), "rb") as reader:
+        assert reader.getnframes() == 36000
+
+
+def test_concat_wav_rejects_mismatched_formats(tmp_path):
+    first = _wav(tmp_path / "a.wav", 100, rate=24000)
+    second = _wav(tmp_path / "b.wav", 100, rate=16000)
+    with pytest.raises(ValueError):
+        concat_wav([first, second], tmp_path / "out.wav")
+    with pytest.raises(ValueError):
+        concat_wav([], tmp_path / "out.wav")
+
+
+def test_marked_ssml_numbers_and_escapes_sentences():
+    ssml = marked_ssml(["A&B.", "次の文。", "最後"], start=5)
+    assert ssml == '<speak><mark name="s5"/>A&amp;B. <mark name="s6"/>次の文。<mark name="s7"/>最後</speak>'
+
+
+def test_marked_ssml_rejects_requests_over_the_api_limit():
+    with pytest.raises(ValueError):
+        marked_ssml(["あ" * 1700])
+
+
+@pytest.mark.parametrize("text", [
+    "そうだ。" * 600,  # mark の分だけ SSML がテキストより大きく膨らむ
+    "A & B < C. " * 900,  # エスケープで膨らむ
+    "あ" * 9000,  # 区切りのない長文
+])
+def test_split_marked_narration_fits_the_ssml_limit(text):
+    chunks = split_marked_narration(text, max_bytes=4000)
+    start = 0
+    for sentences in chunks:
+        assert _nbytes(marked_ssml(sentences, start)) <= 4000
+        start += len(sentences)
+    assert "".join("".join(sentences) for sentences in chunks).replace(" ", "") == text.replace(" ", "")
+
+
+def test_split_marked_narration_rejects_tiny_limit():
+    with pytest.raises(ValueError):
+        split_marked_narration("テキスト", max_bytes=20)
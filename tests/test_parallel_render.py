@@ -0,0 +1,51 @@
+"""generators.parallel_render のテスト（区間の分割・音声のストリームコピー判定）"""
+import subprocess
+
+import pytest
+
+pytest.importorskip("moviepy")
+
+from moviepy import ColorClip, CompositeVideoClip, VideoFileClip  # noqa: E402
+
+from generators.ffmpeg_tools import ffmpeg_exe  # noqa: E402
+from generators.parallel_render import passthrough_audio_source, plan_segments  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def veo_like_video(tmp_path_factory):
+    # Veo の出力と同じく、AAC 音声つきの MP4
+    path = tmp_path_factory.mktemp("video") / "veo.mp4"
+    subprocess.run([
+        ffmpeg_exe(), "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", "color=c=gray:s=64x36:r=12:d=2",
+        "-f", "lavfi", "-i", "sine=frequency=440:duration=2",
+        "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", str(path),
+    ], check=True)
+    return path
+
+
+@pytest.fixture
+def video(veo_like_video):
+    clip = VideoFileClip(str(veo_like_video))
+    yield clip
+    clip.close()
+
+
+def test_plan_segments_covers_all_frames():
+    ranges = plan_segments(240, 24, 4)
+    assert ranges[0][0] == 0 and ranges[-1][1] == 240
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert plan_segments(30, 24, 8) == [(0, 30)]  # MIN_SEGMENT_SECONDS に満たなければ分けない
+
+
+def test_untouched_veo_audio_is_passed_through(video, veo_like_video):
+    overlay = ColorClip((16, 16), color=(255, 0, 0)).with_duration(video.duration)
+    composite = CompositeVideoClip([video, overlay])
+    assert passthrough_audio_source(video) == str(veo_like_video)
+    assert passthrough_audio_source(composite) == str(veo_like_video)
+
+
+def test_modified_audio_is_not_passed_through(video):
+    assert passthrough_audio_source(video.with_volume_scaled(0.5)) is None
+    assert passthrough_audio_source(video.subclipped(0.5)) is None
+    assert passthrough_audio_source(video.with_audio(video.audio.with_duration(1.0))) is None
@@ -0,0 +1,138 @@
+"""generators.polling のテスト（PollingPolicy / CompletionLog / wait_for_operation）"""
+import random
+
+import pytest
+
+from generators.fake_veo import FakeVeoClient, VirtualClock
+from generators.polling import (
+    DEFAULT_POLICY,
+    MIN_SAMPLES_FOR_TUNING,
+    CompletionLog,
+    PollingPolicy,
+    policy_for_model,
+    wait_for_operation,
+)
+
+
+def _quiet(polls, elapsed):
+    pass
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"first_delay": -1.0},
+    {"initial_interval": 0.0},
+    {"multiplier": 0.9},
+    {"initial_interval": 5.0, "max_interval": 4.0},
+    {"jitter": 1.0},
+])
+def test_policy_rejects_invalid_settings(kwargs):
+    with pytest.raises(ValueError):
+        PollingPolicy(**kwargs)
+
+
+def test_interval_grows_exponentially_up_to_max():
+    policy = PollingPolicy(first_delay=3.0, initial_interval=2.0, multiplier=2.0, max_interval=10.0, jitter=0.0)
+    assert [policy.interval(i) for i in range(5)] == [5.0, 4.0, 8.0, 10.0, 10.0]
+
+
+def test_interval_jitter_stays_within_bounds():
+    policy = PollingPolicy(initial_interval=4.0, max_interval=4.0, jitter=0.2)
+    rng = random.Random(0)
+    values = [policy.interval(3, rng) for _ in range(200)]
+    assert all(3.2 <= v <= 4.8 for v in values)
+    assert len(set(values)) > 1
+
+
+def test_from_completion_times_skips_the_fastest_jobs():
+    samples = [60.0 + i for i in range(40)]
+    policy = PollingPolicy.from_completion_times(samples, max_interval=8.0, jitter=0.0)
+    assert policy.initial_interval == pytest.approx(61.95 / 15)  # p05 / 15（1〜5秒に収める）
+    # 最初のポーリングは最速側（p05）の9割の時点
+    assert policy.interval(0) == pytest.approx(0.9 * 61.95)
+    assert policy.max_interval == 8.0
+
+
+def test_from_completion_times_requires_samples():
+    with pytest.raises(ValueError):
+        PollingPolicy.from_completion_times([])
+
+
+def test_completion_log_filters_by_model_and_skips_broken_lines(tmp_path):
+    log = CompletionLog(tmp_path / "times.jsonl")
+    assert log.samples("veo") == []
+
+    log.record("veo", 40.0)
+    log.record("other", 10.0)
+    log.record("veo", 50.0)
+    with open(log.path, "a", encoding="utf-8") as f:
+        f.write('{"model": "veo", "seco')  # 書き込み途中で落ちた行
+
+    assert log.samples("veo") == [40.0, 50.0]
+    assert log.samples() == [40.0, 10.0, 50.0]
+    assert log.samples("veo", limit=1) == [50.0]
+
+
+def test_completion_log_keeps_recent_samples_per_model_when_compacting(tmp_path):
+    log = CompletionLog(tmp_path / "times.jsonl", max_bytes=2000, keep=5)
+    for i in range(40):
+        log.record("veo", float(i))
+    log.record("other", 1.0)
+
+    assert log.path.stat().st_size <= 2000
+    assert log.samples("veo")[-1] == 39.0 and len(log.samples("veo")) <= 40
+    assert log.samples("other") == [1.0]  # 他のモデルの記録は追い出されない
+
+    log._compact()
+    assert log.samples("veo") == [35.0, 36.0, 37.0, 38.0, 39.0]
+
+
+def test_policy_for_model_uses_history_only_with_enough_samples(tmp_path):
+    log = CompletionLog(tmp_path / "times.jsonl")
+    for i in range(MIN_SAMPLES_FOR_TUNING - 1):
+        log.record("veo", 60.0 + i)
+    assert policy_for_model("veo", log) is DEFAULT_POLICY
+    assert policy_for_model(None, log) is DEFAULT_POLICY
+
+    log.record("veo", 80.0)
+    assert policy_for_model("veo", log) == PollingPolicy.from_completion_times(log.samples("veo"))
+
+
+def test_wait_for_operation_on_virtual_clock(tmp_path):
+    clock = VirtualClock()
+    client = FakeVeoClient(lambda: 30.0, clock=clock)
+    log = CompletionLog(tmp_path / "times.jsonl")
+    polls = []
+    policy = PollingPolicy(initial_interval=2.0, multiplier=1.5, max_interval=10.0, jitter=0.0)
+
+    operation = wait_for_operation(
+        client,
+        client.models.generate_videos(model="veo"),
+        policy=policy,
+        model="veo",
+        on_poll=lambda n, elapsed: polls.append(n),
+        log=log,
+        sleep=clock.sleep,
+        clock=clock.time,
+    )
+
+    assert operation.done
+    assert 30.0 <= clock.time() < 30.0 + policy.max_interval
+    assert polls == list(range(1, client.get_calls + 1))
+    assert log.samples("veo") == [pytest.approx(clock.time())]
+
+
+def test_wait_for_operation_times_out(tmp_path):
+    clock = VirtualClock()
+    client = FakeVeoClient(lambda: 100.0, clock=clock)
+    with pytest.raises(TimeoutError):
+        wait_for_operation(
+            client,
+            client.models.generate_videos(model="veo"),
+            policy=PollingPolicy(jitter=0.0),
+            timeout=20.0,
+            on_poll=_quiet,
+            log=CompletionLog(tmp_path / "times.jsonl"),
+            sleep=clock.sleep,
+            clock=clock.time,
+        )
+    assert clock.time() == pytest.approx(20.0)  # タイムアウトを超えて待たない
@@ -0,0 +1,39 @@
+"""generators.scratch のテスト（一時ファイル・古いファイルの掃除）"""
+import os
+import time
+
+from generators.scratch import ScratchArea
+
+
+def _old_file(scratch, age):
+    path = scratch.path(".mp4", prefix="preview")
+    path.write_bytes(b"x")
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_temp_file_is_removed_after_the_block(tmp_path):
+    scratch = ScratchArea(tmp_path)
+    with scratch.temp_file(".wav") as path:
+        path.write_bytes(b"x")
+    assert not path.exists()
+
+
+def test_sweep_if_due_removes_old_files_only_after_the_interval(tmp_path):
+    scratch = ScratchArea(tmp_path, max_file_age=60)
+    old = _old_file(scratch, 120)
+    new = _old_file(scratch, 0)
+
+    scratch.sweep_if_due(interval=3600)
+    assert old.exists()  # 前回の掃除（作成時）から間隔がたっていない
+
+    scratch.sweep_if_due(interval=0)
+    assert not old.exists() and new.exists()
+
+
+def test_orphan_directories_of_dead_processes_are_removed(tmp_path):
+    orphan = tmp_path / "999999999-deadbeef"
+    orphan.mkdir()
+    ScratchArea(tmp_path)
+    assert not orphan.exists()
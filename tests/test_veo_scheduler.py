@@ -0,0 +1,200 @@
+"""generators.veo_scheduler のテスト（優先度順の投入・クォータ再試行・retryDelay の読み取り）"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from generators.fake_veo import VirtualClock
+from generators.rate_limit import RetryPolicy, TokenBucket, is_quota_error, retry_delay, status_code
+from generators.veo_scheduler import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    QuotaExceededError,
+    SubmitCancelled,
+    VeoScheduler,
+)
+
+
+# 待たずに再試行する方針（クォータ超過の pause は応答の retryDelay だけ待つ）
+NO_BACKOFF = RetryPolicy(max_attempts=3, initial_backoff=0.0, max_backoff=0.0, jitter=0.0)
+
+
+class FakeAPIError(Exception):
+    """google.genai.errors.APIError と同じく .code と .details を持つ例外"""
+
+    def __init__(self, code, message="", details=None):
+        super().__init__(message)
+        self.code = code
+        self.details = details
+
+
+def _quota_error(delay="0.01s"):
+    details = {"error": {"code": 429, "details": [
+        {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": delay},
+    ]}}
+    return FakeAPIError(429, "RESOURCE_EXHAUSTED", details)
+
+
+def test_retry_delay_from_details():
+    assert retry_delay(_quota_error("37s")) == 37.0
+
+
+def test_retry_delay_from_message():
+    assert retry_delay(FakeAPIError(429, "Quota exceeded. Please retry in 12.5s.")) == 12.5
+    assert retry_delay(FakeAPIError(429, "{'retryDelay': '8s'}")) == 8.0
+    assert retry_delay(FakeAPIError(429, "Quota exceeded.")) is None
+
+
+def test_status_code_reads_grpc_style_codes():
+    class StatusCode:
+        name = "RESOURCE_EXHAUSTED"
+
+    class RpcError(Exception):
+        def code(self):
+            return StatusCode()
+
+    assert status_code(RpcError()) == 429
+    assert is_quota_error(RpcError())
+    assert status_code(ValueError()) is None
+
+
+def test_token_bucket_pause_on_virtual_clock():
+    clock = VirtualClock()
+    bucket = TokenBucket(rate=0.5, burst=1, clock=clock.time)
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == pytest.approx(2.0)  # 消費せずに待ち時間だけ返す
+
+    clock.sleep(2.0)
+    bucket.pause(10.0)
+    assert bucket.try_acquire() == pytest.approx(12.0)  # 再開してから補充が始まる
+    clock.sleep(12.0)
+    assert bucket.try_acquire() == 0.0
+
+
+def test_rejects_non_positive_rpm():
+    with pytest.raises(ValueError):
+        VeoScheduler({"veo-3.1": 0})
+
+
+def test_limits_by_longest_matching_prefix():
+    scheduler = VeoScheduler({"veo-3": 1.0, "veo-3.1": 2.0}, default_rpm=3.0)
+    assert scheduler._limit_key("veo-3.1-generate-preview") == "veo-3.1"
+    assert scheduler._limit_key("veo-3.0-generate-001") == "veo-3"
+    assert scheduler._limit_key("other") == "other"
+
+
+def test_interactive_submits_go_before_waiting_batch_submits():
+    scheduler = VeoScheduler({"m": 600.0})  # 0.1秒に1件
+    scheduler.pause("m", 0.3)
+    order = []
+
+    def submit(name, priority):
+        scheduler.submit("m", lambda: order.append(name), priority=priority)
+
+    threads = []
+    for name, priority in [("batch-1", PRIORITY_BATCH), ("batch-2", PRIORITY_BATCH), ("ui", PRIORITY_INTERACTIVE)]:
+        thread = threading.Thread(target=submit, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.05)  # 到着順を確定させる
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order == ["ui", "batch-1", "batch-2"]
+
+
+def test_submit_retries_quota_errors_then_succeeds():
+    scheduler = VeoScheduler({"m": 6000.0}, retry=NO_BACKOFF)
+    errors = [_quota_error(), _quota_error()]
+
+    def start():
+        if errors:
+            raise errors.pop(0)
+        return "operation"
+
+    assert scheduler.submit("m", start) == "operation"
+    assert errors == []
+
+
+def test_submit_raises_quota_exceeded_after_max_attempts():
+    scheduler = VeoScheduler({"m": 6000.0}, retry=NO_BACKOFF)
+    calls = []
+
+    def start():
+        calls.append(1)
+        raise _quota_error("0.01s")
+
+    with pytest.raises(QuotaExceededError) as info:
+        scheduler.submit("m", start)
+    assert len(calls) == NO_BACKOFF.max_attempts
+    assert info.value.delay == pytest.approx(0.01)
+
+
+def test_submit_does_not_retry_other_errors():
+    scheduler = VeoScheduler({"m": 6000.0}, retry=NO_BACKOFF)
+    calls = []
+
+    def start():
+        calls.append(1)
+        raise FakeAPIError(400, "bad request")
+
+    with pytest.raises(FakeAPIError):
+        scheduler.submit("m", start)
+    assert len(calls) == 1
+
+
+def test_cancelled_async_acquire_releases_its_place():
+    scheduler = VeoScheduler({"m": 60.0})  # 1秒に1件
+
+    async def main():
+        await scheduler.acquire_async("m")
+        waiter = asyncio.create_task(scheduler.acquire_async("m", PRIORITY_BATCH))
+        await asyncio.sleep(0.1)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler._waiting["m"] == []
+        # キャンセルした投入は枠を使わないので、次の投入は最初の1件から1秒で通る
+        return await scheduler.acquire_async("m")
+
+    waited = asyncio.run(main())
+    assert 0.5 < waited < 1.2
+
+
+def test_cancel_stops_waiting_during_a_quota_pause_without_using_a_slot():
+    scheduler = VeoScheduler({"m": 6000.0})
+    scheduler.pause("m", 30.0)  # 429 の retryDelay で止まっている
+    cancel = threading.Event()
+    threading.Timer(0.1, cancel.set).start()
+
+    started = time.monotonic()
+    with pytest.raises(SubmitCancelled):
+        scheduler.submit("m", pytest.fail, cancel=cancel)
+    assert time.monotonic() - started < 2.0  # retryDelay の間ずっと待たない
+    assert scheduler._waiting["m"] == []
+
+
+def test_cancelled_before_acquire_does_not_take_the_token():
+    scheduler = VeoScheduler({"m": 60.0})  # 1秒に1件
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(SubmitCancelled):
+        scheduler.submit("m", pytest.fail, cancel=cancel)
+    assert scheduler.acquire("m") < 0.1  # 枠は残っている
+
+
+def test_cancel_during_retry_backoff():
+    policy = RetryPolicy(max_attempts=3, initial_backoff=30.0, max_backoff=30.0, jitter=0.0)
+    scheduler = VeoScheduler({"m": 6000.0}, retry=policy)
+    cancel = threading.Event()
+    calls = []
+
+    def start():
+        calls.append(1)
+        cancel.set()
+        raise FakeAPIError(503, "unavailable")
+
+    with pytest.raises(SubmitCancelled):
+        scheduler.submit("m", start, cancel=cancel)
+    assert len(calls) == 1
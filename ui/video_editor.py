@@ -6,9 +6,32 @@
 """
 import streamlit as st
 from pathlib import Path
-from moviepy import VideoFileClip, ImageClip, CompositeVideoClip, TextClip
-from PIL import Image, ImageDraw, ImageFont
-import tempfile
+import sys
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from generators.overlay_layout import (
+    PROXY_WIDTH, CoverBadge, OverlayLayout, TitleBar, compose_overlay, export_overlay,
+    open_source_video, still_frame,
+)
+from generators.parallel_render import PROXY_SETTINGS, EncodeSettings, write_clip
+from generators.scratch import get_scratch
+
+# UIの選択肢 -> overlay_layout の値
+TITLE_ALIGN_OPTIONS = {"上部中央": "center", "上部左": "left", "上部右": "right"}
+COVER_CORNER_OPTIONS = {"右上": "top_right", "右下": "bottom_right", "左上": "top_left", "左下": "bottom_left"}
+
+# 書き出し方式
+EXPORT_BACKEND_OPTIONS = {"ffmpeg（高速）": "ffmpeg", "MoviePy（並列）": "moviepy"}
+
+# プレビュー方式
+PREVIEW_STILL = "静止画（即時）"
+PREVIEW_PROXY = "低解像度動画"
+
+# 開いたまま保持する元動画の数（1本ごとに ffmpeg のプロセスが残る）
+SOURCE_VIDEO_MAX_ENTRIES = 4
 
 # ページ設定
 st.set_page_config(
@@ -70,7 +93,7 @@ if layout_mode in ["タイトル上部固定", "表紙＋タイトル"]:
 
     title_position = st.sidebar.selectbox(
         "位置",
-        ["上部中央", "上部左", "上部右"]
+        list(TITLE_ALIGN_OPTIONS)
     )
 
     title_bg_opacity = st.sidebar.slider(
@@ -89,7 +112,7 @@ if layout_mode in ["表紙右側固定", "表紙＋タイトル"]:
 
     cover_position = st.sidebar.selectbox(
         "位置",
-        ["右上", "右下", "左上", "左下"]
+        list(COVER_CORNER_OPTIONS)
     )
 
     cover_margin = st.sidebar.slider(
@@ -97,146 +120,199 @@ if layout_mode in ["表紙右側固定", "表紙＋タイトル"]:
         10, 100, 30
     )
 
-# プレビュー生成ボタン
+# プレビュー設定
+st.sidebar.subheader("👀 プレビュー")
+
+preview_mode = st.sidebar.radio(
+    "プレビュー方式",
+    [PREVIEW_STILL, PREVIEW_PROXY],
+    help="配置の調整中は軽いプレビューで確認し、最後に「フル画質で書き出し」を押してください"
+)
+
+
+def build_layout() -> OverlayLayout:
+    """サイドバーの設定からオーバーレイ設定を作る"""
+    video_path = video_dir / selected_video
+
+    # タイトルオーバーレイ
+    title = None
+    if layout_mode in ["タイトル上部固定", "表紙＋タイトル"]:
+        title = TitleBar(
+            text=title_text,
+            fontsize=title_fontsize,
+            align=TITLE_ALIGN_OPTIONS[title_position],
+            bg_opacity=title_bg_opacity,
+        )
+
+    # 表紙オーバーレイ
+    cover = None
+    if layout_mode in ["表紙右側固定", "表紙＋タイトル"]:
+        # 表紙画像を探す
+        book_dir = Path(book_dirs[selected_book])
+        cover_files = list(book_dir.glob("表紙.*")) + list(book_dir.glob("*カバー*.png")) + list(book_dir.glob("*カバー*.pdf"))
+
+        if cover_files:
+            cover_path = cover_files[0]
+
+            # PDFの場合は画像に変換済みのものを使用
+            if cover_path.suffix == '.pdf':
+                cover_img_files = list(book_dir.glob("表紙.png")) + list(book_dir.glob("表紙.jpg"))
+                if cover_img_files:
+                    cover_path = cover_img_files[0]
+
+            if cover_path.suffix in ['.png', '.jpg', '.jpeg']:
+                cover = CoverBadge(
+                    path=str(cover_path),
+                    size_pct=cover_size,
+                    corner=COVER_CORNER_OPTIONS[cover_position],
+                    margin=cover_margin,
+                )
+
+    return OverlayLayout(video_path=str(video_path), title=title, cover=cover)
+
+
+class SourceVideoCache:
+    """
+    開いた元動画の LRU（追い出すときに close して、ffmpeg のプロセスを終わらせる）
+
+    st.cache_resource(max_entries=...) は追い出した VideoFileClip を閉じないので、自前で持つ。
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._clips: "OrderedDict[Tuple[str, int, Optional[int]], tuple]" = OrderedDict()
+
+    def get(self, video_path: str, mtime_ns: int, max_width: Optional[int]) -> tuple:
+        """開いた元動画と縮小率（なければ開き、古いものを閉じる）"""
+        key = (video_path, mtime_ns, max_width)
+        entry = self._clips.get(key)
+        if entry is None:
+            # 同じファイルの差し替え前の版は、もう使われないので先に閉じる
+            for stale in [k for k in self._clips if k[0] == video_path and k[2] == max_width]:
+                self._close(stale)
+            entry = open_source_video(video_path, max_width)
+            self._clips[key] = entry
+        self._clips.move_to_end(key)
+        while len(self._clips) > self.max_entries:
+            self._close(next(iter(self._clips)))
+        return entry
+
+    def _close(self, key: Tuple[str, int, Optional[int]]) -> None:
+        video, _ = self._clips.pop(key)
+        video.close()
+
+
+@st.cache_resource
+def source_video_cache() -> SourceVideoCache:
+    """セッションをまたいで共有する元動画の LRU"""
+    return SourceVideoCache(SOURCE_VIDEO_MAX_ENTRIES)
+
+
+def load_source_video(video_path: str, mtime_ns: int, max_width: Optional[int]):
+    """
+    元動画を開いたまま再実行をまたいで保持する（mtime_ns は差し替え検知用のキー）
+
+    設定を変えるたびに ffprobe とデコーダの起動をやり直さない。
+    追い出しで他のセッションが使っている動画を閉じないよう、source_video_lock を持った状態で呼ぶ。
+    """
+    return source_video_cache().get(video_path, mtime_ns, max_width)
+
+
+@st.cache_resource
+def source_video_lock() -> threading.Lock:
+    """共有している VideoFileClip のリーダーを複数セッションから同時に読まないためのロック"""
+    return threading.Lock()
+
+
+def replace_scratch_video(key: str, prefix: str) -> Path:
+    """前回の出力を削除して、新しい出力先をスクラッチ領域に用意する"""
+    scratch = get_scratch()
+    scratch.release(st.session_state.pop(key, None))
+    return scratch.path(suffix='.mp4', prefix=prefix)
+
+
+# プレビュー生成ボタン（低解像度。配置の確認用）
 if st.sidebar.button("🎬 プレビュー生成", type="primary"):
-    with st.spinner("動画を生成中..."):
+    with st.spinner("プレビューを生成中..."):
         try:
-            # 元動画を読み込み
-            video_path = video_dir / selected_video
-            video = VideoFileClip(str(video_path))
-
-            clips = [video]
-
-            # タイトルオーバーレイ
-            if layout_mode in ["タイトル上部固定", "表紙＋タイトル"]:
-                # タイトル画像を作成
-                width = int(video.w)
-                height = int(title_fontsize * 2)
-
-                title_img = Image.new('RGBA', (width, height), (0, 0, 0, int(255 * title_bg_opacity)))
-                draw = ImageDraw.Draw(title_img)
-
-                try:
-                    font = ImageFont.truetype("/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc", title_fontsize)
-                except:
-                    font = ImageFont.load_default()
-
-                bbox = draw.textbbox((0, 0), title_text, font=font)
-                text_width = bbox[2] - bbox[0]
-
-                # 位置決定
-                if title_position == "上部中央":
-                    text_x = (width - text_width) // 2
-                elif title_position == "上部左":
-                    text_x = 30
-                else:  # 上部右
-                    text_x = width - text_width - 30
-
-                text_y = (height - title_fontsize) // 2
-
-                draw.text((text_x, text_y), title_text, font=font, fill=(255, 255, 255, 255))
-
-                # 一時ファイルに保存
-                temp_title = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-                title_img.save(temp_title.name)
-                temp_title.close()
-
-                title_clip = ImageClip(temp_title.name, transparent=True).with_duration(video.duration)
-                title_clip = title_clip.with_position(("center", 0))
-                clips.append(title_clip)
-
-            # 表紙オーバーレイ
-            if layout_mode in ["表紙右側固定", "表紙＋タイトル"]:
-                # 表紙画像を探す
-                book_dir = Path(book_dirs[selected_book])
-                cover_files = list(book_dir.glob("表紙.*")) + list(book_dir.glob("*カバー*.png")) + list(book_dir.glob("*カバー*.pdf"))
-
-                if cover_files:
-                    cover_path = cover_files[0]
-
-                    # PDFの場合は画像に変換済みのものを使用
-                    if cover_path.suffix == '.pdf':
-                        cover_img_files = list(book_dir.glob("表紙.png")) + list(book_dir.glob("表紙.jpg"))
-                        if cover_img_files:
-                            cover_path = cover_img_files[0]
-
-                    if cover_path.suffix in ['.png', '.jpg', '.jpeg']:
-                        cover_img = Image.open(cover_path)
-
-                        # RGBAの場合はRGBに変換
-                        if cover_img.mode == 'RGBA':
-                            background = Image.new('RGB', cover_img.size, (255, 255, 255))
-                            background.paste(cover_img, mask=cover_img.split()[3])
-                            cover_img = background
-                        elif cover_img.mode != 'RGB':
-                            cover_img = cover_img.convert('RGB')
-
-                        # サイズ調整
-                        target_width = int(video.w * cover_size / 100)
-                        aspect = cover_img.height / cover_img.width
-                        target_height = int(target_width * aspect)
-
-                        cover_img = cover_img.resize((target_width, target_height), Image.Resampling.LANCZOS)
-
-                        # 一時ファイルに保存
-                        temp_cover = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
-                        cover_img.save(temp_cover.name, 'JPEG', quality=95)
-                        temp_cover.close()
-
-                        # 位置決定
-                        if cover_position == "右上":
-                            pos = (video.w - target_width - cover_margin, cover_margin)
-                        elif cover_position == "右下":
-                            pos = (video.w - target_width - cover_margin, video.h - target_height - cover_margin)
-                        elif cover_position == "左上":
-                            pos = (cover_margin, cover_margin)
-                        else:  # 左下
-                            pos = (cover_margin, video.h - target_height - cover_margin)
-
-                        cover_clip = ImageClip(temp_cover.name).with_duration(video.duration)
-                        cover_clip = cover_clip.with_position(pos)
-                        clips.append(cover_clip)
-
-            # 合成
-            final = CompositeVideoClip(clips)
-
-            # 一時ファイルに出力
-            temp_output = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4')
-            final.write_videofile(
-                temp_output.name,
-                fps=24,
-                codec='libx264',
-                audio_codec='aac',
-                preset='fast',
-                logger=None
-            )
+            layout = build_layout()
+
+            # 元動画は開いたまま使い回し、タイトル帯・表紙は変わったものだけ作り直される
+            with source_video_lock():
+                video, scale = load_source_video(
+                    layout.video_path, Path(layout.video_path).stat().st_mtime_ns, PROXY_WIDTH
+                )
+                preview = compose_overlay(video, layout, scale)
+
+                if preview_mode == PREVIEW_STILL:
+                    # 1フレームだけ合成（エンコードしない）
+                    st.session_state.preview_still = still_frame(preview)
+                    get_scratch().release(st.session_state.pop('preview_video', None))
+                else:
+                    # 縮小デコード + 低fps + ultrafast で書き出し
+                    temp_output = replace_scratch_video('preview_video', 'preview')
+                    write_clip(preview, temp_output, PROXY_SETTINGS)
+                    st.session_state.preview_video = str(temp_output)
+                    st.session_state.pop('preview_still', None)
 
-            # セッション状態に保存
-            st.session_state.preview_video = temp_output.name
             st.success("✅ プレビュー生成完了！")
 
         except Exception as e:
             st.error(f"❌ エラーが発生しました: {str(e)}")
 
+# フル画質の書き出し
+export_backend = st.sidebar.selectbox(
+    "書き出し方式",
+    list(EXPORT_BACKEND_OPTIONS),
+    help="ffmpeg はタイトル・表紙を ffmpeg の overlay フィルタで合成します（音声は再エンコードしません）"
+)
+
+if st.sidebar.button("📤 フル画質で書き出し"):
+    with st.spinner("フル画質で書き出し中..."):
+        try:
+            layout = build_layout()
+            temp_output = replace_scratch_video('export_video', 'export')
+
+            # 既定は ffmpeg の overlay フィルタで合成（音声はコピー）。MoviePy は区間並列で書き出す
+            export_overlay(
+                layout,
+                temp_output,
+                settings=EncodeSettings(fps=24, codec='libx264', preset='fast', audio_codec='aac'),
+                backend=EXPORT_BACKEND_OPTIONS[export_backend],
+            )
+
+            st.session_state.export_video = str(temp_output)
+            st.success("✅ 書き出し完了！")
+
+        except Exception as e:
+            st.error(f"❌ エラーが発生しました: {str(e)}")
+
 # メインエリア：プレビュー表示
 col1, col2 = st.columns([2, 1])
 
 with col1:
     st.subheader("🎥 プレビュー")
 
-    if 'preview_video' in st.session_state:
+    if 'preview_still' in st.session_state:
+        st.image(st.session_state.preview_still, caption="静止画プレビュー（低解像度）")
+    elif 'preview_video' in st.session_state:
         st.video(st.session_state.preview_video)
+        st.caption(f"低解像度プレビュー（横{PROXY_WIDTH}px・{PROXY_SETTINGS.fps:g}fps）")
+    else:
+        st.info("左側の設定を調整して「プレビュー生成」ボタンを押してください")
+
+    if 'export_video' in st.session_state:
+        st.subheader("📤 書き出し結果")
+        st.video(st.session_state.export_video)
 
         # ダウンロードボタン
-        with open(st.session_state.preview_video, 'rb') as f:
+        with open(st.session_state.export_video, 'rb') as f:
             st.download_button(
                 label="📥 動画をダウンロード",
                 data=f,
                 file_name=f"{selected_book}_promo.mp4",
                 mime="video/mp4"
             )
-    else:
-        st.info("左側の設定を調整して「プレビュー生成」ボタンを押してください")
 
 with col2:
     st.subheader("📋 現在の設定")
@@ -254,4 +330,4 @@ with col2:
 
 # フッター
 st.markdown("---")
-st.markdown("💡 **ヒント:** 設定を変更したら「プレビュー生成」ボタンを押して確認できます")
+st.markdown("💡 **ヒント:** 設定を変更したら「プレビュー生成」ボタンで配置を確認し、決まったら「フル画質で書き出し」を押してください")